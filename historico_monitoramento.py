@@ -0,0 +1,101 @@
+"""Histórico dos cartões já processados pelo modo monitor, em SQLite."""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+ARQUIVO_HISTORICO = "historico_monitoramento.db"
+# Formato anterior: reescrito inteiro a cada ciclo; importado uma única vez
+ARQUIVO_HISTORICO_JSON = "historico_monitoramento.json"
+
+
+class HistoricoMonitoramento:
+    """
+    Cartões processados, consultados por ID e por nome sem extensão.
+
+    Cada consulta é uma busca indexada e cada ciclo grava só os itens
+    novos, em uma transação, em vez de reescrever o histórico inteiro.
+    Seguro para uso por várias threads (uma conexão, protegida por lock).
+    """
+
+    def __init__(self, caminho: str = ARQUIVO_HISTORICO, caminho_json: str = ARQUIVO_HISTORICO_JSON):
+        self.caminho = caminho
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._conexao:
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS processados ("
+                "id TEXT PRIMARY KEY, nome_sem_ext TEXT, processado_em TEXT)"
+            )
+            self._conexao.execute(
+                "CREATE INDEX IF NOT EXISTS idx_nome ON processados(nome_sem_ext)"
+            )
+        if caminho_json and self.totais() == (0, 0) and os.path.exists(caminho_json):
+            self._importar_json(caminho_json)
+
+    def _importar_json(self, caminho_json: str) -> None:
+        with open(caminho_json, "r", encoding="utf-8") as f:
+            arquivos = json.load(f).get("arquivos_processados", [])
+
+        itens = []
+        for item in arquivos:
+            if isinstance(item, str):
+                # Formato antigo: apenas IDs
+                itens.append({"id": item, "nome_sem_ext": None})
+            else:
+                itens.append(item)
+        self.registrar(itens)
+
+    def _consultar(self, sql: str, parametros: Tuple) -> Optional[Tuple]:
+        with self._lock:
+            return self._conexao.execute(sql, parametros).fetchone()
+
+    def contem_id(self, arquivo_id: str) -> bool:
+        return self._consultar(
+            "SELECT 1 FROM processados WHERE id = ?", (arquivo_id,)
+        ) is not None
+
+    def contem_nome(self, nome_sem_ext: str) -> bool:
+        return self._consultar(
+            "SELECT 1 FROM processados WHERE nome_sem_ext = ?", (nome_sem_ext,)
+        ) is not None
+
+    def motivo_processado(self, arquivo_id: str, nome_sem_ext: str) -> Optional[str]:
+        """Retorna "ID" ou "NOME" se o arquivo já foi processado, None se é novo."""
+        # Uma só consulta por arquivo; o OR usa os dois índices
+        linha = self._consultar(
+            "SELECT id = ? FROM processados WHERE id = ? OR nome_sem_ext = ? "
+            "ORDER BY id = ? DESC LIMIT 1",
+            (arquivo_id, arquivo_id, nome_sem_ext, arquivo_id),
+        )
+        if linha is None:
+            return None
+        return "ID" if linha[0] else "NOME"
+
+    def registrar(self, itens: Iterable[Dict]) -> None:
+        """Grava os itens ({id, nome_sem_ext}) em uma única transação."""
+        agora = datetime.now().isoformat()
+        with self._lock, self._conexao:
+            self._conexao.executemany(
+                "INSERT OR IGNORE INTO processados (id, nome_sem_ext, processado_em) "
+                "VALUES (?, ?, ?)",
+                [
+                    (item["id"], item.get("nome_sem_ext"), item.get("processado_em") or agora)
+                    for item in itens
+                ],
+            )
+
+    def totais(self) -> Tuple[int, int]:
+        """Retorna (IDs, nomes distintos) registrados."""
+        return self._consultar(
+            "SELECT COUNT(*), COUNT(DISTINCT nome_sem_ext) FROM processados", ()
+        )
+
+    def fechar(self) -> None:
+        with self._lock:
+            self._conexao.close()
@@ -0,0 +1,65 @@
+"""Limitador de taxa (token bucket) para chamadas a APIs com cota por minuto."""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+
+class LimitadorTaxa:
+    """
+    Token bucket: libera até `por_minuto` chamadas por minuto.
+
+    Só bloqueia quando o balde está vazio, em vez de dormir um tempo fixo
+    entre chamadas. Seguro para uso por várias threads.
+    """
+
+    def __init__(
+        self,
+        por_minuto: float,
+        capacidade: Optional[float] = None,
+        relogio: Callable[[], float] = time.monotonic,
+        dormir: Callable[[float], None] = time.sleep,
+    ):
+        if por_minuto <= 0:
+            raise ValueError("por_minuto deve ser maior que zero")
+
+        self.por_minuto = float(por_minuto)
+        self.capacidade = float(capacidade if capacidade is not None else por_minuto)
+        self._relogio = relogio
+        self._dormir = dormir
+        self._tokens = self.capacidade
+        self._ultima_recarga = relogio()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, variavel: str, padrao: float) -> "LimitadorTaxa":
+        try:
+            por_minuto = float(os.getenv(variavel, "").strip() or padrao)
+        except ValueError:
+            por_minuto = float(padrao)
+        return cls(por_minuto if por_minuto > 0 else padrao)
+
+    def _recarregar(self) -> None:
+        agora = self._relogio()
+        decorrido = agora - self._ultima_recarga
+        self._ultima_recarga = agora
+        self._tokens = min(
+            self.capacidade,
+            self._tokens + decorrido * self.por_minuto / 60.0,
+        )
+
+    def aguardar(self) -> float:
+        """Consome um token, esperando se necessário. Retorna os segundos esperados."""
+        esperado = 0.0
+        with self._lock:
+            self._recarregar()
+            while self._tokens < 1.0:
+                espera = (1.0 - self._tokens) * 60.0 / self.por_minuto
+                self._dormir(espera)
+                esperado += espera
+                self._recarregar()
+            self._tokens -= 1.0
+        return esperado
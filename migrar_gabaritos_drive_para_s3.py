@@ -4,7 +4,6 @@
 from __future__ import annotations
 
 import argparse
-import io
 import json
 import os
 import posixpath
@@ -13,7 +12,6 @@ from dotenv import load_dotenv
 from botocore.exceptions import ClientError
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
 
 from anos_escolares import ANOS_ESCOLARES, nome_gabarito
 from storage_vultr import VultrS3Storage
@@ -65,15 +63,7 @@ def listar_gabaritos_drive(drive, pasta_id: str) -> dict:
 
 
 def baixar_drive(drive, arquivo_id: str) -> bytes:
-    buffer = io.BytesIO()
-    downloader = MediaIoBaseDownload(
-        buffer,
-        drive.files().get_media(fileId=arquivo_id),
-    )
-    concluido = False
-    while not concluido:
-        _, concluido = downloader.next_chunk()
-    return buffer.getvalue()
+    return drive.files().get_media(fileId=arquivo_id).execute()
 
 
 def main() -> None:
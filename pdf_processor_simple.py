@@ -7,12 +7,13 @@
 # ===========================================
 
 import os
+import shutil
 import tempfile
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Iterator, List, Optional, Tuple
 
 try:
-    from pdf2image import convert_from_path
+    from pdf2image import convert_from_path, pdfinfo_from_path
     from pdf2image.exceptions import PDFPageCountError, PDFPopplerTimeoutError
     PDF_SUPPORT_AVAILABLE = True
     print("OK - Suporte a PDF disponivel")
@@ -119,6 +120,21 @@ DEFAULT_DPI = 150  # 150 DPI = compatível com imagens de scan/foto normais
 # Formato de saida das imagens convertidas
 DEFAULT_FORMAT = 'PNG'  # PNG mantem qualidade, JPEG e menor
 
+# Threads do pdftoppm (uma pagina por thread; deixa um nucleo livre)
+PDF_THREAD_COUNT = max(1, (os.cpu_count() or 1) - 1)
+
+# No macOS o limite padrao de arquivos abertos (256) estoura com pdftoppm
+# multi-thread em PDFs grandes; elevar o limite "soft" ate o "hard"
+if sys.platform == "darwin":
+    try:
+        import resource
+        _soft, _hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        _alvo = 10000 if _hard == resource.RLIM_INFINITY else min(10000, _hard)
+        if _soft < _alvo:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (_alvo, _hard))
+    except (ImportError, ValueError, OSError) as e:
+        print(f"AVISO - Nao foi possivel elevar o limite de arquivos abertos: {e}")
+
 def is_pdf_file(file_path: str) -> bool:
     """
     Verifica se o arquivo e um PDF
@@ -141,82 +157,143 @@ def convert_pdf_to_images(pdf_path: str, dpi: int = DEFAULT_DPI,
     print(f"   Formato: {output_format}")
     
     try:
-        # Detectar se poppler esta disponivel no sistema
-        poppler_path = None
-        
-        # Tentar localizar poppler no Windows (incluindo variações de maiúscula/minúscula)
-        possible_poppler_paths = [
-            r"C:\poppler\Library\bin",  # 🆕 Novo caminho após instalação automática
-            r"C:\Program Files\poppler\bin",
-            r"C:\Program Files (x86)\poppler\bin",
-            r"C:\poppler\bin",
-            r"C:\Poppler\bin",  # Variação com P maiúsculo
-            r"C:\Program Files\Poppler\bin",
-            r"C:\Program Files (x86)\Poppler\bin",
-            r"C:\ProgramData\chocolatey\lib\poppler\tools\bin",  # Instalação via Chocolatey
-            os.path.join(os.getcwd(), "poppler", "bin"),
-            os.path.join(os.getcwd(), "Poppler", "bin")
-        ]
-        
-        for path in possible_poppler_paths:
-            if os.path.exists(path) and os.path.exists(os.path.join(path, "pdftoppm.exe")):
-                poppler_path = path
-                print(f"✓ OK - Poppler encontrado em: {poppler_path}")
-                break
-        
-        # 🆕 Se não encontrou, tentar instalar automaticamente
-        if not poppler_path and sys.platform == "win32":
-            print("\n⚠️ Poppler não encontrado!")
-            resposta = input("Deseja instalar automaticamente? (S/N): ").strip().upper()
-            
-            if resposta == 'S':
-                poppler_path = instalar_poppler_automaticamente()
-                if not poppler_path:
-                    print("❌ Falha na instalação automática")
-            else:
-                print("\n📝 INSTALAÇÃO MANUAL:")
-                print("  1. Baixe: https://github.com/oschwartz10612/poppler-windows/releases")
-                print("  2. Extraia para: C:\\poppler")
-                print("  3. Reinicie o script")
+        poppler_path = _localizar_poppler()
         
-        # Converter PDF para imagens
-        try:
-            if poppler_path:
-                images = convert_from_path(pdf_path, dpi=dpi, poppler_path=poppler_path)
-            else:
-                images = convert_from_path(pdf_path, dpi=dpi)
-        except Exception as e:
-            if "poppler" in str(e).lower():
-                raise Exception(
-                    f"ERRO relacionado ao Poppler: {e}\n\n"
-                    "SOLUCAO:\n"
-                    "1. Baixe poppler para Windows em: https://github.com/oschwartz10612/poppler-windows/releases\n"
-                    "2. Extraia para C:\\poppler\n"
-                    "3. Ou instale via Chocolatey: choco install poppler (como administrador)\n"
-                    "4. Ou adicione poppler/bin ao PATH do sistema"
-                )
-            else:
-                raise e
-        
-        # Salvar imagens temporarias
-        temp_files = []
-        base_name = Path(pdf_path).stem
-        
-        for i, image in enumerate(images):
-            # Nome do arquivo temporario
-            temp_filename = f"{base_name}_page_{i+1}.{output_format.lower()}"
-            temp_path = os.path.join(os.path.dirname(pdf_path), temp_filename)
-            
-            # Salvar imagem
-            image.save(temp_path, format=output_format, quality=95, dpi=(dpi, dpi))
-            temp_files.append(temp_path)
-        
-        return temp_files
+        # Converter PDF para imagens (pdftoppm multi-thread, paginas em disco
+        # em vez de pipe para nao segurar o PDF inteiro em memoria)
+        with tempfile.TemporaryDirectory() as pasta_temp:
+            return _converter_e_salvar(pdf_path, dpi, output_format, poppler_path, pasta_temp)
         
     except Exception as e:
         print(f"ERRO ao converter PDF: {e}")
         raise
 
+def stream_pdf_pages(pdf_path: str, dpi: int = DEFAULT_DPI) -> Iterator[np.ndarray]:
+    """
+    Gera as paginas do PDF (BGR, np.ndarray) conforme sao renderizadas
+
+    Renderiza em blocos de PDF_THREAD_COUNT paginas (um pdftoppm por pagina
+    do bloco), entregando cada bloco assim que fica pronto: quem consome
+    pode comecar o OMR da primeira pagina enquanto as seguintes renderizam.
+    """
+    if not PDF_SUPPORT_AVAILABLE:
+        raise Exception("pdf2image nao esta instalado. Execute: pip install pdf2image")
+    
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"Arquivo PDF nao encontrado: {pdf_path}")
+    
+    print(f"Convertendo PDF para imagens em memoria: {pdf_path}")
+    print(f"   DPI: {dpi}")
+    
+    opcoes = {"dpi": dpi, "fmt": "ppm", "thread_count": PDF_THREAD_COUNT}
+    poppler_path = _localizar_poppler()
+    if poppler_path:
+        opcoes["poppler_path"] = poppler_path
+    
+    total_paginas = pdfinfo_from_path(pdf_path, poppler_path=poppler_path)["Pages"]
+    for primeira in range(1, total_paginas + 1, PDF_THREAD_COUNT):
+        ultima = min(primeira + PDF_THREAD_COUNT - 1, total_paginas)
+        for image in convert_from_path(pdf_path, first_page=primeira, last_page=ultima, **opcoes):
+            pagina = cv2.cvtColor(np.asarray(image.convert("RGB")), cv2.COLOR_RGB2BGR)
+            image.close()
+            yield pagina
+
+def _localizar_poppler() -> Optional[str]:
+    """
+    Procura o Poppler nos caminhos conhecidos do Windows (oferecendo a
+    instalacao automatica se nao encontrar). None = usar o PATH do sistema
+    """
+    # Detectar se poppler esta disponivel no sistema
+    poppler_path = None
+    
+    # Tentar localizar poppler no Windows (incluindo variações de maiúscula/minúscula)
+    possible_poppler_paths = [
+        r"C:\poppler\Library\bin",  # 🆕 Novo caminho após instalação automática
+        r"C:\Program Files\poppler\bin",
+        r"C:\Program Files (x86)\poppler\bin",
+        r"C:\poppler\bin",
+        r"C:\Poppler\bin",  # Variação com P maiúsculo
+        r"C:\Program Files\Poppler\bin",
+        r"C:\Program Files (x86)\Poppler\bin",
+        r"C:\ProgramData\chocolatey\lib\poppler\tools\bin",  # Instalação via Chocolatey
+        os.path.join(os.getcwd(), "poppler", "bin"),
+        os.path.join(os.getcwd(), "Poppler", "bin")
+    ]
+    
+    for path in possible_poppler_paths:
+        if os.path.exists(path) and os.path.exists(os.path.join(path, "pdftoppm.exe")):
+            poppler_path = path
+            print(f"✓ OK - Poppler encontrado em: {poppler_path}")
+            break
+    
+    # 🆕 Se não encontrou, tentar instalar automaticamente
+    if not poppler_path and sys.platform == "win32":
+        print("\n⚠️ Poppler não encontrado!")
+        resposta = input("Deseja instalar automaticamente? (S/N): ").strip().upper()
+        
+        if resposta == 'S':
+            poppler_path = instalar_poppler_automaticamente()
+            if not poppler_path:
+                print("❌ Falha na instalação automática")
+        else:
+            print("\n📝 INSTALAÇÃO MANUAL:")
+            print("  1. Baixe: https://github.com/oschwartz10612/poppler-windows/releases")
+            print("  2. Extraia para: C:\\poppler")
+            print("  3. Reinicie o script")
+    
+    return poppler_path
+
+def _converter_e_salvar(pdf_path: str, dpi: int, output_format: str,
+                        poppler_path: Optional[str], pasta_temp: str) -> List[str]:
+    """
+    Rasteriza o PDF em pasta_temp e move cada pagina para o lado do PDF
+
+    O pdf2image ja divide as paginas em faixas, uma por processo pdftoppm
+    (thread_count). As paginas saem do pdftoppm ja no formato final
+    (paths_only), sem abrir e regravar cada imagem com o PIL.
+    """
+    formato = output_format.lower()
+    opcoes = {
+        "dpi": dpi,
+        "fmt": formato,
+        "thread_count": PDF_THREAD_COUNT,
+        "output_folder": pasta_temp,
+        "paths_only": True,
+    }
+    if formato in ("jpeg", "jpg"):
+        opcoes["jpegopt"] = {"quality": 95}
+    if poppler_path:
+        opcoes["poppler_path"] = poppler_path
+
+    try:
+        paginas = convert_from_path(pdf_path, **opcoes)
+    except Exception as e:
+        if "poppler" in str(e).lower():
+            raise Exception(
+                f"ERRO relacionado ao Poppler: {e}\n\n"
+                "SOLUCAO:\n"
+                "1. Baixe poppler para Windows em: https://github.com/oschwartz10612/poppler-windows/releases\n"
+                "2. Extraia para C:\\poppler\n"
+                "3. Ou instale via Chocolatey: choco install poppler (como administrador)\n"
+                "4. Ou adicione poppler/bin ao PATH do sistema"
+            )
+        else:
+            raise e
+    
+    # Mover paginas (em ordem) para os nomes esperados
+    temp_files = []
+    base_name = Path(pdf_path).stem
+    
+    for i, pagina in enumerate(paginas):
+        # Nome do arquivo temporario
+        temp_filename = f"{base_name}_page_{i+1}.{formato}"
+        temp_path = os.path.join(os.path.dirname(pdf_path), temp_filename)
+        
+        shutil.move(pagina, temp_path)
+        temp_files.append(temp_path)
+    
+    return temp_files
+
 def get_best_page_for_processing(image_paths: List[str]) -> str:
     """
     Seleciona a melhor pagina para processamento baseado no conteudo
@@ -319,10 +396,12 @@ def cleanup_temp_files(file_paths: List[str]) -> None:
     cleaned = 0
     for file_path in file_paths:
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                cleaned += 1
-                print(f"   Removido: {os.path.basename(file_path)}")
+            # Um unlink so (sem stat antes); arquivo ja ausente nao e erro
+            os.remove(file_path)
+            cleaned += 1
+            print(f"   Removido: {os.path.basename(file_path)}")
+        except FileNotFoundError:
+            pass
         except Exception as e:
             print(f"   AVISO - Erro ao remover {file_path}: {e}")
     
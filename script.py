@@ -24,9 +24,9 @@ import re
 import gspread
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
 from googleapiclient.errors import HttpError
 from datetime import datetime
+from statistics import fmean
 import os
 import os 
 from dotenv import load_dotenv
@@ -35,8 +35,24 @@ import io
 import tempfile
 import shutil
 import argparse
-from typing import List, Dict, Optional, Tuple
+import copy
+import hashlib
+import contextlib
+import json
+import logging
+import logging.handlers
+import multiprocessing
+import queue
+import random
+import sys
+import threading
+import traceback
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from typing import Callable, Iterator, List, Dict, Optional, Tuple, Union
 from sklearn.cluster import KMeans
+from limitador_taxa import LimitadorTaxa
+from historico_monitoramento import HistoricoMonitoramento
 from anos_escolares import (
     ANOS_ESCOLARES,
     NUMERO_POR_ANO,
@@ -65,6 +81,8 @@ try:
 except ImportError:
     GoogleDriveStorage = None
 
+from storage_local import PastaLocalStorage
+
 try:
     from state import log as registrar_status_log
     from state import record_correction, reset_session, update_status
@@ -83,7 +101,13 @@ except ImportError:
 
 # Importação do processador de PDF
 try:
-    from pdf_processor_simple import process_pdf_file, is_pdf_file, setup_pdf_support
+    from pdf_processor_simple import (
+        is_pdf_file,
+        process_pdf_all_pages,
+        process_pdf_file,
+        setup_pdf_support,
+        stream_pdf_pages,
+    )
     PDF_PROCESSOR_AVAILABLE = True
 except ImportError:
     PDF_PROCESSOR_AVAILABLE = False
@@ -97,12 +121,32 @@ except ImportError:
     print("⚠️ Gemini não disponível (google-generativeai não instalado)")
     genai = None
 
+# Importação condicional do Numba (acelera a contagem da correção)
+try:
+    from numba import njit
+    NUMBA_DISPONIVEL = True
+except ImportError:
+    NUMBA_DISPONIVEL = False
+
+# Importação condicional do orjson (serializa os caches em disco mais rápido)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 if os.name == "nt":
     pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 else:
     pytesseract.pytesseract.tesseract_cmd = os.getenv("TESSERACT_CMD", "tesseract")
 
+# Tupla (e não lista): str.endswith aceita a tupla e percorre as extensões em C
 EXTENSOES_SUPORTADAS = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.pdf', '.webp')
+# Imagens aceitas na listagem das pastas de lote (listar_arquivos_suportados)
+EXTENSOES_IMAGEM_LOTE = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff')
+# Cartões aceitos no modo monitor; comparados com a extensão já separada
+# do nome, sem varrer o nome inteiro
+EXTENSOES_IMAGEM_MONITOR = ('.png', '.jpg', '.jpeg')
+EXTENSOES_CARTAO_MONITOR = ('.pdf',) + EXTENSOES_IMAGEM_MONITOR
 DRIVE_MIME_TO_EXT = {
     'application/pdf': '.pdf',
     'image/png': '.png',
@@ -113,8 +157,85 @@ DRIVE_MIME_TO_EXT = {
     'image/webp': '.webp'
 }
 
+# Nome de arquivo de gabarito, sem diferenciar maiúsculas: .match() para
+# "começa com gabarito" e .search() para "contém gabarito" (sem lower() por nome)
+RE_GABARITO = re.compile(r'gabarito', re.IGNORECASE)
+
+# Cota de requisições ao Gemini por minuto (GEMINI_RPM; padrão: 15, plano gratuito).
+# Substitui as pausas fixas entre alunos: só espera quando a cota se esgota.
+LIMITADOR_GEMINI = LimitadorTaxa.from_env("GEMINI_RPM", 15)
+# Cota do Google Sheets: 60 leituras e 60 escritas/min por usuário; o primeiro
+# envio a cada planilha faz ~2 leituras (abrir planilha + checar cabeçalho) e
+# 1 escrita, os demais só a escrita (aba em cache)
+LIMITADOR_SHEETS = LimitadorTaxa.from_env("SHEETS_RPM", 30)
+
+# Envio ao Sheets em segundo plano: linhas por lote, lotes aguardando na
+# fila (acima disso o laço principal espera) e tentativas por chamada à API
+TAMANHO_LOTE_ENVIO_SHEETS = 20
+MAX_LOTES_PENDENTES_SHEETS = 4
+TENTATIVAS_ENVIO_SHEETS = 3
+# Lotes enviados ao mesmo tempo (threads consumindo a fila); a cota continua
+# valendo via LIMITADOR_SHEETS e, como no lote de pastas, lotes diferentes
+# podem chegar à planilha fora de ordem
+ENVIADORES_LOTE_SHEETS = 3
+
+# PDFs com menos páginas que isso fazem o OMR no próprio processo: subir o
+# pool de processos custaria mais do que o paralelismo economiza
+MIN_PAGINAS_POOL_PDF = 4
+# Páginas de PDF em andamento (OMR e cabeçalho) por worker do pool: acima
+# disso o laço para de tirar páginas da fila e a renderização espera, o
+# que limita as páginas (arrays) em memória no processo principal e nos workers
+PAGINAS_EM_ANDAMENTO_POR_WORKER = 2
+
+# Máximo de cabeçalhos enviados numa mesma requisição ao Gemini
+TAMANHO_LOTE_GEMINI = 10
+# Máximo de páginas inteiras (extração completa) numa mesma requisição: cada
+# página pesa bem mais que um recorte de cabeçalho
+TAMANHO_LOTE_GEMINI_PAGINAS = 6
+
+# Extrações de cabeçalho (Gemini/OCR) em andamento ao mesmo tempo que o OMR
+MAX_CABECALHOS_SIMULTANEOS = 4
+
+# Cabeçalho considerado em branco (sem chamar o Gemini) quando a faixa
+# superior é quase uniforme ou quase sem pixels escuros
+DESVIO_MAX_CABECALHO_VAZIO = 5.0
+FRACAO_MIN_TINTA_CABECALHO = 0.01
+
+# Cache em disco dos cabeçalhos lidos pelo Gemini (hash da imagem -> dados),
+# para reprocessamentos do mesmo cartão não gastarem cota
+ARQUIVO_CACHE_CABECALHOS = os.path.join(".cache", "cabecalhos_gemini.json")
+TTL_CACHE_CABECALHOS = 3600  # segundos
+
+# Cache em disco da detecção OMR (hash do conteúdo da imagem -> respostas),
+# um arquivo por cartão; incrementar a versão ao mudar a detecção
+PASTA_CACHE_OMR = os.path.join(".cache", "omr")
+VERSAO_CACHE_OMR = 1
+TTL_CACHE_OMR = 30 * 24 * 3600  # segundos (30 dias); arquivos mais antigos são apagados
+
+# Cache em disco dos gabaritos do Vultr S3 já processados (ano -> versão do
+# objeto e respostas); o monitor só baixa e processa de novo o que mudou
+ARQUIVO_CACHE_GABARITOS = os.path.join(".cache", "gabaritos_s3.json")
+
+# Pasta padrão do gabarito (lida uma vez, após o load_dotenv)
+DRIVER_FOLDER_9ANO_PADRAO = os.getenv('DRIVER_FOLDER_9ANO')
+
+# Logger das rotinas de correção em lote; silenciar com
+# log.setLevel(logging.WARNING) em execuções não interativas
+log = logging.getLogger("correcao")
+if not log.handlers:
+    _handler_log = logging.StreamHandler(sys.stdout)
+    _handler_log.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(_handler_log)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
 # Kill switch global para retificação de perspectiva (padrão: ativo)
 PERSPECTIVA_HABILITADA = True
+# Ignora o cache de resultados e reprocessa todos os alunos (--force)
+FORCAR_REPROCESSAMENTO = False
+# PDFs com várias páginas: grava as páginas em PNG temporários em vez de
+# mantê-las em memória (--low-memory, para PDFs muito grandes)
+BAIXA_MEMORIA = False
 CARTOES_SEM_QUADRADOS_ALINHAMENTO = set()
 
 def normalizar_respostas_backend(respostas: List[str]) -> List[str]:
@@ -272,6 +393,21 @@ def enviar_resultado_para_backend(
 # SEÇÃO 0: PREPROCESSAMENTO DE ARQUIVOS (PDF/IMAGEM)
 # ===========================================
 
+def converter_para_preto_e_branco_array(img: np.ndarray, threshold: int = 180) -> np.ndarray:
+    """
+    Binariza uma imagem já carregada, sem tocar no disco
+    
+    Args:
+        img: Imagem BGR ou em tons de cinza
+        threshold: Valor de threshold (0-255)
+        
+    Returns:
+        Imagem preto e branco (uint8, 0/255)
+    """
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    _, img_pb = cv2.threshold(gray, threshold, 255, cv2.THRESH_BINARY)
+    return img_pb
+
 def converter_para_preto_e_branco(image_path: str, threshold: int = 180, salvar: bool = True) -> str:
     """
     Converte uma imagem colorida para preto e branco puro (binarizado)
@@ -289,8 +425,7 @@ def converter_para_preto_e_branco(image_path: str, threshold: int = 180, salvar:
         if img is None:
             raise Exception(f"Não foi possível carregar a imagem: {image_path}")
         
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        _, img_pb = cv2.threshold(gray, threshold, 255, cv2.THRESH_BINARY)
+        img_pb = converter_para_preto_e_branco_array(img, threshold)
         
         if salvar:
             nome_base = os.path.splitext(image_path)[0]
@@ -897,15 +1032,17 @@ def listar_arquivos_suportados(diretorio: str = ".") -> dict:
         'todos': []
     }
     
-    extensoes_imagem = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff')
-    
-    for arquivo in os.listdir(diretorio):
-        caminho_completo = os.path.join(diretorio, arquivo)
-        if os.path.isfile(caminho_completo):
-            if arquivo.lower().endswith('.pdf'):
+    # scandir traz o tipo de cada entrada junto com o nome (sem um stat por arquivo)
+    with os.scandir(diretorio) as entradas:
+        for entrada in entradas:
+            if not entrada.is_file():
+                continue
+            arquivo = entrada.name
+            nome_minusculo = arquivo.lower()
+            if nome_minusculo.endswith('.pdf'):
                 arquivos_suportados['pdfs'].append(arquivo)
                 arquivos_suportados['todos'].append(arquivo)
-            elif arquivo.lower().endswith(extensoes_imagem):
+            elif nome_minusculo.endswith(EXTENSOES_IMAGEM_LOTE):
                 arquivos_suportados['imagens'].append(arquivo)
                 arquivos_suportados['todos'].append(arquivo)
     
@@ -919,27 +1056,36 @@ def listar_arquivos_suportados(diretorio: str = ".") -> dict:
 # SEÇÃO 2: OMR - DETECÇÃO DE ALTERNATIVAS MARCADAS
 # ===========================================
 
-def calcular_preenchimento_real(gray, contorno) -> float:
+def _pixels_dentro_contorno(gray, contorno) -> np.ndarray:
     """
-    🆕 CALCULA PREENCHIMENTO REAL DA BOLHA
-    Analisa pixels DENTRO do contorno para determinar % de área pintada
-    """
-    # Criar máscara do contorno
-    mask = np.zeros(gray.shape, dtype=np.uint8)
-    cv2.drawContours(mask, [contorno], -1, 255, -1)
+    Retorna os pixels em tons de cinza que ficam DENTRO do contorno.
     
-    # Pegar apenas pixels dentro do contorno
-    pixels_contorno = cv2.bitwise_and(gray, gray, mask=mask)
-    pixels_validos = pixels_contorno[mask == 255]
+    A máscara é desenhada só no retângulo envolvente do contorno (alguns
+    pixels), e não em uma imagem inteira do tamanho do cartão por contorno.
+    """
+    x, y, w, h = cv2.boundingRect(contorno)
+    if w <= 0 or h <= 0:
+        return np.empty(0, dtype=gray.dtype)
     
+    roi = gray[y:y + h, x:x + w]
+    mask = np.zeros(roi.shape[:2], dtype=np.uint8)
+    cv2.drawContours(mask, [contorno], -1, 255, -1, offset=(-x, -y))
+    return roi[mask == 255]
+
+def _percentual_pintado(pixels_validos: np.ndarray) -> float:
+    """Percentual de pixels escuros (< 180 = pintados)."""
     if len(pixels_validos) == 0:
         return 0.0
     
-    # Contar pixels escuros (< 180 = pintados)
-    pixels_pintados = np.sum(pixels_validos < 180)
-    percentual = (pixels_pintados / len(pixels_validos)) * 100
-    
-    return percentual
+    pixels_pintados = np.count_nonzero(pixels_validos < 180)
+    return (pixels_pintados / len(pixels_validos)) * 100
+
+def calcular_preenchimento_real(gray, contorno) -> float:
+    """
+    🆕 CALCULA PREENCHIMENTO REAL DA BOLHA
+    Analisa pixels DENTRO do contorno para determinar % de área pintada
+    """
+    return _percentual_pintado(_pixels_dentro_contorno(gray, contorno))
 
 def analisar_qualidade_marcacao(gray, contorno) -> dict:
     """
@@ -961,16 +1107,16 @@ def analisar_qualidade_marcacao(gray, contorno) -> dict:
         approx = cv2.approxPolyDP(contorno, 0.035 * perimetro, True)
         approx_vertices = len(approx)
 
+    # Pixels internos extraídos uma única vez (máscara só no bounding box)
+    pixels_contorno = _pixels_dentro_contorno(gray, contorno)
+    
     # Intensidade média
-    mask = np.zeros(gray.shape, dtype=np.uint8)
-    cv2.drawContours(mask, [contorno], -1, 255, -1)
-    intensidade_media = cv2.mean(gray, mask=mask)[0]
+    intensidade_media = float(pixels_contorno.mean()) if len(pixels_contorno) > 0 else 0.0
     
     # Preenchimento real
-    preenchimento = calcular_preenchimento_real(gray, contorno)
+    preenchimento = _percentual_pintado(pixels_contorno)
     
     # Desvio padrão (uniformidade da marcação)
-    pixels_contorno = gray[mask == 255]
     desvio_padrao = np.std(pixels_contorno) if len(pixels_contorno) > 0 else 0
     
     return {
@@ -1113,9 +1259,17 @@ def eh_marcacao_valida_44(metricas: dict, crop_width: int, crop_height: int, deb
 
     return True, "OK"
 
+def _em_cinza(img: np.ndarray) -> np.ndarray:
+    """Imagem em tons de cinza; não converte (nem copia) se já estiver em cinza."""
+    return img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+def _em_bgr(img: np.ndarray) -> np.ndarray:
+    """Cópia em 3 canais, para desenhar as marcações de debug em cor."""
+    return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR) if img.ndim == 2 else img.copy()
+
 def salvar_debug_deteccao(image_path: str, bolhas_pintadas: list, crop: np.ndarray) -> None:
 
-    debug_img = crop.copy()
+    debug_img = _em_bgr(crop)
     
     for cx, cy, cnt, intensidade, area, circ, preenchimento in bolhas_pintadas:
         cv2.circle(debug_img, (cx, cy), 8, (0, 255, 0), 2)
@@ -1316,7 +1470,7 @@ def detectar_marcadores_area_respostas(img_cv: np.ndarray) -> Optional[Dict[str,
     if height < 120 or width < 120:
         return None
 
-    gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
+    gray = _em_cinza(img_cv)
     candidatos = _detectar_candidatos_marcadores(gray)
     if len(candidatos) < 4:
         return None
@@ -1421,7 +1575,7 @@ def _salvar_debug_marcadores_respostas(
     if not image_path:
         return
 
-    debug_img = img_cv.copy()
+    debug_img = _em_bgr(img_cv)
     pontos = np.array(
         [
             info_marcadores["top_left"]["centro"],
@@ -1691,7 +1845,7 @@ def detectar_respostas_pdf(image_path: str, debug: bool = False) -> list:
         origem_pdf=True,
     )
 
-    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    gray = _em_cinza(crop)
     
     # Parâmetros otimizados para PDF de alta resolução
     if is_high_res:
@@ -1762,12 +1916,13 @@ def detectar_respostas_pdf(image_path: str, debug: bool = False) -> list:
                             if (margem_x < cx < crop_width - margem_x and
                                 margem_y < cy < crop_height - margem_y):
                                 
-                                # Calcular intensidade e preenchimento
-                                mask = np.zeros(gray.shape, dtype=np.uint8)
-                                cv2.drawContours(mask, [cnt], -1, 255, -1)
-                                intensidade_media = cv2.mean(gray, mask=mask)[0]
+                                # Calcular intensidade e preenchimento (máscara uint8
+                                # só no retângulo envolvente, não na imagem inteira)
+                                mask = np.zeros((h, w), dtype=np.uint8)
+                                cv2.drawContours(mask, [cnt], -1, 255, -1, offset=(-x, -y))
+                                intensidade_media = cv2.mean(gray[y:y + h, x:x + w], mask=mask)[0]
                                 
-                                pixels_escuros = cv2.countNonZero(cv2.bitwise_and(thresh, mask))
+                                pixels_escuros = cv2.countNonZero(cv2.bitwise_and(thresh[y:y + h, x:x + w], mask))
                                 percentual_preenchimento = pixels_escuros / area
                                 
                                 # CRITÉRIOS MENOS RIGOROSOS para PDFs - Aceita mais marcações
@@ -1897,20 +2052,42 @@ def detectar_respostas_pdf(image_path: str, debug: bool = False) -> list:
         return ['?'] * num_questoes
 
 
-def detectar_respostas_52_questoes(image_path: str, debug: bool = False, eh_gabarito: bool = False) -> list:
+def _carregar_imagem_omr(
+    imagem: Union[str, np.ndarray],
+    nome_origem: str = "",
+) -> Tuple[Optional[np.ndarray], str]:
+    """
+    Aceita caminho ou imagem já em memória, evitando reler do disco.
+    Imagens em tons de cinza (ex.: páginas já em P&B) seguem como estão,
+    sem expandir para 3 canais só para voltar a cinza na detecção.
+    
+    Returns:
+        (imagem BGR ou cinza, ou None; caminho usado para debug/identificação)
+    """
+    if isinstance(imagem, np.ndarray):
+        return imagem, nome_origem
+    return cv2.imread(imagem), imagem
+
+def detectar_respostas_52_questoes(
+    image_path: Union[str, np.ndarray],
+    debug: bool = False,
+    eh_gabarito: bool = False,
+    nome_origem: str = "",
+) -> list:
     """
     OMR: Detecta APENAS alternativas pintadas usando OpenCV para cartões com 52 questões.
     Layout: 4 colunas x 13 linhas = 52 questões
     
     Args:
-        image_path: Caminho da imagem
+        image_path: Caminho da imagem ou imagem já carregada (np.ndarray)
         debug: Se deve mostrar informações de debug
         eh_gabarito: Se True, usa crop otimizado para gabaritos (impressão limpa)
+        nome_origem: Caminho do arquivo de origem quando image_path é um array
     
     Returns:
         Lista com 52 respostas detectadas (A/B/C/D ou '?' para não detectadas)
     """
-    img_cv = cv2.imread(image_path)
+    img_cv, image_path = _carregar_imagem_omr(image_path, nome_origem)
     if img_cv is None:
         print(f"❌ Erro ao carregar imagem: {image_path}")
         return ['?'] * 52
@@ -1924,7 +2101,7 @@ def detectar_respostas_52_questoes(image_path: str, debug: bool = False, eh_gaba
     )
 
     # Converter para escala de cinza
-    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    gray = _em_cinza(crop)
     
     # Aplicar filtro suave
     blur = cv2.GaussianBlur(gray, (9, 9), 0)
@@ -2228,20 +2405,26 @@ def detectar_respostas_52_questoes(image_path: str, debug: bool = False, eh_gaba
     
     return respostas_finais
 
-def detectar_respostas_44_questoes(image_path: str, debug: bool = False, eh_gabarito: bool = False) -> list:
+def detectar_respostas_44_questoes(
+    image_path: Union[str, np.ndarray],
+    debug: bool = False,
+    eh_gabarito: bool = False,
+    nome_origem: str = "",
+) -> list:
     """
     OMR: Detecta APENAS alternativas pintadas usando OpenCV para cartões com 44 questões.
     Layout: 4 colunas x 11 linhas = 44 questões
     
     Args:
-        image_path: Caminho da imagem
+        image_path: Caminho da imagem ou imagem já carregada (np.ndarray)
         debug: Se deve mostrar informações de debug
         eh_gabarito: Se True, usa crop otimizado para gabaritos (impressão limpa)
+        nome_origem: Caminho do arquivo de origem quando image_path é um array
     
     Returns:
         Lista com 44 respostas detectadas (A/B/C/D ou '?' para não detectadas)
     """
-    img_cv = cv2.imread(image_path)
+    img_cv, image_path = _carregar_imagem_omr(image_path, nome_origem)
     if img_cv is None:
         print(f"❌ Erro ao carregar imagem: {image_path}")
         return ['?'] * 44
@@ -2255,7 +2438,7 @@ def detectar_respostas_44_questoes(image_path: str, debug: bool = False, eh_gaba
     )
 
     # Converter para escala de cinza
-    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    gray = _em_cinza(crop)
     
     # Aplicar filtro suave
     blur = cv2.GaussianBlur(gray, (3, 3), 0)
@@ -2572,7 +2755,7 @@ def detectar_respostas_universal(image_path: str, debug: bool = False) -> list:
         num_questoes=None,
         debug=debug,
     )
-    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    gray = _em_cinza(crop)
     blur = cv2.GaussianBlur(gray, (3, 3), 0)
     _, thresh = cv2.threshold(blur, 30, 155, cv2.THRESH_BINARY_INV)
     
@@ -2622,23 +2805,114 @@ def detectar_respostas_universal(image_path: str, debug: bool = False) -> list:
             print("📋 Detectado cartão com 52 questões")
         return detectar_respostas_52_questoes(image_path, debug)
 
-def detectar_respostas_por_tipo(image_path: str, num_questoes: int = 52, debug: bool = False, eh_gabarito: bool = False) -> list:
+def detectar_respostas_por_tipo(
+    image_path: Union[str, np.ndarray],
+    num_questoes: int = 52,
+    debug: bool = False,
+    eh_gabarito: bool = False,
+    nome_origem: str = "",
+) -> list:
     """
     Função auxiliar que escolhe a detecção correta baseada no número de questões.
     
     Args:
-        image_path: Caminho da imagem do cartão
+        image_path: Caminho da imagem do cartão ou imagem já carregada (np.ndarray)
         num_questoes: Número de questões (44 ou 52)
         debug: Se deve exibir informações de debug
         eh_gabarito: Se True, usa crop específico para gabaritos
+        nome_origem: Caminho do arquivo de origem quando image_path é um array
         
     Returns:
         Lista com as respostas detectadas (A/B/C/D ou '?')
+        
+    Em acerto de cache (PASTA_CACHE_OMR) a detecção não roda: as imagens e
+    mensagens de debug não são geradas. Use FORCAR_REPROCESSAMENTO para obtê-las.
     """
+    # Mesma imagem (mesmo conteúdo) já detectada em execução anterior
+    chave_cache = None if FORCAR_REPROCESSAMENTO else _chave_cache_omr(image_path, num_questoes, eh_gabarito)
+    if chave_cache:
+        respostas = _respostas_omr_em_cache(chave_cache)
+        if respostas is not None:
+            if debug:
+                print(f"♻️ Detecção em cache ({chave_cache[:12]}...)")
+            return respostas
+    
     if num_questoes == 44:
-        return detectar_respostas_44_questoes(image_path, debug=debug, eh_gabarito=eh_gabarito)
+        respostas = detectar_respostas_44_questoes(image_path, debug=debug, eh_gabarito=eh_gabarito, nome_origem=nome_origem)
     else:
-        return detectar_respostas_52_questoes(image_path, debug=debug, eh_gabarito=eh_gabarito)
+        respostas = detectar_respostas_52_questoes(image_path, debug=debug, eh_gabarito=eh_gabarito, nome_origem=nome_origem)
+    
+    if chave_cache:
+        _guardar_respostas_omr(chave_cache, respostas)
+    return respostas
+
+def _chave_cache_omr(imagem: Union[str, np.ndarray], num_questoes: int, eh_gabarito: bool) -> Optional[str]:
+    """
+    Chave do cache OMR: hash BLAKE2b do conteúdo (arquivo ou array),
+    tipo de cartão, gabarito/aluno e versão da detecção.
+    """
+    try:
+        conteudo = _hash_imagem(imagem)
+    except OSError:
+        return None
+    tipo = "g" if eh_gabarito else "a"
+    return f"{conteudo}_{num_questoes}_{tipo}_v{VERSAO_CACHE_OMR}"
+
+def _hash_imagem(imagem: Union[str, np.ndarray]) -> str:
+    """Hash BLAKE2b do conteúdo: bytes do arquivo ou pixels + formato do array."""
+    if isinstance(imagem, np.ndarray):
+        h = hashlib.blake2b(np.ascontiguousarray(imagem).tobytes(), digest_size=16)
+        h.update(str(imagem.shape).encode())
+        return h.hexdigest()
+    return _hash_arquivo(imagem)
+
+def _respostas_omr_em_cache(chave: str) -> Optional[list]:
+    """Respostas guardadas para a chave, ou None se não houver (ou estiver inválida)."""
+    try:
+        with open(os.path.join(PASTA_CACHE_OMR, f"{chave}.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)['respostas']
+    except (OSError, ValueError, KeyError):
+        return None
+
+# Poda do cache OMR já feita neste processo (ver _podar_cache_omr)
+_CACHE_OMR_PODADO = False
+
+def _podar_cache_omr() -> None:
+    """
+    Apaga da PASTA_CACHE_OMR os arquivos com mais de TTL_CACHE_OMR (inclusive
+    temporários deixados por gravações interrompidas). Roda uma vez por processo.
+    """
+    global _CACHE_OMR_PODADO
+    if _CACHE_OMR_PODADO:
+        return
+    _CACHE_OMR_PODADO = True
+    limite = time.time() - TTL_CACHE_OMR
+    try:
+        entradas = list(os.scandir(PASTA_CACHE_OMR))
+    except OSError:
+        return
+    for entrada in entradas:
+        try:
+            if entrada.is_file() and entrada.stat().st_mtime < limite:
+                os.remove(entrada.path)
+        except OSError:
+            pass  # Outro processo do pool já apagou
+
+def _guardar_respostas_omr(chave: str, respostas: list) -> None:
+    """
+    Salva as respostas detectadas. Grava num temporário e renomeia, para que
+    processos do pool lendo ao mesmo tempo nunca vejam um arquivo pela metade.
+    """
+    _podar_cache_omr()
+    caminho = os.path.join(PASTA_CACHE_OMR, f"{chave}.json")
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(PASTA_CACHE_OMR, exist_ok=True)
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump({'respostas': list(respostas)}, f, ensure_ascii=False)
+        os.replace(temporario, caminho)
+    except OSError as e:
+        print(f"⚠️ Não foi possível salvar o cache OMR: {e}")
 
 # ===========================================
 # SEÇÃO 3: GEMINI - ANÁLISE INTELIGENTE DE IMAGENS
@@ -2676,17 +2950,22 @@ def configurar_gemini():
         print(f"❌ Erro ao configurar Gemini: {e}")
         return None
 
-def converter_imagem_para_base64(image_path: str):
+def converter_imagem_para_base64(image_path: Union[str, np.ndarray]):
     """
     Converte imagem para objeto PIL Image para envio ao Gemini.
     
     Args:
-        image_path: Caminho do arquivo de imagem
+        image_path: Caminho do arquivo de imagem ou imagem já carregada (BGR)
     
     Returns:
         PIL Image ou None em caso de erro
     """
     try:
+        if isinstance(image_path, np.ndarray):
+            if image_path.ndim == 2:
+                return Image.fromarray(image_path)
+            return Image.fromarray(cv2.cvtColor(image_path, cv2.COLOR_BGR2RGB))
+        
         with open(image_path, "rb") as image_file:
             image_data = image_file.read()
             
@@ -2746,15 +3025,13 @@ def extrair_cabecalho_com_gemini(model, image_path: str) -> Optional[dict]:
         }
         """
         
-        # Gerar resposta
+        # Gerar resposta (respeitando a cota de requisições por minuto)
+        LIMITADOR_GEMINI.aguardar()
         response = model.generate_content([prompt, image])
         resposta_texto = response.text.strip()
         
         # Tentar extrair JSON da resposta
         try:
-            import json
-            import re
-            
             # Procurar por JSON na resposta
             json_match = re.search(r'\{.*\}', resposta_texto, re.DOTALL)
             if json_match:
@@ -2779,7 +3056,51 @@ def extrair_cabecalho_com_gemini(model, image_path: str) -> Optional[dict]:
         print(f"❌ Erro na extração do cabeçalho com Gemini")
         return None
 
+# Resultados do OCR de fallback por conteúdo da imagem: reprocessar o mesmo
+# arquivo (nova tentativa, depuração) não repete o Tesseract. Os usados há
+# mais tempo saem primeiro quando o limite é atingido.
+MAX_CACHE_OCR = 256
+_CACHE_OCR: "OrderedDict[Tuple[str, str], object]" = OrderedDict()
+_lock_cache_ocr = threading.Lock()
+
+def _ocr_com_cache(tipo: str, imagem: Union[str, np.ndarray], calcular: Callable):
+    """
+    Retorna calcular() para a imagem, reaproveitando o resultado quando o
+    mesmo conteúdo (hash) já passou pelo OCR `tipo` neste processo.
+    
+    Args:
+        tipo: Qual OCR ("ano" ou "cabecalho"), parte da chave
+        imagem: Caminho ou array da imagem (só usado para o hash)
+        calcular: Executa o OCR de fato
+    """
+    if FORCAR_REPROCESSAMENTO:
+        return calcular()
+    try:
+        chave = (tipo, _hash_imagem(imagem))
+    except (OSError, ValueError):
+        return calcular()
+    
+    with _lock_cache_ocr:
+        if chave in _CACHE_OCR:
+            _CACHE_OCR.move_to_end(chave)
+            return copy.copy(_CACHE_OCR[chave])
+    
+    resultado = calcular()
+    with _lock_cache_ocr:
+        _CACHE_OCR[chave] = copy.copy(resultado)
+        if len(_CACHE_OCR) > MAX_CACHE_OCR:
+            _CACHE_OCR.popitem(last=False)
+    return resultado
+
 def extrair_cabecalho_com_ocr_fallback(image_path: str) -> dict:
+    """OCR do cabeçalho (ver _extrair_cabecalho_com_ocr), em cache pelo conteúdo da imagem."""
+    return _ocr_com_cache(
+        "cabecalho",
+        image_path,
+        lambda: _extrair_cabecalho_com_ocr(image_path),
+    )
+
+def _extrair_cabecalho_com_ocr(image_path: str) -> dict:
     """
     Função de fallback usando OCR tradicional (Tesseract) quando Gemini falha.
     
@@ -2957,7 +3278,6 @@ def extrair_cabecalho_com_ocr_fallback(image_path: str) -> dict:
         
     except Exception as e:
         print(f"❌ Erro no OCR fallback: {e}")
-        import traceback
         traceback.print_exc()
         return None
 
@@ -3022,14 +3342,12 @@ def extrair_dados_completos_com_gemini(model, image_path: str, nome_arquivo: str
         }
         """
         
-        # Gerar resposta
+        # Gerar resposta (respeitando a cota de requisições por minuto)
+        LIMITADOR_GEMINI.aguardar()
         response = model.generate_content([prompt, image])
         resposta_texto = response.text.strip()
         
         # Processar JSON
-        import json
-        import re
-        
         json_match = re.search(r'\{.*\}', resposta_texto, re.DOTALL)
         if json_match:
             dados = json.loads(json_match.group())
@@ -3038,22 +3356,10 @@ def extrair_dados_completos_com_gemini(model, image_path: str, nome_arquivo: str
             if not all(key in dados for key in ['escola', 'aluno', 'turma', 'nascimento']):
                 return None
             
-            ano_escolar = detectar_ano_escolar(dados.get('ano_escolar'))
-
-            if not ano_escolar and nome_arquivo:
-                ano_escolar = detectar_ano_escolar(nome_arquivo)
-                if ano_escolar:
-                    print(f"   ✅ Ano detectado pelo nome do arquivo: {rotulo_ano(ano_escolar)}")
-
-            if not ano_escolar:
-                ano_escolar = detectar_ano_por_turma(dados.get('turma', ''))
-
-            dados['ano_escolar'] = ano_escolar
-            dados['num_questoes'] = numero_questoes_por_ano(ano_escolar)
-
-            if ano_escolar:
+            _completar_ano_escolar(dados, nome_arquivo)
+            if dados['ano_escolar']:
                 print(
-                    f"   ✅ Gemini detectou: {rotulo_ano(ano_escolar)} "
+                    f"   ✅ Gemini detectou: {rotulo_ano(dados['ano_escolar'])} "
                     f"({dados['num_questoes']} questões)"
                 )
             
@@ -3065,26 +3371,254 @@ def extrair_dados_completos_com_gemini(model, image_path: str, nome_arquivo: str
         print(f"   ⚠️ Erro no Gemini otimizado: {e}")
         return None
 
+def _completar_ano_escolar(dados: dict, nome_arquivo: Optional[str] = None) -> dict:
+    """
+    Normaliza o ano escolar lido pelo Gemini (ou, na falta dele, o do nome do
+    arquivo ou da turma) e preenche 'ano_escolar' e 'num_questoes' em `dados`.
+    """
+    ano_escolar = detectar_ano_escolar(dados.get('ano_escolar'))
+
+    if not ano_escolar and nome_arquivo:
+        ano_escolar = detectar_ano_escolar(nome_arquivo)
+        if ano_escolar:
+            print(f"   ✅ Ano detectado pelo nome do arquivo: {rotulo_ano(ano_escolar)}")
+
+    if not ano_escolar:
+        ano_escolar = detectar_ano_por_turma(dados.get('turma', ''))
+
+    dados['ano_escolar'] = ano_escolar
+    dados['num_questoes'] = numero_questoes_por_ano(ano_escolar)
+    return dados
+
+# Campos que todo objeto devolvido por um lote do Gemini precisa trazer
+_CHAVES_LOTE_GEMINI = ('escola', 'aluno', 'turma', 'nascimento')
+
+def _gemini_em_lote(
+    model,
+    imagens: list,
+    preparar: Callable,
+    montar_prompt: Callable[[int], str],
+    mapear: Callable[[dict], dict],
+    tamanho_lote: int,
+) -> List[Optional[dict]]:
+    """
+    Envia as imagens ao Gemini em lotes de até `tamanho_lote` por requisição
+    e lê a resposta (um array JSON com um objeto por imagem, na ordem).
+    
+    Args:
+        model: Instância do modelo Gemini configurado
+        imagens: Imagens na ordem (caminhos ou arrays)
+        preparar: Converte uma imagem na parte enviada ao Gemini (None = não enviar)
+        montar_prompt: Prompt para um lote com o número de imagens dado
+        mapear: Converte cada objeto válido do array no resultado da posição
+        tamanho_lote: Máximo de imagens por requisição
+    
+    Returns:
+        Lista com um resultado por imagem, ou None nas posições não enviadas
+        ou que não puderam ser lidas (o chamador faz a extração individual)
+    """
+    resultados: List[Optional[dict]] = [None] * len(imagens)
+    if not model or not imagens:
+        return resultados
+    
+    for inicio in range(0, len(imagens), tamanho_lote):
+        indices = []
+        partes = []
+        for indice in range(inicio, min(inicio + tamanho_lote, len(imagens))):
+            parte = preparar(imagens[indice])
+            if parte is not None:
+                partes.append(parte)
+                indices.append(indice)
+        
+        if not partes:
+            continue
+        
+        try:
+            LIMITADOR_GEMINI.aguardar()
+            response = model.generate_content([montar_prompt(len(partes)), *partes])
+            json_match = re.search(r'\[.*\]', response.text.strip(), re.DOTALL)
+            if not json_match:
+                print("⚠️ Lote Gemini sem JSON válido - usando extração individual")
+                continue
+            
+            dados_lote = json.loads(json_match.group())
+            if not isinstance(dados_lote, list) or len(dados_lote) != len(indices):
+                print("⚠️ Lote Gemini com quantidade inesperada de imagens - usando extração individual")
+                continue
+            
+            for indice, dados in zip(indices, dados_lote):
+                if isinstance(dados, dict) and all(chave in dados for chave in _CHAVES_LOTE_GEMINI):
+                    resultados[indice] = mapear(dados)
+        
+        except Exception as e:
+            print(f"⚠️ Erro no lote Gemini: {e} - usando extração individual")
+    
+    return resultados
+
+def extrair_dados_completos_em_lote(
+    model,
+    imagens: List[Union[str, np.ndarray]],
+    nome_arquivo: str = None,
+    tamanho_lote: int = TAMANHO_LOTE_GEMINI_PAGINAS,
+) -> List[Optional[dict]]:
+    """
+    Versão em lote de extrair_dados_completos_com_gemini: uma requisição ao
+    Gemini para até `tamanho_lote` páginas (ex.: as páginas de um PDF).
+    
+    Args:
+        model: Instância do modelo Gemini configurado
+        imagens: Caminhos (ou arrays) das páginas, na ordem
+        nome_arquivo: Nome do arquivo (opcional, para detecção do ano)
+        tamanho_lote: Máximo de páginas por requisição
+    
+    Returns:
+        Lista com um dicionário por página (mesmas chaves da versão
+        individual), ou None nas posições que não puderam ser lidas
+    """
+    def montar_prompt(quantidade: int) -> str:
+        return f"""
+        Você receberá {quantidade} imagens, cada uma de um cartão resposta diferente.
+        Para CADA imagem, na mesma ordem em que foram enviadas, extraia:
+
+        1. NOME DA ESCOLA - procure por campos como "Nome da Escola:", "Escola:", etc.
+        2. NOME DO ALUNO - procure por campos como "Nome completo:", "Nome:", "Aluno:", etc.
+        3. TURMA - procure por campos como "Turma:", "Série:", "Ano:", etc.
+        4. DATA DE NASCIMENTO - procure por campos como "Data de nascimento:", "Nascimento:", etc.
+        5. ANO ESCOLAR - "4° ano" → "4ano", "5° ano" → "5ano", "8° ano" → "8ano", "9° ano" → "9ano"
+
+        INSTRUÇÕES:
+        - Extraia APENAS o conteúdo, SEM os rótulos
+        - Se não encontrar, retorne "N/A"
+        - Ignore títulos como "AVALIAÇÃO DIAGNÓSTICA", "CARTÃO-RESPOSTA"
+        - Ignore nomes de times (Flamengo, Santos, etc.) e personagens (Naruto, Goku, etc.)
+        - IMPORTANTE: Diferencie cuidadosamente 4°, 5°, 8° e 9° ano
+
+        FORMATO DE RESPOSTA (retorne exatamente um array JSON com {quantidade} objetos):
+        [
+            {{"escola": "...", "aluno": "...", "turma": "...", "nascimento": "...", "ano_escolar": "..."}}
+        ]
+        """
+    
+    return _gemini_em_lote(
+        model,
+        imagens,
+        preparar=converter_imagem_para_base64,
+        montar_prompt=montar_prompt,
+        mapear=lambda dados: _completar_ano_escolar(dados, nome_arquivo),
+        tamanho_lote=tamanho_lote,
+    )
+
+
+def _gravar_json(caminho: str, dados) -> None:
+    """
+    Grava `dados` como JSON em UTF-8, com orjson quando instalado.
+    
+    Usado pelos caches reescritos inteiros a cada atualização, em que o
+    custo da serialização cresce com o tamanho do cache.
+    """
+    if orjson is not None:
+        with open(caminho, 'wb') as f:
+            f.write(orjson.dumps(dados, option=orjson.OPT_SERIALIZE_NUMPY))
+        return
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False)
+
+_cache_cabecalhos: Optional[Dict[str, dict]] = None
+_lock_cache_cabecalhos = threading.Lock()
+
+def _carregar_cache_cabecalhos() -> Dict[str, dict]:
+    """Carrega (uma vez por processo) o cache de cabeçalhos salvo em disco."""
+    global _cache_cabecalhos
+    if _cache_cabecalhos is None:
+        try:
+            with open(ARQUIVO_CACHE_CABECALHOS, 'r', encoding='utf-8') as f:
+                _cache_cabecalhos = json.load(f)
+        except (OSError, ValueError):
+            _cache_cabecalhos = {}
+    return _cache_cabecalhos
+
+def _cabecalho_em_cache(chave: str) -> Optional[dict]:
+    """Dados do cabeçalho guardados para a imagem, se ainda dentro do TTL."""
+    with _lock_cache_cabecalhos:
+        entrada = _carregar_cache_cabecalhos().get(chave)
+    if entrada and time.time() - entrada['salvo_em'] < TTL_CACHE_CABECALHOS:
+        return dict(entrada['dados'])
+    return None
+
+def _guardar_cabecalho_em_cache(chave: str, dados: dict) -> None:
+    """Guarda o cabeçalho extraído, descartando entradas expiradas, e salva em disco."""
+    with _lock_cache_cabecalhos:
+        cache = _carregar_cache_cabecalhos()
+        agora = time.time()
+        for expirada in [k for k, v in cache.items() if agora - v['salvo_em'] >= TTL_CACHE_CABECALHOS]:
+            del cache[expirada]
+        cache[chave] = {'salvo_em': agora, 'dados': dados}
+        try:
+            os.makedirs(os.path.dirname(ARQUIVO_CACHE_CABECALHOS), exist_ok=True)
+            _gravar_json(ARQUIVO_CACHE_CABECALHOS, cache)
+        except OSError as e:
+            print(f"⚠️ Não foi possível salvar o cache de cabeçalhos: {e}")
+
+def cabecalho_em_branco(cinza: np.ndarray) -> bool:
+    """
+    Verifica se a faixa do cabeçalho (imagem em tons de cinza) está vazia:
+    praticamente sem variação ou sem pixels escuros.
+    """
+    if cinza.size == 0:
+        return True
+    if float(cinza.std()) < DESVIO_MAX_CABECALHO_VAZIO:
+        return True
+    return float(np.count_nonzero(cinza < 128)) / cinza.size < FRACAO_MIN_TINTA_CABECALHO
+
+def _cabecalho_do_arquivo_em_branco(image_path: Union[str, np.ndarray]) -> bool:
+    """Carrega a imagem e testa a faixa do cabeçalho (25% superiores, como no OCR)."""
+    if isinstance(image_path, np.ndarray):
+        cinza = _em_cinza(image_path)
+    else:
+        cinza = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    if cinza is None:
+        return False
+    return cabecalho_em_branco(cinza[:int(cinza.shape[0] * 0.25)])
 
-def extrair_cabecalho_com_fallback(model, image_path, numero_aluno=None):
+def extrair_cabecalho_com_fallback(model, image_path, numero_aluno=None, padrao_se_falhar: bool = True):
     """
     Função que tenta extrair dados com Gemini.
-    Se falhar, retorna N/A para todos os campos, exceto o nome do aluno que será numerado.
+    Se falhar, retorna N/A para todos os campos, exceto o nome do aluno que será numerado
+    (ou None com padrao_se_falhar=False, para quem precisa distinguir leitura de padrão).
     
     🆕 ATUALIZADO: Agora usa extração otimizada quando possível
+    Cabeçalhos já lidos da mesma imagem (mesmo hash) vêm do cache, sem chamar o Gemini.
     """
+    chave_cache = None
+    if model:
+        try:
+            chave_cache = _hash_imagem(image_path)
+        except OSError:
+            chave_cache = None
+        if chave_cache:
+            dados_cache = _cabecalho_em_cache(chave_cache)
+            if dados_cache:
+                return dados_cache
+        
+        # Cabeçalho vazio: nada para o Gemini ler, não gastar a chamada
+        if _cabecalho_do_arquivo_em_branco(image_path):
+            model = None
+    
     # Tentar Gemini OTIMIZADO primeiro (extrai tudo de uma vez)
     if model:
         try:
             dados_completos = extrair_dados_completos_com_gemini(model, image_path)
             if dados_completos:
                 # Retornar no formato antigo (sem num_questoes) para compatibilidade
-                return {
+                dados = {
                     "escola": dados_completos.get("escola", "N/A"),
                     "aluno": dados_completos.get("aluno", "N/A"),
                     "turma": dados_completos.get("turma", "N/A"),
                     "nascimento": dados_completos.get("nascimento", "N/A")
                 }
+                if chave_cache:
+                    _guardar_cabecalho_em_cache(chave_cache, dados)
+                return dados
         except Exception as e:
             pass  # Tentar método antigo
     
@@ -3093,10 +3627,15 @@ def extrair_cabecalho_com_fallback(model, image_path, numero_aluno=None):
         try:
             dados_gemini = extrair_cabecalho_com_gemini(model, image_path)
             if dados_gemini:
+                if chave_cache:
+                    _guardar_cabecalho_em_cache(chave_cache, dados_gemini)
                 return dados_gemini
         except Exception as e:
             pass  # Silenciar erro do Gemini
     
+    if not padrao_se_falhar:
+        return None
+    
     # Se Gemini falhar, retornar dados com numeração do aluno
     nome_aluno = f"Aluno {numero_aluno}" if numero_aluno else "N/A"
     return {
@@ -3106,6 +3645,62 @@ def extrair_cabecalho_com_fallback(model, image_path, numero_aluno=None):
         "nascimento": "N/A"
     }
 
+def extrair_cabecalhos_em_lote(model, caminhos_imagens: List[str], tamanho_lote: int = TAMANHO_LOTE_GEMINI) -> List[Optional[dict]]:
+    """
+    Extrai o cabeçalho de vários cartões com uma única requisição ao Gemini
+    por lote (recorte do cabeçalho de cada cartão, na ordem recebida).
+    
+    Args:
+        model: Instância do modelo Gemini configurado
+        caminhos_imagens: Caminhos das imagens dos cartões
+        tamanho_lote: Máximo de cartões por requisição
+    
+    Returns:
+        Lista com um dicionário ('escola', 'aluno', 'turma', 'nascimento') por
+        imagem, ou None nas posições que não puderam ser lidas
+    """
+    def recortar_cabecalho(caminho: str):
+        image = converter_imagem_para_base64(caminho)
+        if not image:
+            return None
+        # Apenas o cabeçalho (mesma faixa de 25% usada pelo OCR fallback)
+        largura, altura = image.size
+        recorte = image.crop((0, 0, largura, int(altura * 0.25)))
+        if cabecalho_em_branco(np.asarray(recorte.convert('L'))):
+            return None  # Cabeçalho vazio não vai para o Gemini
+        return recorte
+    
+    def montar_prompt(quantidade: int) -> str:
+        return f"""
+        Você receberá {quantidade} imagens, cada uma com o CABEÇALHO de um cartão resposta diferente.
+        Para CADA imagem, na mesma ordem em que foram enviadas, extraia:
+
+        1. NOME DA ESCOLA - procure por campos como "Nome da Escola:", "Escola:", etc.
+        2. NOME DO ALUNO - procure por campos como "Nome completo:", "Nome:", "Aluno:", etc.
+        3. TURMA - procure por campos como "Turma:", "Série:", "Ano:", etc.
+        4. DATA DE NASCIMENTO - procure por campos como "Data de nascimento:", "Nascimento:", etc.
+
+        INSTRUÇÕES:
+        - Extraia APENAS o conteúdo, SEM os rótulos
+        - Se alguma informação não estiver visível ou legível, retorne "N/A"
+        - Ignore títulos como "AVALIAÇÃO DIAGNÓSTICA", "CARTÃO-RESPOSTA", etc.
+        - Ignore nomes de times e de personagens fictícios
+
+        FORMATO DE RESPOSTA (retorne exatamente um array JSON com {quantidade} objetos):
+        [
+            {{"escola": "...", "aluno": "...", "turma": "...", "nascimento": "..."}}
+        ]
+        """
+    
+    return _gemini_em_lote(
+        model,
+        caminhos_imagens,
+        preparar=recortar_cabecalho,
+        montar_prompt=montar_prompt,
+        mapear=lambda dados: {chave: dados[chave] for chave in _CHAVES_LOTE_GEMINI},
+        tamanho_lote=tamanho_lote,
+    )
+
 def detectar_ano_por_turma(turma: str) -> Optional[str]:
     """
     Detecta 4°, 5°, 8° ou 9° ano pela informação de turma.
@@ -3139,6 +3734,20 @@ def detectar_ano_por_turma(turma: str) -> Optional[str]:
 
 
 def detectar_ano_com_ocr_direto(image_path: str, debug: bool = False) -> Optional[str]:
+    """
+    Ano escolar por OCR direto (ver _detectar_ano_com_ocr_direto). Fora do
+    modo debug, que precisa gerar as imagens, o resultado fica em cache pelo
+    conteúdo da imagem.
+    """
+    if debug:
+        return _detectar_ano_com_ocr_direto(image_path, debug=True)
+    return _ocr_com_cache(
+        "ano",
+        image_path,
+        lambda: _detectar_ano_com_ocr_direto(image_path),
+    )
+
+def _detectar_ano_com_ocr_direto(image_path: str, debug: bool = False) -> Optional[str]:
     """
     🆕 DETECÇÃO DIRETA POR OCR - FALLBACK quando Gemini falhar!
     
@@ -3274,7 +3883,6 @@ def carregar_gabaritos_automatico(pasta_gabaritos: str = ".", debug: bool = Fals
                 exibir_gabarito_simples(respostas)
         except Exception as e:
             print(f"❌ Erro ao processar {arquivo}: {e}")
-            import traceback
             traceback.print_exc()
 
     faltantes = [ano for ano in ANOS_ESCOLARES if ano not in gabaritos]
@@ -3296,6 +3904,17 @@ def carregar_gabaritos_automatico(pasta_gabaritos: str = ".", debug: bool = Fals
     return gabaritos
 
 
+def _baixar_arquivo_drive(drive_service, arquivo_id: str, caminho: str) -> str:
+    """
+    Baixa um arquivo do Drive numa única requisição (get_media().execute()),
+    gravando os bytes direto no destino. Os cartões e gabaritos têm poucos MB,
+    então não há ganho em baixar por partes (MediaIoBaseDownload).
+    """
+    conteudo = drive_service.files().get_media(fileId=arquivo_id).execute()
+    with open(caminho, 'wb') as arquivo_local:
+        arquivo_local.write(conteudo)
+    return caminho
+
 def carregar_gabaritos_do_drive(
     drive_service,
     pasta_drive_id: str,
@@ -3304,12 +3923,19 @@ def carregar_gabaritos_do_drive(
 ) -> dict:
     """Baixa e processa os quatro gabaritos da pasta de upload do Drive."""
     query = f"'{pasta_drive_id}' in parents and trashed = false"
-    response = drive_service.files().list(
-        q=query,
-        fields="files(id, name, mimeType)",
-        pageSize=1000,
-    ).execute()
-    arquivos = response.get('files', [])
+    arquivos = []
+    page_token = None
+    while True:
+        response = drive_service.files().list(
+            q=query,
+            fields="nextPageToken, files(id, name)",
+            pageSize=1000,
+            pageToken=page_token,
+        ).execute()
+        arquivos.extend(response.get('files', []))
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            break
     arquivos_por_nome = {arquivo.get('name', '').lower(): arquivo for arquivo in arquivos}
     gabaritos = {}
 
@@ -3332,13 +3958,8 @@ def carregar_gabaritos_do_drive(
             f"✅ {arquivo_info['name']}: "
             f"{rotulo_ano(ano_escolar)} ({num_questoes} questões)"
         )
-        request = drive_service.files().get_media(fileId=arquivo_info['id'])
         caminho = os.path.join(pasta_temporaria, arquivo_info['name'])
-        with open(caminho, 'wb') as arquivo_local:
-            downloader = MediaIoBaseDownload(arquivo_local, request)
-            concluido = False
-            while not concluido:
-                _, concluido = downloader.next_chunk()
+        _baixar_arquivo_drive(drive_service, arquivo_info['id'], caminho)
 
         imagem = preprocessar_arquivo(caminho, nome_base, debug=debug)
         respostas = detectar_respostas_por_tipo(
@@ -3356,18 +3977,54 @@ def carregar_gabaritos_do_drive(
     return gabaritos
 
 
+def _versao_gabarito_s3(arquivo_info: dict) -> str:
+    """Versão do gabarito no bucket: chave + ETag (ou data) + versão da detecção OMR."""
+    marca = arquivo_info.get("etag") or arquivo_info.get("modifiedTime", "")
+    return f"{arquivo_info['key']}|{marca}|v{VERSAO_CACHE_OMR}"
+
+def _carregar_cache_gabaritos() -> Dict[str, dict]:
+    """Gabaritos processados em ciclos anteriores ({} se não houver cache)."""
+    try:
+        with open(ARQUIVO_CACHE_GABARITOS, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _salvar_cache_gabaritos(cache: Dict[str, dict]) -> None:
+    try:
+        os.makedirs(os.path.dirname(ARQUIVO_CACHE_GABARITOS), exist_ok=True)
+        _gravar_json(ARQUIVO_CACHE_GABARITOS, cache)
+    except OSError as e:
+        print(f"⚠️ Não foi possível salvar o cache de gabaritos: {e}")
+
 def carregar_gabaritos_do_s3(
     storage,
     pasta_temporaria: str,
     debug: bool = False,
+    arquivos: Optional[List[Dict]] = None,
 ) -> dict:
-    """Baixa do Vultr S3 e processa os quatro gabaritos exigidos pelo pipeline."""
-    arquivos = storage.listar_gabaritos()
+    """
+    Baixa do Vultr S3 e processa os quatro gabaritos exigidos pelo pipeline.
+    
+    Gabaritos inalterados desde o último processamento (mesma chave e ETag)
+    vêm do cache em disco, sem download nem OMR (exceto com --force).
+    
+    Args:
+        storage: VultrS3Storage de onde os gabaritos são baixados
+        pasta_temporaria: Pasta onde as imagens são salvas
+        debug: Se deve mostrar informações de debug
+        arquivos: Listagem de gabaritos já feita (storage.listar_gabaritos());
+            se None, o bucket é listado aqui
+    """
+    if arquivos is None:
+        arquivos = storage.listar_gabaritos()
     arquivos_por_nome = {
         arquivo.get("name", "").lower(): arquivo
         for arquivo in arquivos
     }
     gabaritos = {}
+    cache = {} if FORCAR_REPROCESSAMENTO else _carregar_cache_gabaritos()
+    cache_alterado = False
 
     for ano_escolar in ANOS_ESCOLARES:
         nome_base = nome_gabarito(ano_escolar)
@@ -3388,6 +4045,13 @@ def carregar_gabaritos_do_s3(
             f"✅ {arquivo_info['name']}: "
             f"{rotulo_ano(ano_escolar)} ({num_questoes} questões)"
         )
+        versao = _versao_gabarito_s3(arquivo_info)
+        em_cache = cache.get(ano_escolar)
+        if em_cache and em_cache.get("versao") == versao:
+            gabaritos[ano_escolar] = em_cache["respostas"]
+            print("   ♻️ Inalterado - respostas em cache")
+            continue
+        
         caminho = os.path.join(pasta_temporaria, arquivo_info["name"])
         storage.baixar(arquivo_info["key"], caminho)
 
@@ -3399,11 +4063,15 @@ def carregar_gabaritos_do_s3(
             eh_gabarito=True,
         )
         gabaritos[ano_escolar] = respostas
+        cache[ano_escolar] = {"versao": versao, "respostas": list(respostas)}
+        cache_alterado = True
         print(
             f"   ✓ Questões processadas: "
             f"{sum(1 for resposta in respostas if resposta != '?')}/{num_questoes}"
         )
 
+    if cache_alterado:
+        _salvar_cache_gabaritos(cache)
     return gabaritos
 
 
@@ -3447,7 +4115,7 @@ def processar_cartoes_automatizado(
     model_gemini = None
     if usar_gemini:
         try:
-            model_gemini = configurar_gemini()
+            model_gemini = obter_gemini()
             print("✅ Gemini configurado")
         except Exception as e:
             print(f"⚠️ Gemini indisponível: {e}")
@@ -3457,7 +4125,7 @@ def processar_cartoes_automatizado(
     client_sheets = None
     if enviar_para_sheets:
         try:
-            client_sheets = configurar_google_sheets()
+            client_sheets = obter_google_sheets()
             print("✅ Google Sheets configurado")
         except Exception as e:
             print(f"⚠️ Google Sheets indisponível: {e}")
@@ -3469,7 +4137,7 @@ def processar_cartoes_automatizado(
     # Filtrar apenas arquivos de alunos (sem gabaritos)
     arquivos_alunos = [
         f for f in arquivos['todos'] 
-        if not f.lower().startswith('gabarito')
+        if not RE_GABARITO.match(f)
     ]
     
     if not arquivos_alunos:
@@ -3541,11 +4209,11 @@ def processar_cartoes_automatizado(
             resultado = comparar_respostas(respostas_gabarito, respostas_aluno)
             
             # 7. Exibir resultado
-            print(f"\n   {'─'*60}")
+            print(f"\n   {_SEPARADOR_RESUMO}")
             print(f"   ✅ Acertos: {resultado['acertos']}/{resultado['total']}")
             print(f"   ❌ Erros: {resultado['erros']}")
             print(f"   📊 Percentual: {resultado['percentual']:.1f}%")
-            print(f"   {'─'*60}")
+            print(f"   {_SEPARADOR_RESUMO}")
             
             # 8. Enviar para Google Sheets
             if enviar_para_sheets and client_sheets:
@@ -3586,7 +4254,6 @@ def processar_cartoes_automatizado(
         except Exception as e:
             print(f"   ❌ Erro ao processar: {e}")
             if debug:
-                import traceback
                 traceback.print_exc()
     
     # Resumo final
@@ -3604,7 +4271,7 @@ def processar_cartoes_automatizado(
             )
         
         # Estatísticas
-        media_percentual = sum(r['resultado']['percentual'] for r in resultados) / len(resultados)
+        media_percentual = fmean(r['resultado']['percentual'] for r in resultados)
         print(f"\n   📊 Média geral: {media_percentual:.1f}%")
     
     print("=" * 80)
@@ -3632,7 +4299,6 @@ def carregar_credenciais(scopes: List[str]) -> Optional[Credentials]:
         
         if credentials_json:
             print("🔑 Carregando credenciais das variáveis de ambiente...")
-            import json
             credentials_dict = json.loads(credentials_json)
             credentials = Credentials.from_service_account_info(credentials_dict, scopes=scopes)
             print("✅ Credenciais carregadas com sucesso!")
@@ -3680,6 +4346,39 @@ def configurar_google_sheets():
         return None
 
 
+# Clientes já autenticados, reaproveitados entre chamadas dos drivers
+_CLIENTES_CONFIGURADOS = {}
+
+def _cliente_configurado(nome: str, configurar: Callable):
+    """
+    Retorna o cliente `nome`, configurando-o apenas na primeira chamada.
+    
+    Falhas (None) não ficam em cache, para que uma nova tentativa seja feita
+    na próxima chamada (ex.: próximo ciclo do monitor).
+    """
+    cliente = _CLIENTES_CONFIGURADOS.get(nome)
+    if cliente is None:
+        cliente = configurar()
+        if cliente is not None:
+            _CLIENTES_CONFIGURADOS[nome] = cliente
+    return cliente
+
+def obter_gemini():
+    """Model do Gemini configurado uma única vez por processo (ou None)."""
+    return _cliente_configurado("gemini", configurar_gemini)
+
+def obter_google_sheets():
+    """Cliente gspread autorizado uma única vez por processo (ou None)."""
+    return _cliente_configurado("sheets", configurar_google_sheets)
+
+def obter_drive():
+    """Serviço do Drive (somente leitura) autenticado uma única vez por processo (ou None)."""
+    return _cliente_configurado("drive", configurar_google_drive_service)
+
+def obter_drive_completo():
+    """Serviço do Drive com permissão de escrita, autenticado uma única vez por processo (ou None)."""
+    return _cliente_configurado("drive_completo", configurar_google_drive_service_completo)
+
 def configurar_google_drive_service(scopes: Optional[List[str]] = None):
     """
     Configura conexão com Google Drive e retorna serviço da API v3.
@@ -3805,6 +4504,7 @@ def obter_metadados_pasta_drive(service, pasta_id: str) -> dict:
             response = service.files().list(
                 q=query,
                 fields=campos,
+                pageSize=1000,
                 pageToken=page_token
             ).execute()
             
@@ -3835,7 +4535,7 @@ def mover_arquivos_processados_drive(service, pasta_origem_id: str, metadados: d
     """Move arquivos processados (exceto gabarito) da pasta de upload para a pasta de destino."""
     try:
         # Configurar serviço com permissões completas
-        service_completo = configurar_google_drive_service_completo()
+        service_completo = obter_drive_completo()
         if not service_completo:
             print("❌ Não foi possível obter permissões para mover arquivos")
             return
@@ -3845,7 +4545,7 @@ def mover_arquivos_processados_drive(service, pasta_origem_id: str, metadados: d
         # Mover todos os arquivos exceto o gabarito
         for nome_arquivo, dados in metadados.items():
             # Pular arquivo de gabarito
-            if nome_arquivo.lower().startswith('gabarito'):
+            if RE_GABARITO.match(nome_arquivo):
                 print(f"⏭️ Gabarito ignorado: {nome_arquivo}")
                 continue
             
@@ -3916,13 +4616,12 @@ def baixar_cartoes_da_pasta_drive(service, pasta_id: str, destino: str, formatos
             response = service.files().list(
                 q=query,
                 fields=campos,
+                pageSize=1000,
                 pageToken=page_token
             ).execute()
 
+            # Uma página vazia não indica o fim: só a ausência de nextPageToken
             arquivos = response.get('files', [])
-            if not arquivos:
-                break
-
             for arquivo in arquivos:
                 mime_type = arquivo.get('mimeType', '')
                 nome_original = arquivo.get('name', 'arquivo')
@@ -3949,24 +4648,12 @@ def baixar_cartoes_da_pasta_drive(service, pasta_id: str, destino: str, formatos
                     contador += 1
 
                 print(f"⬇️ Baixando: {nome_final}")
-                request = service.files().get_media(fileId=arquivo['id'])
-                fh = io.BytesIO()
-                downloader = MediaIoBaseDownload(fh, request)
-
-                done = False
-                while not done:
-                    status, done = downloader.next_chunk()
-                    if status:
-                        progresso = int(status.progress() * 100)
-                        print(f"   Progresso: {progresso}%", end='\r')
-
-                with open(caminho_destino, 'wb') as destino_arquivo:
-                    destino_arquivo.write(fh.getbuffer())
+                _baixar_arquivo_drive(service, arquivo['id'], caminho_destino)
 
                 # CONVERSÃO AUTOMÁTICA PARA PRETO E BRANCO
                 # ⚠️ NÃO CONVERTER PDFs - eles serão processados separadamente
                 eh_pdf = caminho_destino.lower().endswith('.pdf')
-                eh_gabarito = nome_original.lower().startswith('gabarito')
+                eh_gabarito = bool(RE_GABARITO.match(nome_original))
                 
                 if converter_pb and not eh_gabarito and not eh_pdf:
                     print(f"   🎨 Convertendo para P&B (threshold={threshold_pb})...")
@@ -4035,7 +4722,7 @@ def baixar_e_processar_pasta_drive(
         num_questoes: Tipo de cartão (44 ou 52 questões)
     """
 
-    service = configurar_google_drive_service()
+    service = obter_drive()
     if not service:
         print("❌ Não foi possível configurar o Google Drive. Abortando.")
         return []
@@ -4091,6 +4778,10 @@ def baixar_e_processar_pasta_drive(
             
             resultados_pdfs = []
             
+            # Um PDF por vez: processar_pdf_multiplas_paginas já paraleliza as
+            # páginas num pool de processos (com um QueueListener de log) e, em
+            # PDFs pequenos, faz o OMR no próprio processo; vários PDFs em
+            # threads multiplicariam os pools e misturariam a saída
             for pdf_file in pdfs_multiplos:
                 # Construir caminho completo se necessário
                 if os.path.isabs(pdf_file):
@@ -4126,7 +4817,6 @@ def baixar_e_processar_pasta_drive(
                         
                 except Exception as e:
                     print(f"❌ ERRO ao processar PDF {os.path.basename(pdf_path)}: {e}")
-                    import traceback
                     traceback.print_exc()
             
             # Se processou PDFs e teve sucesso, mover para pasta processada
@@ -4197,93 +4887,235 @@ def baixar_e_processar_pasta_drive(
         else:
             shutil.rmtree(pasta_temporaria, ignore_errors=True)
 
-def enviar_para_planilha(
-    client,
-    dados_aluno,
-    resultado_comparacao,
-    planilha_id=None,
-    questoes_detectadas=None,
-    ano_escolar=None,
-):
-    """Envia dados para Google Sheets"""
-
-    try:
-        # 👉 Determinar número total de questões (incluindo anuladas)
-        total_questoes = resultado_comparacao.get("total", 0)
-        questoes_validas = resultado_comparacao.get("questoes_validas", total_questoes)
-        anuladas = resultado_comparacao.get("anuladas", 0)
+CABECALHO_PLANILHA_RESULTADOS = [
+    "Data", "Escola", "Nome completo", "Nascimento", "Turma", "Acertos Língua Portuguesa", "Acertos Matemática", "Erros Língua Portuguesa", "Erros Matemática", "Anuladas", "Porcentagem"
+]
+
+# Abas de resultados já abertas (e com cabeçalho conferido), por planilha:
+# planilha_id -> (cliente, aba). O cliente fica junto para continuar vivo e
+# para uma aba aberta por outro cliente não ser reaproveitada
+_PLANILHAS_ABERTAS = {}
+_lock_planilhas_abertas = threading.Lock()
+# Um lock por planilha em torno de "abrir e criar o cabeçalho": duas threads
+# enviando à mesma planilha vazia não criam o cabeçalho duas vezes, e
+# planilhas diferentes continuam sendo abertas em paralelo
+_LOCKS_POR_PLANILHA: Dict[str, threading.Lock] = {}
+
+def _abrir_planilha_resultados(client, planilha_id):
+    """
+    Abre a primeira aba da planilha, criando o cabeçalho se ela estiver vazia.
+    
+    A aba fica em cache: abrir a planilha e ler o conteúdo só acontece no
+    primeiro envio, e os seguintes fazem apenas a escrita. Seguro para
+    várias threads (lock por planilha).
+    """
+    with _lock_planilhas_abertas:
+        aberta = _PLANILHAS_ABERTAS.get(planilha_id)
+        if aberta is not None and aberta[0] is client:
+            return aberta[1]
+        lock_planilha = _LOCKS_POR_PLANILHA.setdefault(planilha_id, threading.Lock())
+    
+    with lock_planilha:
+        # Outra thread pode ter aberto a planilha enquanto esta esperava
+        with _lock_planilhas_abertas:
+            aberta = _PLANILHAS_ABERTAS.get(planilha_id)
+        if aberta is not None and aberta[0] is client:
+            return aberta[1]
+        
+        sheet = client.open_by_key(planilha_id)
+        worksheet = sheet.sheet1
+        
+        # Verificar se há cabeçalho
+        if not worksheet.get_all_values():
+            worksheet.append_row(CABECALHO_PLANILHA_RESULTADOS)
+            print("📋 Cabeçalho criado na planilha")
+        with _lock_planilhas_abertas:
+            _PLANILHAS_ABERTAS[planilha_id] = (client, worksheet)
+        return worksheet
 
+def montar_linha_planilha(dados_aluno: dict, resultado_comparacao: dict) -> list:
+    """
+    Monta a linha da planilha de resultados (mesma ordem de CABECALHO_PLANILHA_RESULTADOS).
+    
+    Args:
+        dados_aluno: Dados do cabeçalho ("Escola", "Aluno", "Nascimento", "Turma")
+        resultado_comparacao: Resultado de comparar_respostas
+        
+    Returns:
+        Lista com os valores da linha
+    """
+    # Preparar dados completos
+    agora = datetime.now().strftime("%d/%m/%Y")
+    
+    # Garantir que os dados estejam no formato correto
+    escola = dados_aluno.get("Escola", "N/A")
+    if escola == "N/A" or not escola.strip().lower():
+        escola = "N/A"
+    else:
+        escola = escola.lower()  # Converter para minúsculas
+    
+    aluno = dados_aluno.get("Aluno", "N/A")
+    if aluno == "N/A" or not aluno.strip().lower():
+        aluno = "N/A"
+    else:
+        aluno = aluno.lower()  # Converter para minúsculas
+        
+    nascimento = dados_aluno.get("Nascimento", "N/A")
+    if nascimento == "N/A" or not nascimento.strip().lower():
+        nascimento = "N/A"
+        
+    turma = dados_aluno.get("Turma", "N/A")
+    if turma == "N/A" or not turma.strip().lower():
+        turma = "N/A"
+    else:
+        turma = turma.lower()  # Converter para minúsculas
+    
+    return [
+        agora,
+        escola,
+        aluno, 
+        nascimento,
+        turma,
+        resultado_comparacao.get("acertos_portugues", 0),
+        resultado_comparacao.get("acertos_matematica", 0),
+        resultado_comparacao.get("erros_portugues", 0),
+        resultado_comparacao.get("erros_matematica", 0),
+        resultado_comparacao.get("anuladas", 0),
+        f"{resultado_comparacao['percentual']:.1f}%"
+    ]
+
+def enviar_linhas_para_planilha(client, linhas: List[list], planilha_id: str) -> int:
+    """
+    Envia várias linhas de resultado numa única requisição (values.append).
+    
+    Args:
+        client: Cliente gspread autorizado
+        linhas: Linhas montadas com montar_linha_planilha
+        planilha_id: ID da planilha de destino
+        
+    Returns:
+        Quantidade de linhas enviadas (0 em caso de erro)
+    """
+    if not linhas:
+        return 0
+    try:
+        _chamar_sheets_com_retentativas(
+            lambda: _abrir_planilha_resultados(client, planilha_id).append_rows(
+                linhas, value_input_option='RAW'
+            )
+        )
+        print(f"📊 {len(linhas)} registro(s) adicionados à planilha")
+        return len(linhas)
+    except Exception as e:
+        print(f"❌ {len(linhas)} registro(s) não enviados ao Google Sheets: {e}")
+        return 0
+
+def _erro_antes_da_escrita(erro: Exception) -> bool:
+    """
+    Se o erro garante que a escrita não chegou a acontecer: cota esgotada
+    (429) ou conexão recusada. Timeout, 5xx e conexão caída podem vir depois
+    de o servidor já ter gravado as linhas.
+    """
+    if isinstance(erro, gspread.exceptions.APIError):
+        return getattr(getattr(erro, "response", None), "status_code", None) == 429
+    if isinstance(erro, HttpError):
+        return getattr(getattr(erro, "resp", None), "status", None) == 429
+    # requests/urllib3 embrulham a recusa (ConnectionError -> MaxRetryError
+    # -> NewConnectionError); procurar o ConnectionRefusedError na cadeia
+    vistos = set()
+    while erro is not None and id(erro) not in vistos:
+        if isinstance(erro, ConnectionRefusedError):
+            return True
+        vistos.add(id(erro))
+        causa = erro.__cause__ or erro.__context__ or getattr(erro, "reason", None)
+        if causa is None and erro.args and isinstance(erro.args[0], BaseException):
+            causa = erro.args[0]
+        erro = causa if isinstance(causa, BaseException) else None
+    return False
+
+def _chamar_sheets_com_retentativas(chamada: Callable):
+    """
+    Executa uma chamada ao Google Sheets respeitando a cota (LIMITADOR_SHEETS).
+    Só erros que garantem que nada foi gravado (_erro_antes_da_escrita) são
+    tentados de novo, com espera exponencial (1s, 2s, ...): repetir um
+    append_rows após timeout ou 5xx poderia duplicar as linhas dos alunos.
+    Os demais, e o da última tentativa, são repassados.
+    """
+    for tentativa in range(TENTATIVAS_ENVIO_SHEETS):
+        LIMITADOR_SHEETS.aguardar()
+        try:
+            return chamada()
+        except (gspread.exceptions.APIError, HttpError, OSError) as e:
+            if tentativa == TENTATIVAS_ENVIO_SHEETS - 1 or not _erro_antes_da_escrita(e):
+                raise
+            time.sleep(2 ** tentativa + random.uniform(0, 0.1))
+
+def planilha_do_resultado(resultado_comparacao, planilha_id=None, ano_escolar=None) -> Optional[str]:
+    """
+    Escolhe a planilha de destino: a do ano escolar (GOOGLE_SHEETS_<N>ANO),
+    senão planilha_id, senão pelo tipo de cartão (44 = 5º ano, 52 = 9º ano).
+    
+    Returns:
+        ID da planilha, ou None (com aviso) se não houver planilha para o resultado
+    """
+    # 👉 Determinar número total de questões (incluindo anuladas)
+    total_questoes = resultado_comparacao.get("total", 0)
+
+    ano_normalizado = detectar_ano_escolar(ano_escolar)
+    if ano_normalizado:
+        numero_ano = NUMERO_POR_ANO[ano_normalizado]
+        planilha_id = os.getenv(f"GOOGLE_SHEETS_{numero_ano}ANO") or planilha_id
+    elif not planilha_id and total_questoes == 44:
+        planilha_id = os.getenv("GOOGLE_SHEETS_5ANO")
+    elif not planilha_id and total_questoes == 52:
+        planilha_id = os.getenv("GOOGLE_SHEETS_9ANO")
+    elif not planilha_id:
+        print(f"⚠️ Número de questões ({total_questoes}) não reconhecido. Registro ignorado.")
+        return None
+
+    if not planilha_id:
+        print(f"⚠️ Planilha não configurada para {ano_escolar or total_questoes}.")
+        return None
+    return planilha_id
+
+def _enviador_planilha(fila: "queue.Queue", client) -> None:
+    """
+    Thread consumidora: envia os lotes (planilha_id, linhas) da fila até
+    receber None.
+    """
+    while True:
+        lote = fila.get()
+        if lote is None:
+            break
+        planilha_id, linhas = lote
+        enviar_linhas_para_planilha(client, linhas, planilha_id)
+
+def enviar_para_planilha(
+    client,
+    dados_aluno,
+    resultado_comparacao,
+    planilha_id=None,
+    questoes_detectadas=None,
+    ano_escolar=None,
+):
+    """Envia dados para Google Sheets"""
+
+    try:
         ano_normalizado = detectar_ano_escolar(ano_escolar)
         if ano_normalizado:
-            numero_ano = NUMERO_POR_ANO[ano_normalizado]
-            planilha_id = os.getenv(f"GOOGLE_SHEETS_{numero_ano}ANO") or planilha_id
             print(f"📄 Enviando para planilha do {rotulo_ano(ano_normalizado)}...")
-        elif not planilha_id and total_questoes == 44:
-            planilha_id = os.getenv("GOOGLE_SHEETS_5ANO")
-        elif not planilha_id and total_questoes == 52:
-            planilha_id = os.getenv("GOOGLE_SHEETS_9ANO")
-        elif not planilha_id:
-            print(f"⚠️ Número de questões ({total_questoes}) não reconhecido. Registro ignorado.")
-            return False
-
+        planilha_id = planilha_do_resultado(resultado_comparacao, planilha_id, ano_escolar)
         if not planilha_id:
-            print(f"⚠️ Planilha não configurada para {ano_escolar or total_questoes}.")
             return False
 
-        # 👉 Abrir a planilha correta
-        sheet = client.open_by_key(planilha_id)
-        worksheet = sheet.sheet1
-        
-        # Verificar se há cabeçalho
-        if not worksheet.get_all_values():
-            cabecalho = [
-                "Data", "Escola", "Nome completo", "Nascimento", "Turma", "Acertos Língua Portuguesa", "Acertos Matemática", "Erros Língua Portuguesa", "Erros Matemática", "Anuladas", "Porcentagem"
-            ]
-            worksheet.append_row(cabecalho)
-            print("📋 Cabeçalho criado na planilha")
+        linha_dados = montar_linha_planilha(dados_aluno, resultado_comparacao)
+        escola, aluno, nascimento, turma = linha_dados[1:5]
         
-        # Preparar dados completos
-        agora = datetime.now().strftime("%d/%m/%Y")
-        
-        # Garantir que os dados estejam no formato correto
-        escola = dados_aluno.get("Escola", "N/A")
-        if escola == "N/A" or not escola.strip().lower():
-            escola = "N/A"
-        else:
-            escola = escola.lower()  # Converter para minúsculas
-        
-        aluno = dados_aluno.get("Aluno", "N/A")
-        if aluno == "N/A" or not aluno.strip().lower():
-            aluno = "N/A"
-        else:
-            aluno = aluno.lower()  # Converter para minúsculas
-            
-        nascimento = dados_aluno.get("Nascimento", "N/A")
-        if nascimento == "N/A" or not nascimento.strip().lower():
-            nascimento = "N/A"
-            
-        turma = dados_aluno.get("Turma", "N/A")
-        if turma == "N/A" or not turma.strip().lower():
-            turma = "N/A"
-        else:
-            turma = turma.lower()  # Converter para minúsculas
-        
-        linha_dados = [
-            agora,
-            escola,
-            aluno, 
-            nascimento,
-            turma,
-            resultado_comparacao.get("acertos_portugues", 0),
-            resultado_comparacao.get("acertos_matematica", 0),
-            resultado_comparacao.get("erros_portugues", 0),
-            resultado_comparacao.get("erros_matematica", 0),
-            resultado_comparacao.get("anuladas", 0),
-            f"{resultado_comparacao['percentual']:.1f}%"
-        ]
-        
-        # Adicionar linha
-        worksheet.append_row(linha_dados)
+        # 👉 Abrir a planilha correta e adicionar a linha (só espera se a cota
+        # do minuto acabou; erros transitórios são tentados de novo)
+        _chamar_sheets_com_retentativas(
+            lambda: _abrir_planilha_resultados(client, planilha_id).append_row(linha_dados)
+        )
         print(f"📊 Registro adicionado:")
         print(f"   🏫 Escola: {escola}")
         print(f"   👤 Aluno: {aluno}")
@@ -4320,16 +5152,12 @@ def criar_planilha_detalhada(client, dados_aluno, resultado_comparacao):
         worksheet.append_row(cabecalho_detalhado)
         
         # Dados detalhados
-        for detalhe in resultado_comparacao["detalhes"]:
-            linha = [
-                detalhe["questao"],
-                detalhe["gabarito"],
-                detalhe["aluno"],
-                detalhe["status"],
-                "ACERTO" if detalhe["status"] == "✓" else "ERRO",
-                "" if detalhe["status"] == "✓" else f"Esperado: {detalhe['gabarito']}, Marcado: {detalhe['aluno']}"
-            ]
-            worksheet.append_row(linha)
+        for questao, gabarito, aluno, status, _ in resultado_comparacao["detalhes"].tolist():
+            if status == "✓":
+                resultado_questao, observacao = "ACERTO", ""
+            else:
+                resultado_questao, observacao = "ERRO", f"Esperado: {gabarito}, Marcado: {aluno}"
+            worksheet.append_row([questao, gabarito, aluno, status, resultado_questao, observacao])
         
         print(f"✅ Planilha detalhada '{nome_aba}' criada com sucesso!")
         return True
@@ -4338,6 +5166,144 @@ def criar_planilha_detalhada(client, dados_aluno, resultado_comparacao):
         print(f"❌ Erro ao criar planilha detalhada: {e}")
         return False
 
+CAMPOS_DETALHES = ("questao", "gabarito", "aluno", "status", "disciplina")
+
+# Máscara de português e rótulos de disciplina por total de questões (44/52),
+# calculados uma única vez e reaproveitados em todas as correções
+_DISCIPLINA_CACHE: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+def _disciplinas_por_questao(total_questoes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Retorna a máscara de questões de português e o rótulo de cada questão.
+    
+    Args:
+        total_questoes: Número de questões comparadas
+        
+    Returns:
+        Tupla (eh_portugues, disciplinas), ambos somente leitura
+    """
+    if total_questoes not in _DISCIPLINA_CACHE:
+        # Determinar número de questões por coluna baseado no total
+        # Para 52 questões: 13 por coluna
+        # Para 44 questões: 11 por coluna
+        questoes_por_coluna = 13 if total_questoes == 52 else 11
+        
+        # Colunas: 1ª português, 2ª matemática, 3ª português, 4ª matemática
+        colunas = np.arange(total_questoes) // questoes_por_coluna
+        eh_portugues = (colunas == 0) | (colunas == 2)
+        disciplinas = np.where(eh_portugues, "Português", "Matemática")
+        eh_portugues.setflags(write=False)
+        disciplinas.setflags(write=False)
+        _DISCIPLINA_CACHE[total_questoes] = (eh_portugues, disciplinas)
+    return _DISCIPLINA_CACHE[total_questoes]
+
+# Máscaras dos dois modelos de cartão (44 e 52 questões) montadas na carga
+# do módulo; comparar_respostas só as consulta
+for _total_questoes in (44, 52):
+    _disciplinas_por_questao(_total_questoes)
+
+# Códigos de situação por questão (índice em STATUS_POR_CODIGO e coluna da
+# matriz de contagem): 0 = acerto, 1 = erro, 2 = anulada. Linhas da matriz:
+# 0 = Português, 1 = Matemática.
+STATUS_POR_CODIGO = np.array(["✓", "✗", "ANULADA"])
+
+def _classificar_questoes_numpy(iguais, anuladas, eh_portugues):
+    """
+    Classifica cada questão e conta acertos/erros/anuladas por disciplina.
+    
+    Args:
+        iguais: Máscara das questões em que gabarito e aluno coincidem
+        anuladas: Máscara das questões anuladas
+        eh_portugues: Máscara das questões de português
+        
+    Returns:
+        Tupla (códigos por questão, matriz de contagem 2x3)
+    """
+    codigos = np.where(anuladas, 2, np.where(iguais, 0, 1)).astype(np.int8)
+    # Uma única acumulação indexada por (disciplina, situação)
+    disciplina_idx = (~eh_portugues).astype(np.intp)
+    contagem = np.zeros((2, 3), dtype=np.int64)
+    np.add.at(contagem, (disciplina_idx, codigos), 1)
+    return codigos, contagem
+
+# Alternativas codificadas em int8 para o kernel compilado; respostas fora
+# desta tabela usam a comparação de strings do NumPy
+_CODIGOS_ALTERNATIVAS = {'A': 0, 'B': 1, 'C': 2, 'D': 3, 'E': 4, '?': 5}
+CODIGO_NAO_DETECTADA = 5
+
+def _codificar_respostas(respostas) -> Optional[np.ndarray]:
+    """Respostas como array int8, ou None se alguma não for A-E/'?'."""
+    try:
+        return np.fromiter(
+            (_CODIGOS_ALTERNATIVAS[r] for r in respostas),
+            dtype=np.int8,
+            count=len(respostas)
+        )
+    except (KeyError, TypeError):
+        return None
+
+if NUMBA_DISPONIVEL:
+    @njit(cache=True)
+    def _classificar_questoes_numba(iguais, anuladas, eh_portugues):
+        """Mesmo contrato de _classificar_questoes_numpy, em uma única passada compilada."""
+        n = iguais.shape[0]
+        codigos = np.empty(n, np.int8)
+        contagem = np.zeros((2, 3), np.int64)
+        for i in range(n):
+            if anuladas[i]:
+                codigo = 2
+            elif iguais[i]:
+                codigo = 0
+            else:
+                codigo = 1
+            codigos[i] = codigo
+            contagem[0 if eh_portugues[i] else 1, codigo] += 1
+        return codigos, contagem
+
+    @njit(cache=True)
+    def _comparar_codigos_numba(gabarito, aluno, eh_portugues):
+        """
+        Compara as respostas já codificadas (int8, ver _CODIGOS_ALTERNATIVAS)
+        e classifica cada questão, tudo na mesma passada compilada.
+        """
+        n = gabarito.shape[0]
+        codigos = np.empty(n, np.int8)
+        contagem = np.zeros((2, 3), np.int64)
+        for i in range(n):
+            if gabarito[i] == CODIGO_NAO_DETECTADA or aluno[i] == CODIGO_NAO_DETECTADA:
+                codigo = 2
+            elif gabarito[i] == aluno[i]:
+                codigo = 0
+            else:
+                codigo = 1
+            codigos[i] = codigo
+            contagem[0 if eh_portugues[i] else 1, codigo] += 1
+        return codigos, contagem
+
+    _classificar_questoes = _classificar_questoes_numba
+else:
+    _classificar_questoes = _classificar_questoes_numpy
+
+# Resultado de uma comparação sem questões (copiado a cada retorno)
+_RESULTADO_VAZIO = {
+    "total": 0,
+    "questoes_validas": 0,
+    "anuladas": 0,
+    "acertos": 0,
+    "acertos_portugues": 0,
+    "acertos_matematica": 0,
+    "erros": 0,
+    "erros_portugues": 0,
+    "erros_matematica": 0,
+    "percentual": 0,
+    "detalhes": np.rec.fromarrays(
+        [np.arange(0)] + [np.array([], dtype=str)] * (len(CAMPOS_DETALHES) - 1),
+        names=CAMPOS_DETALHES
+    ),
+    "indices_erros": np.arange(0),
+    "questoes_detectadas": 0
+}
+
 def comparar_respostas(respostas_gabarito, respostas_aluno):
     """Compara as respostas do gabarito com as do aluno"""
     if len(respostas_gabarito) != len(respostas_aluno):
@@ -4346,76 +5312,119 @@ def comparar_respostas(respostas_gabarito, respostas_aluno):
     else:
         min_questoes = len(respostas_gabarito)
     
-    acertos = 0
-    erros = 0
-    anuladas = 0
-    detalhes = []
+    # Nada para comparar (detecção vazia): evita montar máscaras e tabela
+    if min_questoes <= 0:
+        return dict(_RESULTADO_VAZIO)
+    
+    # Comparação vetorizada: uma máscara booleana por situação em vez de
+    # comparar questão por questão no interpretador
+    gabarito_arr = np.array(list(respostas_gabarito[:min_questoes]), dtype=str)
+    aluno_arr = np.array(list(respostas_aluno[:min_questoes]), dtype=str)
+    
+    eh_portugues, disciplinas = _disciplinas_por_questao(min_questoes)
+    
+    codigos_gabarito = codigos_aluno = None
+    if NUMBA_DISPONIVEL:
+        codigos_gabarito = _codificar_respostas(respostas_gabarito[:min_questoes])
+        codigos_aluno = _codificar_respostas(respostas_aluno[:min_questoes])
+    
+    if codigos_gabarito is not None and codigos_aluno is not None:
+        # Comparação e classificação em código nativo (Numba), sem máscaras
+        codigos, contagem = _comparar_codigos_numba(
+            codigos_gabarito,
+            codigos_aluno,
+            np.asarray(eh_portugues)
+        )
+    else:
+        # 🔧 Se gabarito ou aluno tem '?', anular questão (não conta no cálculo)
+        anuladas_mask = (gabarito_arr == '?') | (aluno_arr == '?')
+        codigos, contagem = _classificar_questoes(
+            gabarito_arr == aluno_arr,
+            anuladas_mask,
+            np.asarray(eh_portugues)
+        )
+    
+    status = STATUS_POR_CODIGO[codigos]
+    # Detalhes numa tabela colunar (array estruturado do NumPy, alocado de uma
+    # vez), percorrida linha a linha por quem exibe ou envia a correção
+    detalhes = np.rec.fromarrays(
+        [np.arange(1, min_questoes + 1), gabarito_arr, aluno_arr, status, disciplinas],
+        names=CAMPOS_DETALHES
+    )
     
-    # Contadores separados para português e matemática
-    acertos_portugues = 0
-    acertos_matematica = 0
-    erros_portugues = 0
-    erros_matematica = 0
+    return _montar_resultado(min_questoes, contagem, codigos, detalhes)
+
+def comparar_respostas_lote(respostas_gabarito, lista_respostas_alunos) -> List[dict]:
+    """
+    Compara o gabarito com os cartões de vários alunos de uma só vez.
     
-    # Determinar número de questões por coluna baseado no total
-    # Para 52 questões: 13 por coluna
-    # Para 44 questões: 11 por coluna
-    questoes_por_coluna = 13 if min_questoes == 52 else 11
+    As respostas com o mesmo número de questões do gabarito são empilhadas
+    numa matriz (alunos x questões) e comparadas numa única operação
+    vetorizada; as demais caem em comparar_respostas.
     
-    for i in range(min_questoes):
-        questao = i + 1
-        gabarito = respostas_gabarito[i] if i < len(respostas_gabarito) else "N/A"
-        aluno = respostas_aluno[i] if i < len(respostas_aluno) else "N/A"
+    Args:
+        respostas_gabarito: Respostas do gabarito
+        lista_respostas_alunos: Lista com as respostas de cada aluno
         
-        # Determinar se é questão de português ou matemática
-        # Colunas: 1ª português, 2ª matemática, 3ª português, 4ª matemática
-        coluna = i // questoes_por_coluna  # 0, 1, 2, 3
-        eh_portugues = (coluna == 0 or coluna == 2)  # Colunas 1 e 3
+    Returns:
+        Lista de resultados, na mesma ordem e formato de comparar_respostas
+    """
+    total = len(respostas_gabarito)
+    resultados = [None] * len(lista_respostas_alunos)
+    indices_lote = [
+        i for i, respostas in enumerate(lista_respostas_alunos)
+        if total > 0 and len(respostas) == total
+    ]
+    
+    if indices_lote:
+        gabarito_arr = np.array(list(respostas_gabarito), dtype=str)
+        alunos_arr = np.array([list(lista_respostas_alunos[i]) for i in indices_lote], dtype=str)
+        eh_portugues, disciplinas = _disciplinas_por_questao(total)
+        eh_portugues = np.asarray(eh_portugues)
         
         # 🔧 Se gabarito ou aluno tem '?', anular questão (não conta no cálculo)
-        if gabarito == '?' or aluno == '?':
-            status = "⊘"  # Anulada
-            anuladas += 1
-            detalhes.append({
-                "questao": questao,
-                "gabarito": gabarito,
-                "aluno": aluno,
-                "status": "ANULADA",
-                "disciplina": "Português" if eh_portugues else "Matemática"
-            })
-            continue
+        anuladas_mask = (alunos_arr == '?') | (gabarito_arr == '?')
+        codigos = np.where(anuladas_mask, 2, np.where(alunos_arr == gabarito_arr, 0, 1)).astype(np.int8)
+        
+        # Contagem (aluno, disciplina, situação) para todos os alunos de uma vez
+        por_situacao = codigos[:, :, None] == np.arange(3)
+        contagem = np.stack(
+            [por_situacao[:, eh_portugues].sum(axis=1), por_situacao[:, ~eh_portugues].sum(axis=1)],
+            axis=1
+        )
+        status = STATUS_POR_CODIGO[codigos]
+        numeros = np.arange(1, total + 1)
         
-        if gabarito == aluno:
-            status = "✓"
-            acertos += 1
-            # Contar acerto na disciplina correspondente
-            if eh_portugues:
-                acertos_portugues += 1
-            else:
-                acertos_matematica += 1
-        else:
-            status = "✗"
-            erros += 1
-            # Contar erro na disciplina correspondente
-            if eh_portugues:
-                erros_portugues += 1
-            else:
-                erros_matematica += 1
-        
-        detalhes.append({
-            "questao": questao,
-            "gabarito": gabarito,
-            "aluno": aluno,
-            "status": status,
-            "disciplina": "Português" if eh_portugues else "Matemática"
-        })
+        for linha, i in enumerate(indices_lote):
+            detalhes = np.rec.fromarrays(
+                [numeros, gabarito_arr, alunos_arr[linha], status[linha], disciplinas],
+                names=CAMPOS_DETALHES
+            )
+            resultados[i] = _montar_resultado(total, contagem[linha], codigos[linha], detalhes)
+    
+    for i, resultado in enumerate(resultados):
+        if resultado is None:
+            resultados[i] = comparar_respostas(respostas_gabarito, lista_respostas_alunos[i])
+    return resultados
+
+def _montar_resultado(total_questoes, contagem, codigos, detalhes) -> dict:
+    """
+    Monta o dicionário de resultado a partir da matriz de contagem 2x3
+    (disciplina x situação) e dos códigos por questão.
+    """
+    contagem_portugues, contagem_matematica = contagem.tolist()
+    acertos_portugues, erros_portugues, anuladas_portugues = contagem_portugues
+    acertos_matematica, erros_matematica, anuladas_matematica = contagem_matematica
+    anuladas = anuladas_portugues + anuladas_matematica
+    acertos = acertos_portugues + acertos_matematica
+    erros = erros_portugues + erros_matematica
     
     # Calcular sobre questões válidas (excluindo anuladas)
-    questoes_validas = min_questoes - anuladas
+    questoes_validas = total_questoes - anuladas
     percentual = (acertos / questoes_validas * 100) if questoes_validas > 0 else 0
     
     return {
-        "total": min_questoes,
+        "total": total_questoes,
         "questoes_validas": questoes_validas,
         "anuladas": anuladas,
         "acertos": acertos,
@@ -4426,76 +5435,113 @@ def comparar_respostas(respostas_gabarito, respostas_aluno):
         "erros_matematica": erros_matematica,
         "percentual": percentual,
         "detalhes": detalhes,
-        "questoes_detectadas": min_questoes
+        "indices_erros": np.flatnonzero(codigos == 1),
+        "questoes_detectadas": total_questoes
     }
 
-def exibir_resultados(dados_aluno, resultado):
-    """Exibe os resultados formatados"""
-    print("\n" + "="*50)
-    print("         CORREÇÃO DO CARTÃO RESPOSTA")
-    print("="*50)
+# Formatos das linhas do relatório, resolvidos uma única vez
+_FORMATAR_LINHA_QUESTAO = "   {:02d}   |    {}     |   {}   |   {}".format
+_FORMATAR_LINHA_ERRO = "Questão {:02d}: Gabarito {} ≠ Aluno {} ✗".format
+
+# Separadores impressos a cada cartão nos laços de lote e do monitor
+_SEPARADOR_ALUNO = "-" * 50
+_SEPARADOR_PAGINA = "-" * 60
+_SEPARADOR_RESUMO = "─" * 60
+
+def _escrever_linhas(linhas: List[str], out=None) -> None:
+    """Escreve as linhas de uma vez em `out` ou, sem stream, num único registro do log."""
+    texto = "\n".join(linhas)
+    if out is None:
+        log.info(texto)
+    else:
+        out.write(texto + "\n")
+
+def exibir_resultados(dados_aluno, resultado, out=None):
+    """
+    Exibe os resultados formatados.
+    
+    As linhas são acumuladas e escritas de uma vez (um único registro no
+    log por cartão, em vez de um print por questão).
     
-    print("\n=== DADOS DO ALUNO ===")
-    for campo, valor in dados_aluno.items():
-        print(f"{campo}: {valor}")
+    Args:
+        dados_aluno: Dicionário com os dados do cabeçalho do aluno
+        resultado: Dicionário retornado por comparar_respostas
+        out: Stream de saída (padrão: logger "correcao")
+    """
+    linhas = [
+        "",
+        "="*50,
+        "         CORREÇÃO DO CARTÃO RESPOSTA",
+        "="*50,
+        "",
+        "=== DADOS DO ALUNO ===",
+    ]
+    linhas.extend(f"{campo}: {valor}" for campo, valor in dados_aluno.items())
     
-    print("\n=== RESULTADO GERAL ===")
-    print(f"Total de questões: {resultado['total']}")
-    print(f"Questões válidas: {resultado['questoes_validas']}")
+    linhas.append("\n=== RESULTADO GERAL ===")
+    linhas.append(f"Total de questões: {resultado['total']}")
+    linhas.append(f"Questões válidas: {resultado['questoes_validas']}")
     if resultado.get('anuladas', 0) > 0:
-        print(f"Questões anuladas: {resultado['anuladas']} ⊘")
-    print(f"Acertos: {resultado['acertos']} ✓")
-    print(f"Erros: {resultado['erros']} ✗")
-    print(f"Percentual de acerto: {resultado['percentual']:.2f}%")
-    
-    print("\n=== DETALHAMENTO POR QUESTÃO ===")
-    print("Questão | Gabarito | Aluno | Status")
-    print("-" * 35)
-    
-    for detalhe in resultado["detalhes"]:
-        print(f"   {detalhe['questao']:02d}   |    {detalhe['gabarito']}     |   {detalhe['aluno']}   |   {detalhe['status']}")
-    
-    # Mostrar apenas questões erradas
-    erros_detalhados = [d for d in resultado["detalhes"] if d["status"] == "✗"]
-    if erros_detalhados:
-        print("\n=== QUESTÕES ERRADAS ===")
-        for erro in erros_detalhados:
-            print(f"Questão {erro['questao']:02d}: Gabarito {erro['gabarito']} ≠ Aluno {erro['aluno']} ✗")
-
-def exibir_gabarito_simples(respostas_gabarito):
-    """Exibe o gabarito em formato simples: 1-A, 2-B, 3-C"""
-    print("\n📋 GABARITO DAS QUESTÕES:")
-    print("=" * 30)
+        linhas.append(f"Questões anuladas: {resultado['anuladas']} ⊘")
+    linhas.append(f"Acertos: {resultado['acertos']} ✓")
+    linhas.append(f"Erros: {resultado['erros']} ✗")
+    linhas.append(f"Percentual de acerto: {resultado['percentual']:.2f}%")
+    
+    linhas.append("\n=== DETALHAMENTO POR QUESTÃO ===")
+    linhas.append("Questão | Gabarito | Aluno | Status")
+    linhas.append("-" * 35)
+    
+    detalhes = resultado["detalhes"]
+    linhas.extend(
+        _FORMATAR_LINHA_QUESTAO(questao, gabarito, aluno, status)
+        for questao, gabarito, aluno, status, _ in detalhes.tolist()
+    )
+    
+    # Mostrar apenas questões erradas (índices já calculados na correção)
+    erros_detalhados = detalhes[resultado["indices_erros"]]
+    if len(erros_detalhados):
+        linhas.append("\n=== QUESTÕES ERRADAS ===")
+        linhas.extend(
+            _FORMATAR_LINHA_ERRO(questao, gabarito, aluno)
+            for questao, gabarito, aluno, _, _ in erros_detalhados.tolist()
+        )
+    
+    _escrever_linhas(linhas, out)
+
+def exibir_gabarito_simples(respostas_gabarito, out=None):
+    """
+    Exibe o gabarito em formato simples: 1-A, 2-B, 3-C
+    
+    Args:
+        respostas_gabarito: Lista de respostas (uma letra ou '?' por questão)
+        out: Stream de saída (padrão: logger "correcao")
+    """
+    linhas = ["", "📋 GABARITO DAS QUESTÕES:", "=" * 30]
     
     # Agrupar as questões em linhas de 10 para melhor visualização
-    for i in range(0, len(respostas_gabarito), 10):
-        linha = []
-        for j in range(i, min(i + 10, len(respostas_gabarito))):
-            if respostas_gabarito[j] != '?':
-                linha.append(f"{j+1}-{respostas_gabarito[j]}")
-            else:
-                linha.append(f"{j+1}-?")
-        print("  ".join(linha))
+    itens = [f"{i}-{resposta}" for i, resposta in enumerate(respostas_gabarito, 1)]
+    linhas.extend("  ".join(itens[i:i + 10]) for i in range(0, len(itens), 10))
     
-    print("=" * 30)
+    linhas.append("=" * 30)
+    _escrever_linhas(linhas, out)
 
 def processar_apenas_gabarito(DRIVER_FOLDER_9ANO: str = None, debug_mode: bool = False, num_questoes: int = 52):
     """Processa apenas o gabarito e exibe as respostas em formato simples"""
     print("📋 PROCESSANDO APENAS GABARITO")
     print("=" * 40)
     
-    # Usar DRIVER_FOLDER_9ANOO do .env se não fornecido
-    if not DRIVER_FOLDER_9ANOO:
-        DRIVER_FOLDER_9ANOO = os.getenv('DRIVER_FOLDER_9ANOO')
-        if not DRIVER_FOLDER_9ANOO:
-            print("❌ DRIVER_FOLDER_9ANOO não encontrado no arquivo .env")
+    # Usar DRIVER_FOLDER_9ANO do .env se não fornecido
+    if not DRIVER_FOLDER_9ANO:
+        DRIVER_FOLDER_9ANO = DRIVER_FOLDER_9ANO_PADRAO
+        if not DRIVER_FOLDER_9ANO:
+            print("❌ DRIVER_FOLDER_9ANO não encontrado no arquivo .env")
             return
     
     try:
         # Baixar arquivos do Google Drive
-        print(f"📥 Baixando arquivos da pasta do Drive: {DRIVER_FOLDER_9ANOO}")
+        print(f"📥 Baixando arquivos da pasta do Drive: {DRIVER_FOLDER_9ANO}")
         diretorio_temp = baixar_e_processar_pasta_drive(
-            pasta_id=DRIVER_FOLDER_9ANOO,
+            pasta_id=DRIVER_FOLDER_9ANO,
             usar_gemini=False,
             debug_mode=debug_mode,
             enviar_para_sheets=False,
@@ -4509,15 +5555,15 @@ def processar_apenas_gabarito(DRIVER_FOLDER_9ANO: str = None, debug_mode: bool =
             print("❌ Erro ao baixar arquivos do Drive")
             return
         
-        # Procurar arquivo de gabarito
-        arquivos = [f for f in os.listdir(diretorio_temp) 
-                    if f.lower().endswith(EXTENSOES_SUPORTADAS)]
-        
-        gabarito_file = None
-        for arquivo in arquivos:
-            if 'gabarito' in arquivo.lower():
-                gabarito_file = arquivo
-                break
+        # Procurar arquivo de gabarito (a busca para no primeiro nome que
+        # contém "gabarito"; lower() só roda para os candidatos)
+        gabarito_file = next(
+            (
+                arquivo for arquivo in os.listdir(diretorio_temp)
+                if RE_GABARITO.search(arquivo) and arquivo.lower().endswith(EXTENSOES_SUPORTADAS)
+            ),
+            None
+        )
         
         if not gabarito_file:
             print("❌ Arquivo de gabarito não encontrado (deve conter 'gabarito' no nome)")
@@ -4553,656 +5599,676 @@ def processar_apenas_gabarito(DRIVER_FOLDER_9ANO: str = None, debug_mode: bool =
 # PROCESSAMENTO EM LOTE
 # ===========================================
 
-def processar_pasta_gabaritos(diretorio: str = "./gabaritos", usar_gemini: bool = True, debug_mode: bool = False, num_questoes: int = 52):
+def _hash_arquivo(caminho: str) -> str:
+    """Hash (BLAKE2b, 128 bits) do conteúdo de um arquivo, lido em blocos."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+    return h.hexdigest()
 
+def ler_gabarito_com_cache(gabarito_path: str, num_questoes: int = 52, debug: bool = False, pasta_cache: Optional[str] = None, deteccao_pdf: bool = False) -> List[str]:
+    """
+    Detecta as respostas do gabarito, reaproveitando o resultado salvo em disco
+    quando o arquivo não mudou desde a última execução.
     
-    print("🚀 SISTEMA DE CORREÇÃO - PASTA GABARITOS")
-    print("=" * 60)
-    
-    diretorio_gabaritos = diretorio
-    
-    if not os.path.exists(diretorio_gabaritos):
-        print(f"❌ ERRO: Pasta '{diretorio_gabaritos}' não encontrada!")
-        print("💡 Crie a pasta informada e adicione os arquivos do gabarito e dos alunos")
-        return []
-    
-    # Configurar suporte a PDF se disponível
-    if PDF_PROCESSOR_AVAILABLE:
-        print("\n🔧 Configurando suporte a PDF...")
-        pdf_ok = setup_pdf_support()
-        if not pdf_ok:
-            print("⚠️ Suporte a PDF limitado - apenas imagens serão processadas")
-    
-    # Listar arquivos suportados na pasta gabaritos
-    print(f"\n📁 Analisando arquivos na pasta: {os.path.abspath(diretorio_gabaritos)}")
-    arquivos = listar_arquivos_suportados(diretorio_gabaritos)
-    
-    if not arquivos['todos']:
-        print("❌ Nenhum arquivo suportado encontrado na pasta gabaritos!")
-        print("💡 Formatos suportados: PDF, PNG, JPG, JPEG, BMP, TIFF")
-        return []
-    
-    print(f"✅ Encontrados {len(arquivos['todos'])} arquivos:")
-    for arquivo in arquivos['todos']:
-        print(f"   📄 {arquivo}")
-    
-    # ===========================================
-    # IDENTIFICAR GABARITO (LÓGICA SIMPLIFICADA)
-    # ===========================================
-    
-    print("\n📋 Identificando arquivo de gabarito...")
-    gabarito_file = None
-    
-    # Buscar por qualquer arquivo que comece com "gabarito" (case insensitive)
-    for arquivo in arquivos['todos']:
-        if arquivo.lower().startswith('gabarito'):
-            gabarito_file = arquivo
-            break
-    
-    if not gabarito_file:
-        print("❌ ERRO: Nenhum arquivo 'gabarito.*' encontrado!")
-        print("💡 Renomeie o arquivo do gabarito para: gabarito.png, gabarito.pdf, etc.")
-        return []
-    
-    print(f"✅ Gabarito identificado: {gabarito_file}")
-    
-    # ===========================================
-    # IDENTIFICAR ARQUIVOS DOS ALUNOS (LÓGICA SIMPLIFICADA)
-    # ===========================================
-    
-    print("\n👥 Identificando arquivos dos alunos...")
-    
-    # TODOS os arquivos que NÃO começam com "gabarito" são alunos
-    arquivos_alunos = [f for f in arquivos['todos'] if not f.lower().startswith('gabarito')]
-    
-    if not arquivos_alunos:
-        print("❌ ERRO: Nenhum arquivo de aluno encontrado!")
-        print("💡 Adicione arquivos dos alunos na pasta gabaritos (qualquer nome exceto gabarito.*)")
-        return []
-    
-    print(f"✅ Encontrados {len(arquivos_alunos)} alunos para processar:")
-    for i, aluno in enumerate(arquivos_alunos, 1):
-        print(f"   {i:02d}. {aluno}")
-    
-    # ===========================================
-    # CONFIGURAR GEMINI
-    # ===========================================
+    Args:
+        gabarito_path: Caminho do arquivo do gabarito
+        num_questoes: Tipo de cartão (44 ou 52 questões)
+        debug: Se deve exibir informações de debug
+        pasta_cache: Pasta do cache (padrão: .cache ao lado do gabarito)
+        deteccao_pdf: Se páginas extraídas de PDF ("page_*") usam a detecção especializada
+        
+    Returns:
+        Lista de respostas do gabarito
+    """
+    pasta_cache = pasta_cache or os.path.join(os.path.dirname(os.path.abspath(gabarito_path)), ".cache")
+    perspectiva = "p" if PERSPECTIVA_HABILITADA else "np"
+    sufixo_pdf = "_pdf" if deteccao_pdf else ""
+    caminho_cache = os.path.join(
+        pasta_cache,
+        f"{_hash_arquivo(gabarito_path)}_{num_questoes}_{perspectiva}{sufixo_pdf}.json"
+    )
     
-    model_gemini = None
-    if usar_gemini:
+    if os.path.exists(caminho_cache):
         try:
-            model_gemini = configurar_gemini()
+            with open(caminho_cache, 'r', encoding='utf-8') as f:
+                respostas_gabarito = json.load(f)['respostas']
+            print(f"♻️ Gabarito inalterado - usando detecção em cache ({os.path.basename(caminho_cache)})")
+            return respostas_gabarito
         except Exception as e:
-            print(f"❌ Erro ao configurar Gemini: {e}")
-            usar_gemini = False
-    
-    # ===========================================
-    # PROCESSAR GABARITO (UMA VEZ APENAS)
-    # ===========================================
+            print(f"⚠️ Cache do gabarito inválido ({e}) - detectando novamente")
     
-    print(f"\n{'='*60}")
-    print("📋 PROCESSANDO GABARITO")
-    print(f"{'='*60}")
+    gabarito_img = preprocessar_arquivo(gabarito_path, "gabarito", debug=debug)
+    if deteccao_pdf and "page_" in gabarito_img and gabarito_img.endswith((".png", ".jpg")):
+        print("🔍 Usando detecção especializada para PDF...")
+        respostas_gabarito = detectar_respostas_pdf(gabarito_img, debug=debug)
+    else:
+        respostas_gabarito = detectar_respostas_por_tipo(gabarito_img, num_questoes=num_questoes, debug=debug, eh_gabarito=True)
     
     try:
-        # Preprocessar gabarito
-        gabarito_path = os.path.join(diretorio_gabaritos, gabarito_file)
-        gabarito_img = preprocessar_arquivo(gabarito_path, "gabarito", debug=debug_mode)
-        
-        # Detectar respostas do gabarito usando o tipo específico (44 ou 52 questões)
-        respostas_gabarito = detectar_respostas_por_tipo(gabarito_img, num_questoes=num_questoes, debug=debug_mode, eh_gabarito=True)
-        
-        questoes_gabarito = sum(1 for r in respostas_gabarito if r != '?')
-        num_questoes_detectadas = len(respostas_gabarito)
-        print(f"✅ Gabarito processado: {questoes_gabarito}/{num_questoes_detectadas} questões detectadas")
-        
-        if questoes_gabarito < 40:
-            print("⚠️ ATENÇÃO: Poucas questões detectadas no gabarito.")
-        
+        os.makedirs(pasta_cache, exist_ok=True)
+        with open(caminho_cache, 'w', encoding='utf-8') as f:
+            json.dump({'arquivo': os.path.basename(gabarito_path), 'respostas': respostas_gabarito}, f, ensure_ascii=False)
     except Exception as e:
-        print(f"❌ ERRO CRÍTICO ao processar gabarito: {e}")
-        return []
-    
-    # ===========================================
-    # PROCESSAR TODOS OS ALUNOS
-    # ===========================================
-    
-    resultados_lote = []
+        print(f"⚠️ Não foi possível salvar o cache do gabarito: {e}")
     
-    print(f"\n{'='*60}")
-    print(f"👥 PROCESSANDO {len(arquivos_alunos)} ALUNOS")
-    print(f"{'='*60}")
+    return respostas_gabarito
+
+ARQUIVO_CACHE_RESULTADOS = "resultados.jsonl"
+
+def carregar_cache_resultados(caminho_cache: str) -> Dict[Tuple[str, str, str, str], dict]:
+    """
+    Carrega os resultados já calculados em execuções anteriores.
     
-    for i, aluno_file in enumerate(arquivos_alunos, 1):
-        print(f"\n🔄 [{i:02d}/{len(arquivos_alunos)}] Processando: {aluno_file}")
-        print("-" * 50)
+    Args:
+        caminho_cache: Caminho do arquivo JSONL de resultados
         
-        try:
-            # Preprocessar arquivo do aluno
-            aluno_path = os.path.join(diretorio_gabaritos, aluno_file)
-            aluno_img = preprocessar_arquivo(aluno_path, f"aluno_{i}", debug=debug_mode)
-            
-            # Extrair dados do cabeçalho (opcional com Gemini)
-            dados_aluno = {
-                "Aluno": f"Aluno {i}",
-                "Escola": "N/A",
-                "Nascimento": "N/A", 
-                "Turma": "N/A"
-            }
-            
-            if usar_gemini and model_gemini:
-                try:
-                    dados_extraidos = extrair_cabecalho_com_fallback(model_gemini, aluno_img, numero_aluno=i)
-                    if dados_extraidos:
-                        # Mapear chaves minúsculas do Gemini para maiúsculas do sistema
-                        mapeamento = {
-                            "escola": "Escola",
-                            "aluno": "Aluno", 
-                            "turma": "Turma",
-                            "nascimento": "Nascimento"
-                        }
-                        
-                        # Atualizar dados com mapeamento correto
-                        for chave_gemini, chave_sistema in mapeamento.items():
-                            if chave_gemini in dados_extraidos and dados_extraidos[chave_gemini] and dados_extraidos[chave_gemini] != "N/A":
-                                dados_aluno[chave_sistema] = dados_extraidos[chave_gemini]
-                        
-                        print(f"✅ Dados extraídos: {dados_aluno['Aluno']} ({dados_aluno['Escola']})")
-                except Exception as e:
-                    print(f"⚠️ Gemini falhou, usando numeração automática")
-            
-            # Detectar respostas do aluno usando o tipo específico (44 ou 52 questões)
-            if "page_" in aluno_img and (aluno_img.endswith(".png") or aluno_img.endswith(".jpg")):
-                respostas_aluno = detectar_respostas_pdf(aluno_img, debug=debug_mode)
-            else:
-                respostas_aluno = detectar_respostas_por_tipo(aluno_img, num_questoes=num_questoes, debug=debug_mode)
-            
-            questoes_aluno = sum(1 for r in respostas_aluno if r != '?')
-            
-            # Calcular resultado
-            resultado = comparar_respostas(respostas_gabarito, respostas_aluno)
-            
-            # Armazenar resultado com dados completos
-            resultado_completo = {
-                "arquivo": aluno_file,
-                "dados_completos": dados_aluno,  # Dados completos do cabeçalho
-                "acertos": resultado['acertos'],
-                "acertos_portugues": resultado.get('acertos_portugues', 0),
-                "acertos_matematica": resultado.get('acertos_matematica', 0),
-                "total": resultado['total'],
-                "percentual": resultado['percentual'],
-                "questoes_detectadas": questoes_aluno
-            }
-            resultados_lote.append(resultado_completo)
-            
-            # Exibir resultado com anuladas se houver
-            if resultado.get('anuladas', 0) > 0:
-                print(f"📊 Resultado: ✓ {resultado.get('acertos_portugues', 0)}PT/{resultado.get('acertos_matematica', 0)}MT | ✗ {resultado.get('erros_portugues', 0)}PT/{resultado.get('erros_matematica', 0)}MT | ⊘ {resultado['anuladas']} anuladas | Total {resultado['acertos']}/{resultado['total']} ({resultado['percentual']:.1f}%)")
-            else:
-                print(f"📊 Resultado: ✓ {resultado.get('acertos_portugues', 0)}PT/{resultado.get('acertos_matematica', 0)}MT | ✗ {resultado.get('erros_portugues', 0)}PT/{resultado.get('erros_matematica', 0)}MT | Total {resultado['acertos']}/{resultado['total']} ({resultado['percentual']:.1f}%)")
-            
-            # Delay de 10 segundos após processar cada cartão
-            if i < len(arquivos_alunos):
-                print(f"⏳ Aguardando 12 segundos antes do próximo cartão...")
-                time.sleep(20)
-            
-        except Exception as e:
-            print(f"❌ ERRO ao processar {aluno_file}: {e}")
-            print(f"⏳ Aguardando 10 segundos antes do próximo cartão...")
-            time.sleep(20)
-            
-        except Exception as e:
-            print(f"❌ ERRO ao processar {aluno_file}: {e}")
-            resultado_erro = {
-                "arquivo": aluno_file,
-                "dados_completos": {
-                    "Aluno": f"Aluno {i}",
-                    "Escola": "N/A",
-                    "Nascimento": "N/A",
-                    "Turma": "N/A"
-                },
-                "acertos": 0,
-                "acertos_portugues": 0,
-                "acertos_matematica": 0,
-                "total": 52,
-                "percentual": 0.0,
-                "questoes_detectadas": 0,
-                "erro": str(e)
-            }
-            resultados_lote.append(resultado_erro)
-    
-    # ===========================================
-    # RELATÓRIO FINAL SIMPLIFICADO
-    # ===========================================
+    Returns:
+        Dicionário (arquivo, hash do cartão, hash do gabarito, origem do
+        cabeçalho) -> resultado_completo
+    """
+    cache = {}
+    if not os.path.exists(caminho_cache):
+        return cache
     
-    print(f"\n{'='*60}")
-    print("📊 RELATÓRIO FINAL")
-    print(f"{'='*60}")
+    with open(caminho_cache, 'r', encoding='utf-8') as f:
+        for linha in f:
+            try:
+                registro = json.loads(linha)
+                chave = (registro['arquivo'], registro['hash'], registro['hash_gabarito'], registro['cabecalho'])
+                cache[chave] = registro['resultado_completo']
+            except (ValueError, KeyError):
+                # Linha truncada (execução interrompida) ou sem a origem do
+                # cabeçalho (formato anterior) - ignorar
+                continue
+    return cache
+
+def registrar_cache_resultado(caminho_cache: str, chave: Tuple[str, str, str, str], resultado_completo: dict) -> None:
+    """Acrescenta um resultado ao cache JSONL (uma linha por aluno)."""
+    arquivo, hash_cartao, hash_gabarito, cabecalho = chave
+    registro = {
+        'arquivo': arquivo,
+        'hash': hash_cartao,
+        'hash_gabarito': hash_gabarito,
+        'cabecalho': cabecalho,
+        'resultado_completo': resultado_completo,
+    }
+    try:
+        os.makedirs(os.path.dirname(caminho_cache), exist_ok=True)
+        with open(caminho_cache, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    except Exception as e:
+        print(f"⚠️ Não foi possível salvar o resultado em cache: {e}")
+
+# Envios simultâneos ao Google Sheets durante o processamento em lote
+MAX_ENVIOS_SHEETS_SIMULTANEOS = 8
+
+# Downloads simultâneos dos cartões novos no modo monitor: enquanto um
+# cartão é processado, os próximos já estão sendo baixados
+MAX_DOWNLOADS_SIMULTANEOS = 8
+
+# Intervalo adaptativo do modo monitor (segundos): cresce 1.5x a cada
+# verificação sem novidades, até o teto, e cai pela metade (até o piso)
+# quando chegam cartões. O --intervalo é só o ponto de partida.
+INTERVALO_MONITOR_MINIMO = 30
+INTERVALO_MONITOR_MAXIMO = 1800
+FATOR_INTERVALO_OCIOSO = 1.5
+
+
+def _proximo_intervalo_monitor(intervalo_atual: float, houve_novos: bool, maximo: float = None) -> float:
+    """
+    Calcula a espera até a próxima verificação do modo monitor.
+
+    Args:
+        intervalo_atual: Espera usada na última verificação (segundos)
+        houve_novos: Se a última verificação encontrou cartões novos
+        maximo: Teto da espera (None = INTERVALO_MONITOR_MAXIMO)
+
+    Returns:
+        Nova espera em segundos
+    """
+    if maximo is None:
+        maximo = INTERVALO_MONITOR_MAXIMO
+    if houve_novos:
+        return max(INTERVALO_MONITOR_MINIMO, intervalo_atual / 2)
+    return min(maximo, intervalo_atual * FATOR_INTERVALO_OCIOSO)
+
+
+def _agendar_downloads(executor, storages: Dict, arquivos: List[Dict], pasta: str) -> Dict:
+    """
+    Agenda o download de cada arquivo a partir da origem em que foi encontrado.
+
+    Args:
+        executor: ThreadPoolExecutor que fará os downloads
+        storages: Storages de entrada indexados por origem
+        arquivos: Arquivos novos, na ordem em que serão processados
+        pasta: Pasta local de destino
+
+    Returns:
+        Dicionário id do arquivo -> futuro com o caminho local baixado
+    """
+    futuros = {}
+    caminhos_usados = set()
+    for arquivo in arquivos:
+        # Nomes iguais em origens diferentes não podem baixar no mesmo caminho
+        caminho = os.path.join(pasta, arquivo['name'])
+        base, extensao = os.path.splitext(caminho)
+        sufixo = 1
+        while caminho in caminhos_usados:
+            caminho = f"{base}_{sufixo}{extensao}"
+            sufixo += 1
+        caminhos_usados.add(caminho)
+
+        storage = storages[arquivo['source']]
+        futuros[arquivo['id']] = executor.submit(storage.baixar, arquivo['storage_id'], caminho)
+    return futuros
+
+def _enviar_resultado_lote_planilha(client, resultado: dict) -> bool:
+    """
+    Envia um resultado do lote para o Google Sheets (executado em thread).
     
-    if resultados_lote:
-        print(f"\n=== TOTAL DE ALUNOS: {len(resultados_lote)} + RESULTADOS ===")
-        
-        # Ordenar por nome do aluno (ordem alfabética)
-        resultados_ordenados = sorted(resultados_lote, key=lambda x: x["dados_completos"]["Aluno"].lower())
-        
-        for i, r in enumerate(resultados_ordenados, 1):
-            dados = r["dados_completos"]
-            nome = dados["Aluno"]
-            escola = dados["Escola"]
-            nascimento = dados["Nascimento"]
-            turma = dados["Turma"]
-            acertos = r["acertos"]
-            
-            status = "❌" if "erro" in r else "✅"
-            
-            # Formato: aluno X (nome completo, escola, nascimento, turma) - acertou Y questões
-            print(f"{status} aluno {i} ({nome}, {escola}, {nascimento}, {turma}) - acertou {acertos} questões")
+    Args:
+        client: Cliente gspread autenticado
+        resultado: resultado_completo do aluno
         
-        # Estatísticas
-        resultados_validos = [r for r in resultados_lote if "erro" not in r]
-        if resultados_validos:
-            acertos = [r["acertos"] for r in resultados_validos]
-            percentuais = [r["percentual"] for r in resultados_validos]
-            anuladas_total = sum([r.get("anuladas", 0) for r in resultados_validos])
-            
-            print(f"\n=== ESTATÍSTICAS ===")
-            print(f"Média de acertos: {sum(acertos)/len(acertos):.1f}/52 questões")
-            print(f"Média percentual: {sum(percentuais)/len(percentuais):.1f}%")
-            if anuladas_total > 0:
-                print(f"⊘ Total de questões anuladas no lote: {anuladas_total}")
-    
-    # ===========================================
-    # ENVIAR PARA GOOGLE SHEETS (OPCIONAL)
-    # ===========================================
-    
-    print(f"\n📤 Enviando resultados para Google Sheets...")
+    Returns:
+        True se o envio foi concluído
+    """
+    dados_completos = resultado["dados_completos"]
     try:
-        client = configurar_google_sheets()
-        if client:
-            sucessos = 0
-            for resultado in resultados_lote:
-                if "erro" not in resultado:
-                    try:
-                        dados_completos = resultado["dados_completos"]
-                        dados_simples = {
-                            "Aluno": dados_completos["Aluno"], 
-                            "Escola": dados_completos["Escola"],
-                            "Nascimento": dados_completos["Nascimento"],
-                            "Turma": dados_completos["Turma"]
-                        }
-                        resultado_comparacao = {
-                            "acertos": resultado["acertos"],
-                            "acertos_portugues": resultado.get("acertos_portugues", 0),
-                            "acertos_matematica": resultado.get("acertos_matematica", 0),
-                            "erros": resultado["total"] - resultado["acertos"],
-                            "erros_portugues": resultado.get("erros_portugues", 0),
-                            "erros_matematica": resultado.get("erros_matematica", 0),
-                            "percentual": resultado["percentual"]
-                        }
-                        enviar_para_planilha(client, dados_simples, resultado_comparacao, questoes_detectadas=resultado.get("questoes_detectadas"))
-                        sucessos += 1
-                    except Exception as e:
-                        print(f"⚠️ Erro ao enviar {dados_completos['Aluno']}: {e}")
-            print(f"✅ {sucessos}/{len(resultados_lote)} resultados enviados!")
-        else:
-            print("❌ Não foi possível conectar ao Google Sheets")
+        dados_simples = {
+            "Aluno": dados_completos["Aluno"], 
+            "Escola": dados_completos["Escola"],
+            "Nascimento": dados_completos["Nascimento"],
+            "Turma": dados_completos["Turma"]
+        }
+        resultado_comparacao = {
+            "acertos": resultado["acertos"],
+            "acertos_portugues": resultado.get("acertos_portugues", 0),
+            "acertos_matematica": resultado.get("acertos_matematica", 0),
+            "erros": resultado["total"] - resultado["acertos"],
+            "erros_portugues": resultado.get("erros_portugues", 0),
+            "erros_matematica": resultado.get("erros_matematica", 0),
+            "total": resultado["total"],
+            "percentual": resultado["percentual"]
+        }
+        return bool(enviar_para_planilha(client, dados_simples, resultado_comparacao, questoes_detectadas=resultado.get("questoes_detectadas")))
     except Exception as e:
-        print(f"⚠️ Erro ao enviar para Sheets: {e}")
-    
-    return resultados_lote
+        log.info(f"⚠️ Erro ao enviar {dados_completos['Aluno']}: {e}")
+        return False
 
-def processar_lote_alunos(diretorio=".", usar_gemini=True, debug_mode=False, num_questoes=52):
+def _num_workers(total_tarefas: int) -> int:
+    """Número de workers para um pool: um por tarefa, limitado aos núcleos."""
+    return max(1, min(total_tarefas, os.cpu_count() or 1))
+
+def _ler_respostas_cartao(
+    aluno_file: str,
+    indice: int,
+    num_questoes: int,
+    debug_mode: bool,
+    aplicar_perspectiva: bool,
+    deteccao_pdf: bool = False,
+) -> Tuple[str, List[str]]:
     """
-    Processa múltiplos cartões de alunos em lote
+    Preprocessa um cartão de aluno e detecta as respostas marcadas.
+    
+    Executada em processos separados pelos drivers de lote: depende apenas
+    dos argumentos (nada de clientes Gemini/Sheets), então é segura para pickle.
+    Recebe e devolve só caminhos e listas curtas; o gabarito e as imagens
+    nunca atravessam a fronteira entre processos (a comparação com o gabarito
+    é feita no processo principal).
     
     Args:
-        diretorio: Diretório contendo os arquivos
-        usar_gemini: Se deve usar Gemini para cabeçalho
-        debug_mode: Se deve mostrar debug detalhado
+        aluno_file: Caminho do arquivo do aluno
+        indice: Número do aluno no lote (usado no nome do pré-processamento)
         num_questoes: Tipo de cartão (44 ou 52 questões)
+        debug_mode: Se deve mostrar debug detalhado
+        aplicar_perspectiva: Se deve aplicar a correção de perspectiva
+        deteccao_pdf: Se páginas extraídas de PDF ("page_*") usam a detecção especializada
         
     Returns:
-        Lista de resultados de cada aluno processado
+        Tupla (caminho da imagem pré-processada, lista de respostas)
     """
+    aluno_img = preprocessar_arquivo(
+        aluno_file,
+        f"aluno_{indice}",
+        debug=debug_mode,
+        aplicar_perspectiva=aplicar_perspectiva,
+    )
+    if deteccao_pdf and "page_" in aluno_img and aluno_img.endswith((".png", ".jpg")):
+        respostas_aluno = detectar_respostas_pdf(aluno_img, debug=debug_mode)
+    else:
+        respostas_aluno = detectar_respostas_por_tipo(aluno_img, num_questoes=num_questoes, debug=debug_mode)
+    return aluno_img, respostas_aluno
+
+def _cabecalho_apos_omr(model, futuro_omr, numero_aluno: int) -> Optional[dict]:
+    """
+    Aguarda o pré-processamento do cartão (feito no pool de processos) e
+    extrai o cabeçalho. Executada em thread, em paralelo com o OMR dos demais.
+    """
+    aluno_img, _ = futuro_omr.result()
+    return extrair_cabecalho_com_fallback(model, aluno_img, numero_aluno=numero_aluno)
+
+# Chaves minúsculas do Gemini -> chaves maiúsculas do sistema
+_CAMPOS_CABECALHO_GEMINI = {
+    "escola": "Escola",
+    "aluno": "Aluno",
+    "turma": "Turma",
+    "nascimento": "Nascimento"
+}
+
+# Dados do aluno quando o cabeçalho não é lido ("Aluno" recebe a numeração)
+_DADOS_ALUNO_PADRAO = {
+    "Aluno": None,
+    "Escola": "N/A",
+    "Nascimento": "N/A",
+    "Turma": "N/A"
+}
+
+def _dados_aluno_com_cabecalho(numero_aluno: int, dados_extraidos: Optional[dict]) -> dict:
+    """
+    Dados padrão do aluno ("Aluno N", demais N/A) atualizados com os campos
+    válidos (não vazios e diferentes de "N/A") extraídos pelo Gemini.
+    """
+    dados_aluno = _DADOS_ALUNO_PADRAO.copy()
+    dados_aluno["Aluno"] = f"Aluno {numero_aluno}"
+    if dados_extraidos:
+        dados_aluno.update({
+            _CAMPOS_CABECALHO_GEMINI[chave]: valor
+            for chave, valor in dados_extraidos.items()
+            if chave in _CAMPOS_CABECALHO_GEMINI and valor and valor != "N/A"
+        })
+    return dados_aluno
+
+# Cartão com detecção abaixo disso é descartado antes da comparação e do envio
+FRACAO_MIN_QUESTOES_DETECTADAS = 0.4
+MIN_QUESTOES_DETECTADAS = 10
+
+def deteccao_insuficiente(questoes_detectadas: int, num_questoes: int) -> bool:
+    """Se a detecção das bolhas claramente falhou (poucas questões lidas)."""
+    return questoes_detectadas < max(num_questoes * FRACAO_MIN_QUESTOES_DETECTADAS, MIN_QUESTOES_DETECTADAS)
+
+def _resultado_com_erro(aluno_file: str, numero_aluno: int, erro: str, questoes_detectadas: int = 0) -> dict:
+    """Registro de um cartão que não pôde ser corrigido (entra no relatório como ❌)."""
+    return {
+        "arquivo": aluno_file,
+        "dados_completos": _dados_aluno_com_cabecalho(numero_aluno, None),
+        "acertos": 0,
+        "acertos_portugues": 0,
+        "acertos_matematica": 0,
+        "total": 52,
+        "percentual": 0.0,
+        "questoes_detectadas": questoes_detectadas,
+        "erro": erro
+    }
+
+GABARITO_CANDIDATOS = (
+    "gabarito.pdf", "gabarito.png", "gabarito.jpg",
+    "resposta_gabarito.pdf", "resposta_gabarito.png", "resposta_gabarito.jpg",
+    "resposta_gabarito_teste.pdf", "master.pdf", "template.pdf"
+)
+
+def _gabarito_por_prefixo(arquivos: List[str]) -> Tuple[Optional[str], List[str]]:
+    """
+    Separa, em uma única passada, o gabarito (primeiro arquivo cujo nome começa
+    com "gabarito", case insensitive) dos arquivos dos alunos.
+    """
+    gabarito_file, arquivos_alunos = None, []
+    for arquivo in arquivos:
+        if not RE_GABARITO.match(arquivo):
+            arquivos_alunos.append(arquivo)
+        elif gabarito_file is None:
+            gabarito_file = arquivo
+    return gabarito_file, arquivos_alunos
+
+def _gabarito_por_candidatos(arquivos: List[str]) -> Tuple[Optional[str], List[str]]:
+    """
+    Gabarito = primeiro nome conhecido de GABARITO_CANDIDATOS; sem nenhum, o
+    primeiro arquivo em ordem alfabética. Os demais arquivos são alunos.
+    """
+    nomes = set(arquivos)
+    gabarito_file = next((c for c in GABARITO_CANDIDATOS if c in nomes), None)
+    if not gabarito_file and arquivos:
+        gabarito_file = min(arquivos)
+        log.info(f"⚠️ Gabarito não identificado pelos nomes padrão. Usando: {gabarito_file}")
+    arquivos_alunos = [f for f in arquivos if f != gabarito_file and not RE_GABARITO.match(f)]
+    return gabarito_file, arquivos_alunos
+
+def _resultado_do_aluno(
+    i: int,
+    aluno_file: str,
+    leitura: Tuple[str, List[str]],
+    respostas_gabarito: List[str],
+    num_questoes: int,
+    model_gemini=None,
+    dados_lote: Optional[dict] = None,
+) -> Tuple[dict, bool]:
+    """
+    Cabeçalho + comparação de um aluno cujo OMR já terminou.
     
-    print("🚀 SISTEMA DE CORREÇÃO EM LOTE - MÚLTIPLOS ALUNOS")
-    print("=" * 60)
-    
-    # Configurar suporte a PDF se disponível
-    if PDF_PROCESSOR_AVAILABLE:
-        print("\n🔧 Configurando suporte a PDF...")
-        pdf_ok = setup_pdf_support()
-        if not pdf_ok:
-            print("⚠️ Suporte a PDF limitado - apenas imagens serão processadas")
-    
-    # Listar arquivos suportados no diretório
-    print(f"\n📁 Analisando arquivos no diretório: {os.path.abspath(diretorio)}")
-    arquivos = listar_arquivos_suportados(diretorio)
-    
-    if not arquivos['todos']:
-        print("❌ Nenhum arquivo suportado encontrado!")
-        print("💡 Formatos suportados: PDF, PNG, JPG, JPEG, BMP, TIFF")
-        return []
-    
-    print(f"✅ Encontrados {len(arquivos['todos'])} arquivos suportados:")
-    if arquivos['imagens']:
-        print(f"   🖼️ Imagens: {', '.join(arquivos['imagens'])}")
-    if arquivos['pdfs']:
-        print(f"   📄 PDFs: {', '.join(arquivos['pdfs'])}")
-    
-    # ===========================================
-    # IDENTIFICAR GABARITO
-    # ===========================================
-    
-    print("\n📋 Identificando arquivo de gabarito...")
-    gabarito_file = None
-    
-    # Buscar arquivo do gabarito (priorizar nomes específicos)
-    gabarito_candidates = [
-        "gabarito.pdf", "gabarito.png", "gabarito.jpg",
-        "resposta_gabarito.pdf", "resposta_gabarito.png", "resposta_gabarito.jpg",
-        "resposta_gabarito_teste.pdf", "master.pdf", "template.pdf"
-    ]
-    
-    for candidate in gabarito_candidates:
-        if candidate in arquivos['todos']:
-            gabarito_file = candidate
-            break
-    
-    # Se não encontrou pelos nomes, usar o primeiro arquivo (assumindo que o primeiro é gabarito)
-    if not gabarito_file and arquivos['todos']:
-        gabarito_file = sorted(arquivos['todos'])[0]
-        print(f"⚠️ Gabarito não identificado pelos nomes padrão. Usando: {gabarito_file}")
-    
-    if not gabarito_file:
-        print("❌ ERRO: Nenhum arquivo de gabarito encontrado!")
-        print("💡 Renomeie o arquivo do gabarito para: gabarito.pdf ou gabarito.png")
-        return []
-    
-    print(f"✅ Gabarito identificado: {gabarito_file}")
-    
-    # ===========================================
-    # IDENTIFICAR ARQUIVOS DOS ALUNOS
-    # ===========================================
-    
-    print("\n👥 Identificando arquivos dos alunos...")
-    
-    # Todos os arquivos exceto o gabarito são considerados alunos
-    arquivos_alunos = [f for f in arquivos['todos'] if f != gabarito_file]
-    
-    if not arquivos_alunos:
-        print("❌ ERRO: Nenhum arquivo de aluno encontrado!")
-        print("💡 Adicione arquivos dos alunos na pasta (qualquer nome, exceto gabarito)")
-        return []
-    
-    print(f"✅ Encontrados {len(arquivos_alunos)} alunos para processar:")
-    for i, aluno in enumerate(arquivos_alunos, 1):
-        print(f"   {i:02d}. {aluno}")
+    Args:
+        i: Número do aluno no lote
+        aluno_file: Nome do arquivo do aluno
+        leitura: (imagem pré-processada, respostas) devolvidos por _ler_respostas_cartao
+        respostas_gabarito: Respostas do gabarito
+        num_questoes: Tipo de cartão (44 ou 52 questões)
+        model_gemini: Modelo Gemini para o cabeçalho (None = sem Gemini)
+        dados_lote: Cabeçalho lido no lote do Gemini (None = extração individual)
+        
+    Returns:
+        (resultado_completo, cabeçalho lido pelo Gemini)
+    """
+    aluno_img, respostas_aluno = leitura
     
-    # ===========================================
-    # CONFIGURAR GEMINI E GOOGLE SHEETS
-    # ===========================================
+    # Extrair dados do cabeçalho (opcional com Gemini)
+    dados_aluno = _dados_aluno_com_cabecalho(i, None)
+    cabecalho_lido = False
     
-    model_gemini = None
-    if usar_gemini:
-        print("\n🤖 Configurando Gemini...")
+    if model_gemini:
         try:
-            model_gemini = configurar_gemini()
-            print("✅ Gemini configurado com sucesso!")
+            # Resultado do lote; extração individual só se o lote falhou
+            dados_extraidos = dados_lote
+            if not dados_extraidos:
+                # Sem o padrão "Aluno N": só dados lidos marcam cabecalho_lido
+                dados_extraidos = extrair_cabecalho_com_fallback(
+                    model_gemini, aluno_img, numero_aluno=i, padrao_se_falhar=False
+                )
+            if dados_extraidos:
+                # Mapear chaves minúsculas do Gemini para maiúsculas do sistema
+                dados_aluno = _dados_aluno_com_cabecalho(i, dados_extraidos)
+                # Resposta só com "N/A" deixa o padrão e não conta como lida
+                cabecalho_lido = dados_aluno != _dados_aluno_com_cabecalho(i, None)
+                log.info(f"✅ Dados extraídos: {dados_aluno['Aluno']} ({dados_aluno['Escola']})")
         except Exception as e:
-            print(f"❌ Erro ao configurar Gemini: {e}")
-            print("⚠️ Continuando sem Gemini (apenas OCR)")
-            usar_gemini = False
+            log.info(f"⚠️ Gemini falhou, usando numeração automática")
+    
+    questoes_aluno = sum(1 for r in respostas_aluno if r != '?')
+    
+    # Detecção falhou: não comparar nem enviar ao Google Sheets
+    if deteccao_insuficiente(questoes_aluno, num_questoes):
+        log.info(f"❌ Poucas questões detectadas ({questoes_aluno}/{num_questoes}) - cartão ignorado")
+        return _resultado_com_erro(
+            aluno_file, i, f"Poucas questões detectadas ({questoes_aluno}/{num_questoes})", questoes_aluno
+        ), False
+    
+    # Calcular resultado
+    resultado = comparar_respostas(respostas_gabarito, respostas_aluno)
+    
+    # Armazenar resultado com dados completos
+    resultado_completo = {
+        "arquivo": aluno_file,
+        "dados_completos": dados_aluno,  # Dados completos do cabeçalho
+        "acertos": resultado['acertos'],
+        "acertos_portugues": resultado.get('acertos_portugues', 0),
+        "acertos_matematica": resultado.get('acertos_matematica', 0),
+        "total": resultado['total'],
+        "percentual": resultado['percentual'],
+        "questoes_detectadas": questoes_aluno
+    }
     
-    # ===========================================
-    # PROCESSAR GABARITO (UMA VEZ APENAS)
-    # ===========================================
+    # Exibir resultado com anuladas se houver
+    if resultado.get('anuladas', 0) > 0:
+        log.info(f"📊 Resultado: ✓ {resultado.get('acertos_portugues', 0)}PT/{resultado.get('acertos_matematica', 0)}MT | ✗ {resultado.get('erros_portugues', 0)}PT/{resultado.get('erros_matematica', 0)}MT | ⊘ {resultado['anuladas']} anuladas | Total {resultado['acertos']}/{resultado['total']} ({resultado['percentual']:.1f}%)")
+    else:
+        log.info(f"📊 Resultado: ✓ {resultado.get('acertos_portugues', 0)}PT/{resultado.get('acertos_matematica', 0)}MT | ✗ {resultado.get('erros_portugues', 0)}PT/{resultado.get('erros_matematica', 0)}MT | Total {resultado['acertos']}/{resultado['total']} ({resultado['percentual']:.1f}%)")
     
-    print(f"\n{'='*60}")
-    print("📋 PROCESSANDO GABARITO")
-    print(f"{'='*60}")
+    return resultado_completo, cabecalho_lido
+
+def _iter_resultados(
+    diretorio: str,
+    arquivos_alunos: List[str],
+    respostas_gabarito: List[str],
+    num_questoes: int,
+    debug_mode: bool,
+    model_gemini=None,
+    resultados_em_cache: Optional[Dict[int, dict]] = None,
+    deteccao_pdf: bool = False,
+) -> Iterator[Tuple[int, dict, bool, bool]]:
+    """
+    Corrige os cartões da pasta, produzindo um resultado por aluno assim que
+    ele fica pronto: os do cache primeiro e os demais na ordem em que o OMR
+    e o lote de cabeçalhos de cada um terminam (não na de arquivos_alunos).
     
-    try:
-        # Preprocessar gabarito
-        gabarito_img = preprocessar_arquivo(gabarito_file, "gabarito", debug=debug_mode)
-        
-        # Detectar respostas do gabarito usando o tipo específico (44 ou 52 questões)
-        if "page_" in gabarito_img and (gabarito_img.endswith(".png") or gabarito_img.endswith(".jpg")):
-            print("🔍 Usando detecção especializada para PDF...")
-            respostas_gabarito = detectar_respostas_pdf(gabarito_img, debug=debug_mode)
-        else:
-            respostas_gabarito = detectar_respostas_por_tipo(gabarito_img, num_questoes=num_questoes, debug=debug_mode, eh_gabarito=True)
-        
-        questoes_gabarito = sum(1 for r in respostas_gabarito if r != '?')
-        num_questoes_detectadas = len(respostas_gabarito)
-        print(f"✅ Gabarito processado: {questoes_gabarito}/{num_questoes_detectadas} questões detectadas")
-        
-        # Exibir gabarito em formato simples
-        exibir_gabarito_simples(respostas_gabarito)
-        
-        if questoes_gabarito < 40:
-            print("⚠️ ATENÇÃO: Poucas questões detectadas no gabarito. Verifique a qualidade da imagem.")
+    Args:
+        diretorio: Pasta dos cartões
+        arquivos_alunos: Nomes dos arquivos dos alunos
+        respostas_gabarito: Respostas do gabarito
+        num_questoes: Tipo de cartão (44 ou 52 questões)
+        debug_mode: Se deve mostrar debug detalhado
+        model_gemini: Modelo Gemini para o cabeçalho (None = sem Gemini)
+        resultados_em_cache: Índice do aluno -> resultado já calculado
+        deteccao_pdf: Se páginas extraídas de PDF ("page_*") usam a detecção especializada
         
-    except Exception as e:
-        print(f"❌ ERRO CRÍTICO ao processar gabarito: {e}")
-        return []
-    
-    # ===========================================
-    # PROCESSAR TODOS OS ALUNOS
-    # ===========================================
-    
-    resultados_lote = []
-    alunos_processados = 0
-    alunos_com_erro = 0
-    
-    print(f"\n{'='*60}")
-    print(f"👥 PROCESSANDO {len(arquivos_alunos)} ALUNOS")
-    print(f"{'='*60}")
+    Yields:
+        (índice do aluno, resultado_completo, veio do cache, cabeçalho lido
+        pelo Gemini)
+    """
+    diretorio_gabaritos = diretorio
+    resultados_em_cache = resultados_em_cache or {}
+    total_alunos = len(arquivos_alunos)
+    
+    def _titulo(i):
+        log.info(f"\n🔄 [{i:02d}/{total_alunos}] Processando: {arquivos_alunos[i - 1]}")
+        log.info(_SEPARADOR_ALUNO)
+    
+    # Alunos inalterados saem de imediato, sem OMR nem Gemini
+    for i in sorted(resultados_em_cache):
+        resultado_cache = resultados_em_cache[i]
+        _titulo(i)
+        log.info(f"♻️ Em cache: {resultado_cache['acertos']}/{resultado_cache['total']} ({resultado_cache['percentual']:.1f}%)")
+        yield i, resultado_cache, True, False
+    
+    # Pré-processamento + OMR (CPU) em paralelo, um processo por núcleo. Os
+    # cabeçalhos (Gemini, rede) são pedidos em lote numa thread à medida que
+    # os cartões ficam prontos: um lote sai quando enche ou quando o Gemini
+    # está parado. Cada aluno é produzido assim que o seu lote responde,
+    # enquanto o OMR dos demais continua
+    leituras_alunos = {}
+    gemini_executor = ThreadPoolExecutor(max_workers=1) if model_gemini else None
+    lotes_cabecalho = []  # (índices, futuro), na ordem de envio
+    pendentes_cabecalho = []
+    
+    def _pedir_cabecalhos():
+        lotes_cabecalho.append((
+            pendentes_cabecalho[:],
+            gemini_executor.submit(
+                extrair_cabecalhos_em_lote,
+                model_gemini,
+                [leituras_alunos[j][0] for j in pendentes_cabecalho],
+            ),
+        ))
+        pendentes_cabecalho.clear()
     
-    for i, aluno_file in enumerate(arquivos_alunos, 1):
-        print(f"\n🔄 [{i:02d}/{len(arquivos_alunos)}] Processando: {aluno_file}")
-        print("-" * 50)
-        
+    def _concluir(i, dados_lote=None, erro=None):
+        aluno_file = arquivos_alunos[i - 1]
+        _titulo(i)
         try:
-            # Preprocessar arquivo do aluno
-            aluno_img = preprocessar_arquivo(aluno_file, f"aluno_{i}", debug=debug_mode)
-            
-            # Extrair dados do cabeçalho
-            dados_aluno = {"Escola": "N/A", "Aluno": "N/A", "Nascimento": "N/A", "Turma": "N/A"}
-            
-            if usar_gemini and model_gemini:
-                try:
-                    dados_extraidos = extrair_cabecalho_com_fallback(model_gemini, aluno_img, numero_aluno=i)
-                    if dados_extraidos:
-                        # Mapear chaves minúsculas do Gemini para maiúsculas do sistema
-                        mapeamento = {
-                            "escola": "Escola",
-                            "aluno": "Aluno", 
-                            "turma": "Turma",
-                            "nascimento": "Nascimento"
-                        }
-                        
-                        for chave_gemini, chave_sistema in mapeamento.items():
-                            if chave_gemini in dados_extraidos and dados_extraidos[chave_gemini]:
-                                dados_aluno[chave_sistema] = dados_extraidos[chave_gemini]
-                        
-                        print("✅ Dados extraídos pelo Gemini:")
-                        for campo, valor in dados_aluno.items():
-                            print(f"   📝 {campo}: {valor}")
-                except Exception as e:
-                    print(f"⚠️ Erro no Gemini para {aluno_file}: {e}")
-                    dados_aluno["Aluno"] = f"Aluno {i}"  # Usar numeração automática
-            else:
-                dados_aluno["Aluno"] = f"Aluno {i}"  # Usar numeração automática
-            
-            # Detectar respostas do aluno usando o tipo específico (44 ou 52 questões)
-            respostas_aluno = detectar_respostas_por_tipo(aluno_img, num_questoes=num_questoes, debug=debug_mode)
-            
-            questoes_aluno = sum(1 for r in respostas_aluno if r != '?')
-            num_questoes_aluno = len(respostas_aluno)
-            print(f"✅ Respostas processadas: {questoes_aluno}/{num_questoes_aluno} questões detectadas")
-            
-            # Calcular resultado
-            resultado = comparar_respostas(respostas_gabarito, respostas_aluno)
-            
-            # Armazenar resultado
-            resultado_completo = {
-                "arquivo": aluno_file,
-                "dados": dados_aluno,
-                "respostas": respostas_aluno,
-                "resultado": resultado,
-                "questoes_detectadas": questoes_aluno
-            }
-            resultados_lote.append(resultado_completo)
-            
-            # Exibir resultado com anuladas se houver
-            if resultado.get('anuladas', 0) > 0:
-                print(f"📊 Resultado: ✓ {resultado.get('acertos_portugues', 0)}PT/{resultado.get('acertos_matematica', 0)}MT | ✗ {resultado.get('erros_portugues', 0)}PT/{resultado.get('erros_matematica', 0)}MT | ⊘ {resultado['anuladas']} anuladas | Total {resultado['acertos']}/{resultado['total']} ({resultado['percentual']:.1f}%)")
-            else:
-                print(f"📊 Resultado: ✓ {resultado.get('acertos_portugues', 0)}PT/{resultado.get('acertos_matematica', 0)}MT | ✗ {resultado.get('erros_portugues', 0)}PT/{resultado.get('erros_matematica', 0)}MT | Total {resultado['acertos']}/{resultado['total']} ({resultado['percentual']:.1f}%)")
-            alunos_processados += 1
-            
-            # Delay de 12 segundos após processar cada cartão
-            if i < len(arquivos_alunos):
-                print(f"⏳ Aguardando 12 segundos antes do próximo cartão...")
-                time.sleep(12)
-            
+            if erro is not None:
+                raise erro
+            resultado_completo, cabecalho_lido = _resultado_do_aluno(
+                i, aluno_file, leituras_alunos.pop(i), respostas_gabarito, num_questoes,
+                model_gemini=model_gemini, dados_lote=dados_lote,
+            )
         except Exception as e:
-            print(f"❌ ERRO ao processar {aluno_file}: {e}")
-            alunos_com_erro += 1
-            # Adicionar resultado de erro
-            resultado_erro = {
-                "arquivo": aluno_file,
-                "dados": {"Aluno": f"Aluno {i}", "Erro": str(e)},
-                "respostas": ['?'] * 52,
-                "resultado": {"total": 52, "acertos": 0, "erros": 52, "percentual": 0.0},
-                "questoes_detectadas": 0
-            }
-            resultados_lote.append(resultado_erro)
-    
-    # ===========================================
-    # RELATÓRIO FINAL E ESTATÍSTICAS
-    # ===========================================
-    
-    print(f"\n{'='*60}")
-    print("📊 RELATÓRIO FINAL DO LOTE")
-    print(f"{'='*60}")
-    
-    print(f"\n=== ESTATÍSTICAS GERAIS ===")
-    print(f"Total de alunos: {len(arquivos_alunos)}")
-    print(f"Processados com sucesso: {alunos_processados} ✅")
-    print(f"Erros de processamento: {alunos_com_erro} ❌")
-    
-    if resultados_lote:
-        # Calcular estatísticas
-        acertos_totais = [r["resultado"]["acertos"] for r in resultados_lote if "Erro" not in r["dados"]]
-        percentuais = [r["resultado"]["percentual"] for r in resultados_lote if "Erro" not in r["dados"]]
-        anuladas_total = sum([r["resultado"].get("anuladas", 0) for r in resultados_lote if "Erro" not in r["dados"]])
-        
-        if acertos_totais:
-            print(f"\n=== ESTATÍSTICAS DE DESEMPENHO ===")
-            print(f"Média de acertos: {sum(acertos_totais)/len(acertos_totais):.1f}/52")
-            print(f"Média percentual: {sum(percentuais)/len(percentuais):.1f}%")
-            print(f"Melhor resultado: {max(acertos_totais)}/52 ({max(percentuais):.1f}%)")
-            print(f"Pior resultado: {min(acertos_totais)}/52 ({min(percentuais):.1f}%)")
-            if anuladas_total > 0:
-                print(f"⊘ Total de questões anuladas no lote: {anuladas_total}")
-        
-        # Mostrar ranking (ordenado alfabeticamente)
-        print(f"\n=== LISTA DE ALUNOS (ORDEM ALFABÉTICA) ===")
-        resultados_validos = [r for r in resultados_lote if "Erro" not in r["dados"]]
-        resultados_ordenados = sorted(resultados_validos, key=lambda x: x["dados"].get("Aluno", "").lower())
-        
-        for i, r in enumerate(resultados_ordenados[:10], 1):  # Top 10
-            nome = r["dados"].get("Aluno", "N/A")
-            acertos = r["resultado"]["acertos"]
-            percentual = r["resultado"]["percentual"]
-            print(f"   {i:02d}. {nome:<25} | {acertos:02d}/52 | {percentual:5.1f}%")
-        
-        if len(resultados_ordenados) > 10:
-            print(f"   ... e mais {len(resultados_ordenados) - 10} alunos")
+            log.exception(f"❌ ERRO ao processar {aluno_file}: {e}")
+            return i, _resultado_com_erro(aluno_file, i, str(e)), False, False
+        return i, resultado_completo, False, cabecalho_lido
+    
+    def _lotes_respondidos(esperar: bool):
+        # O executor do Gemini tem uma só thread: os lotes terminam na ordem de envio
+        while lotes_cabecalho and (esperar or lotes_cabecalho[0][1].done()):
+            indices_lote, futuro_lote = lotes_cabecalho.pop(0)
+            try:
+                cabecalhos = futuro_lote.result()
+            except Exception as e:
+                log.info(f"⚠️ Lote Gemini falhou ({e}) - usando extração individual")
+                cabecalhos = [None] * len(indices_lote)
+            for j, dados_lote in zip(indices_lote, cabecalhos):
+                yield _concluir(j, dados_lote)
     
-    return resultados_lote
+    try:
+        with ProcessPoolExecutor(max_workers=_num_workers(total_alunos - len(resultados_em_cache))) as executor:
+            futuros = {
+                executor.submit(
+                    _ler_respostas_cartao,
+                    os.path.join(diretorio_gabaritos, aluno_file),
+                    i,
+                    num_questoes,
+                    debug_mode,
+                    PERSPECTIVA_HABILITADA,
+                    deteccao_pdf,
+                ): i
+                for i, aluno_file in enumerate(arquivos_alunos, 1)
+                if i not in resultados_em_cache
+            }
+            for futuro in as_completed(futuros):
+                i = futuros[futuro]
+                try:
+                    leituras_alunos[i] = futuro.result()
+                except Exception as e:
+                    yield _concluir(i, erro=e)
+                    continue
+                if not gemini_executor:
+                    yield _concluir(i)
+                    continue
+                pendentes_cabecalho.append(i)
+                gemini_ocioso = all(futuro_lote.done() for _, futuro_lote in lotes_cabecalho)
+                if len(pendentes_cabecalho) >= TAMANHO_LOTE_GEMINI or gemini_ocioso:
+                    _pedir_cabecalhos()
+                yield from _lotes_respondidos(esperar=False)
+        
+        # OMR concluído: pedir o que sobrou e aguardar os lotes restantes
+        if pendentes_cabecalho:
+            _pedir_cabecalhos()
+        if lotes_cabecalho:
+            log.info(f"\n🤖 Aguardando cabeçalhos de {len(leituras_alunos)} alunos extraídos em lote...")
+        yield from _lotes_respondidos(esperar=True)
+    finally:
+        if gemini_executor:
+            gemini_executor.shutdown(cancel_futures=True)
 
-def processar_pasta_gabaritos_sem_sheets(diretorio: str = "./gabaritos", usar_gemini: bool = True, debug_mode: bool = False, num_questoes: int = 52):
+def ordenar_por_nome_aluno(resultados: List[dict]) -> List[dict]:
+    """Ordena os resultados pelo nome do aluno (ordem alfabética, sem distinção de caixa)."""
+    return sorted(resultados, key=lambda r: r["dados_completos"]["Aluno"].casefold())
+
+def exibir_estatisticas_lote(resultados_validos: List[dict], total_alunos: int, num_questoes: int) -> None:
     """
-    Versão da função que NÃO tenta enviar para Google Sheets
-    (evita problema de cota do Drive)
+    Exibe as estatísticas de desempenho do lote (média, mediana, desvio,
+    melhor e pior resultado), calculadas de uma vez com NumPy.
     
     Args:
-        diretorio: Caminho da pasta contendo gabarito e cartões dos alunos
+        resultados_validos: Resultados sem erro de processamento
+        total_alunos: Quantidade de alunos no lote
+        num_questoes: Tipo de cartão (44 ou 52 questões)
+    """
+    n = len(resultados_validos)
+    acertos = np.fromiter((r["acertos"] for r in resultados_validos), dtype=np.int16, count=n)
+    percentuais = np.fromiter((r["percentual"] for r in resultados_validos), dtype=np.float64, count=n)
+    anuladas_total = sum(r.get("anuladas", 0) for r in resultados_validos)
+    
+    log.info(f"\n=== ESTATÍSTICAS ===")
+    log.info(f"Alunos processados: {n}/{total_alunos}")
+    log.info(f"Média de acertos: {acertos.mean():.1f}/{num_questoes} questões (mediana {np.median(acertos):.1f}, desvio {acertos.std():.1f})")
+    log.info(f"Média percentual: {percentuais.mean():.1f}%")
+    log.info(f"Melhor resultado: {acertos.max()}/{num_questoes} ({percentuais.max():.1f}%)")
+    log.info(f"Pior resultado: {acertos.min()}/{num_questoes} ({percentuais.min():.1f}%)")
+    if anuladas_total > 0:
+        log.info(f"⊘ Total de questões anuladas no lote: {anuladas_total}")
+
+def _processar_core(
+    diretorio: str,
+    usar_gemini: bool,
+    debug_mode: bool,
+    num_questoes: int,
+    *,
+    enviar_sheets: bool,
+    gabarito_selector: Callable[[List[str]], Tuple[Optional[str], List[str]]],
+    titulo: str = "PASTA GABARITOS",
+    forcar: Optional[bool] = None,
+    deteccao_pdf_alunos: bool = False,
+    deteccao_pdf_gabarito: bool = False,
+) -> List[dict]:
+    """
+    Pipeline único de correção em lote: gabarito + todos os cartões da pasta.
+    
+    Args:
+        diretorio: Pasta contendo gabarito e cartões dos alunos
         usar_gemini: Se deve usar Gemini para cabeçalho
         debug_mode: Se deve mostrar debug detalhado
         num_questoes: Tipo de cartão (44 ou 52 questões)
+        enviar_sheets: Se deve enviar os resultados para o Google Sheets
+        gabarito_selector: Separa a lista da pasta em (gabarito, alunos)
+        titulo: Título exibido no início do processamento
+        forcar: Ignora o cache de resultados (padrão: --force)
+        deteccao_pdf_alunos: Se cartões "page_*" (páginas de PDF) usam a detecção especializada
+        deteccao_pdf_gabarito: Idem, para o gabarito
+        
+    Returns:
+        Lista de resultados de cada aluno processado
     """
     
-    print("🚀 SISTEMA DE CORREÇÃO - PASTA GABARITOS (SEM GOOGLE SHEETS)")
-    print("=" * 60)
+    log.info(f"🚀 SISTEMA DE CORREÇÃO - {titulo}")
+    log.info("=" * 60)
     
     diretorio_gabaritos = diretorio
     
     if not os.path.exists(diretorio_gabaritos):
-        print(f"❌ ERRO: Pasta '{diretorio_gabaritos}' não encontrada!")
-        print("💡 Crie a pasta informada e adicione os arquivos do gabarito e dos alunos")
+        log.info(f"❌ ERRO: Pasta '{diretorio_gabaritos}' não encontrada!")
+        log.info("💡 Crie a pasta informada e adicione os arquivos do gabarito e dos alunos")
         return []
     
     # Configurar suporte a PDF se disponível
     if PDF_PROCESSOR_AVAILABLE:
-        print("\n🔧 Configurando suporte a PDF...")
+        log.info("\n🔧 Configurando suporte a PDF...")
         pdf_ok = setup_pdf_support()
         if not pdf_ok:
-            print("⚠️ Suporte a PDF limitado - apenas imagens serão processadas")
+            log.info("⚠️ Suporte a PDF limitado - apenas imagens serão processadas")
     
     # Listar arquivos suportados na pasta gabaritos
-    print(f"\n📁 Analisando arquivos na pasta: {os.path.abspath(diretorio_gabaritos)}")
+    log.info(f"\n📁 Analisando arquivos na pasta: {os.path.abspath(diretorio_gabaritos)}")
     arquivos = listar_arquivos_suportados(diretorio_gabaritos)
     
     if not arquivos['todos']:
-        print("❌ Nenhum arquivo suportado encontrado na pasta gabaritos!")
-        print("💡 Formatos suportados: PDF, PNG, JPG, JPEG, BMP, TIFF")
+        log.info("❌ Nenhum arquivo suportado encontrado na pasta gabaritos!")
+        log.info("💡 Formatos suportados: PDF, PNG, JPG, JPEG, BMP, TIFF")
         return []
     
-    print(f"✅ Encontrados {len(arquivos['todos'])} arquivos:")
+    log.info(f"✅ Encontrados {len(arquivos['todos'])} arquivos:")
     for arquivo in arquivos['todos']:
-        print(f"   📄 {arquivo}")
+        log.info(f"   📄 {arquivo}")
     
     # ===========================================
     # IDENTIFICAR GABARITO (LÓGICA SIMPLIFICADA)
     # ===========================================
     
-    print("\n📋 Identificando arquivo de gabarito...")
-    gabarito_file = None
+    log.info("\n📋 Identificando arquivo de gabarito...")
     
-    # Buscar por qualquer arquivo que comece com "gabarito" (case insensitive)
-    for arquivo in arquivos['todos']:
-        if arquivo.lower().startswith('gabarito'):
-            gabarito_file = arquivo
-            break
+    gabarito_file, arquivos_alunos = gabarito_selector(arquivos['todos'])
     
     if not gabarito_file:
-        print("❌ ERRO: Nenhum arquivo 'gabarito.*' encontrado!")
-        print("💡 Renomeie o arquivo do gabarito para: gabarito.png, gabarito.pdf, etc.")
+        log.info("❌ ERRO: Nenhum arquivo 'gabarito.*' encontrado!")
+        log.info("💡 Renomeie o arquivo do gabarito para: gabarito.png, gabarito.pdf, etc.")
         return []
     
-    print(f"✅ Gabarito identificado: {gabarito_file}")
+    log.info(f"✅ Gabarito identificado: {gabarito_file}")
     
     # ===========================================
     # IDENTIFICAR ARQUIVOS DOS ALUNOS (LÓGICA SIMPLIFICADA)
     # ===========================================
     
-    print("\n👥 Identificando arquivos dos alunos...")
-    
-    # TODOS os arquivos que NÃO começam com "gabarito" são alunos
-    arquivos_alunos = [f for f in arquivos['todos'] if not f.lower().startswith('gabarito')]
+    log.info("\n👥 Identificando arquivos dos alunos...")
     
+    # TODOS os arquivos exceto o gabarito (e outros "gabarito.*") são alunos,
+    # já separados pelo gabarito_selector
     if not arquivos_alunos:
-        print("❌ ERRO: Nenhum arquivo de aluno encontrado!")
-        print("💡 Adicione arquivos dos alunos na pasta gabaritos (qualquer nome exceto gabarito.*)")
+        log.info("❌ ERRO: Nenhum arquivo de aluno encontrado!")
+        log.info("💡 Adicione arquivos dos alunos na pasta gabaritos (qualquer nome exceto gabarito.*)")
         return []
     
-    print(f"✅ Encontrados {len(arquivos_alunos)} alunos para processar:")
+    log.info(f"✅ Encontrados {len(arquivos_alunos)} alunos para processar:")
     for i, aluno in enumerate(arquivos_alunos, 1):
-        print(f"   {i:02d}. {aluno}")
+        log.info(f"   {i:02d}. {aluno}")
     
     # ===========================================
     # CONFIGURAR GEMINI
@@ -5211,39 +6277,39 @@ def processar_pasta_gabaritos_sem_sheets(diretorio: str = "./gabaritos", usar_ge
     model_gemini = None
     if usar_gemini:
         try:
-            model_gemini = configurar_gemini()
+            model_gemini = obter_gemini()
         except Exception as e:
-            print(f"❌ Erro ao configurar Gemini: {e}")
+            log.info(f"❌ Erro ao configurar Gemini: {e}")
             usar_gemini = False
     
     # ===========================================
     # PROCESSAR GABARITO (UMA VEZ APENAS)
     # ===========================================
     
-    print(f"\n{'='*60}")
-    print("📋 PROCESSANDO GABARITO")
-    print(f"{'='*60}")
+    log.info(f"\n{'='*60}")
+    log.info("📋 PROCESSANDO GABARITO")
+    log.info(f"{'='*60}")
     
     try:
-        # Preprocessar gabarito
+        # Preprocessar e detectar gabarito (44 ou 52 questões), com cache em
+        # disco indexado pelo hash do arquivo
         gabarito_path = os.path.join(diretorio_gabaritos, gabarito_file)
-        gabarito_img = preprocessar_arquivo(gabarito_path, "gabarito", debug=debug_mode)
-        
-        # Detectar respostas do gabarito usando o tipo específico (44 ou 52 questões)
-        respostas_gabarito = detectar_respostas_por_tipo(gabarito_img, num_questoes=num_questoes, debug=debug_mode, eh_gabarito=True)
+        respostas_gabarito = ler_gabarito_com_cache(
+            gabarito_path, num_questoes=num_questoes, debug=debug_mode, deteccao_pdf=deteccao_pdf_gabarito
+        )
         
         questoes_gabarito = sum(1 for r in respostas_gabarito if r != '?')
         num_questoes_detectadas = len(respostas_gabarito)
-        print(f"✅ Gabarito processado: {questoes_gabarito}/{num_questoes_detectadas} questões detectadas")
+        log.info(f"✅ Gabarito processado: {questoes_gabarito}/{num_questoes_detectadas} questões detectadas")
         
         # Exibir gabarito em formato simples
         exibir_gabarito_simples(respostas_gabarito)
         
         if questoes_gabarito < 40:
-            print("⚠️ ATENÇÃO: Poucas questões detectadas no gabarito.")
+            log.info("⚠️ ATENÇÃO: Poucas questões detectadas no gabarito.")
         
     except Exception as e:
-        print(f"❌ ERRO CRÍTICO ao processar gabarito: {e}")
+        log.info(f"❌ ERRO CRÍTICO ao processar gabarito: {e}")
         return []
     
     # ===========================================
@@ -5252,118 +6318,98 @@ def processar_pasta_gabaritos_sem_sheets(diretorio: str = "./gabaritos", usar_ge
     
     resultados_lote = []
     
-    print(f"\n{'='*60}")
-    print(f"👥 PROCESSANDO {len(arquivos_alunos)} ALUNOS")
-    print(f"{'='*60}")
-    
-    for i, aluno_file in enumerate(arquivos_alunos, 1):
-        print(f"\n🔄 [{i:02d}/{len(arquivos_alunos)}] Processando: {aluno_file}")
-        print("-" * 50)
-        
+    log.info(f"\n{'='*60}")
+    log.info(f"👥 PROCESSANDO {len(arquivos_alunos)} ALUNOS")
+    log.info(f"{'='*60}")
+    
+    # Cache de resultados: alunos cujo cartão e gabarito não mudaram desde a
+    # última execução não são reprocessados (a menos que forçado). A chave
+    # inclui a origem do cabeçalho: um lote sem Gemini ("Aluno N") não é
+    # reaproveitado por um lote com Gemini
+    if forcar is None:
+        forcar = FORCAR_REPROCESSAMENTO
+    usar_gemini = bool(usar_gemini and model_gemini)
+    caminho_cache = os.path.join(diretorio_gabaritos, ".cache", ARQUIVO_CACHE_RESULTADOS)
+    hash_gabarito = (
+        f"{_hash_arquivo(gabarito_path)}_{num_questoes}_{'p' if PERSPECTIVA_HABILITADA else 'np'}"
+        f"{'_pdf' if deteccao_pdf_alunos else ''}"
+    )
+    origem_cabecalho = "gemini" if usar_gemini else "padrao"
+    
+    def _chave_cache(aluno_file):
+        hash_cartao = _hash_arquivo(os.path.join(diretorio_gabaritos, aluno_file))
+        return (aluno_file, hash_cartao, hash_gabarito, origem_cabecalho)
+    
+    # Com --force o cache nem é consultado: o hash de cada cartão só é
+    # calculado depois da correção, ao regravar o resultado
+    resultados_em_cache = {}
+    cache_resultados = {} if forcar else carregar_cache_resultados(caminho_cache)
+    if cache_resultados:
+        for i, aluno_file in enumerate(arquivos_alunos, 1):
+            resultado_cache = cache_resultados.get(_chave_cache(aluno_file))
+            if resultado_cache is not None:
+                resultados_em_cache[i] = resultado_cache
+    if resultados_em_cache:
+        log.info(f"♻️ {len(resultados_em_cache)} aluno(s) inalterado(s) - reaproveitando resultados em cache")
+    
+    # Envios ao Google Sheets em segundo plano: cada aluno é enviado assim que
+    # _iter_resultados o produz, sobrepondo a E/S de rede com o OMR e os
+    # cabeçalhos dos demais
+    sheets_executor = None
+    envios_sheets = []
+    if enviar_sheets:
         try:
-            # Preprocessar arquivo do aluno
-            aluno_path = os.path.join(diretorio_gabaritos, aluno_file)
-            aluno_img = preprocessar_arquivo(aluno_path, f"aluno_{i}", debug=debug_mode)
-            
-            # Extrair dados do cabeçalho (opcional com Gemini)
-            dados_aluno = {
-                "Aluno": f"Aluno {i}",
-                "Escola": "N/A",
-                "Nascimento": "N/A", 
-                "Turma": "N/A"
-            }
-            
-            if usar_gemini and model_gemini:
-                try:
-                    dados_extraidos = extrair_cabecalho_com_fallback(model_gemini, aluno_img, numero_aluno=i)
-                    if dados_extraidos:
-                        # Mapear chaves minúsculas do Gemini para maiúsculas do sistema
-                        mapeamento = {
-                            "escola": "Escola",
-                            "aluno": "Aluno", 
-                            "turma": "Turma",
-                            "nascimento": "Nascimento"
-                        }
-                        
-                        # Atualizar dados com mapeamento correto
-                        for chave_gemini, chave_sistema in mapeamento.items():
-                            if chave_gemini in dados_extraidos and dados_extraidos[chave_gemini] and dados_extraidos[chave_gemini] != "N/A":
-                                dados_aluno[chave_sistema] = dados_extraidos[chave_gemini]
-                        
-                        print(f"✅ Dados extraídos: {dados_aluno['Aluno']} ({dados_aluno['Escola']})")
-                except Exception as e:
-                    print(f"⚠️ Gemini falhou, usando numeração automática")
-            
-            # Detectar respostas do aluno usando o tipo específico (44 ou 52 questões)
-            respostas_aluno = detectar_respostas_por_tipo(aluno_img, num_questoes=num_questoes, debug=debug_mode)
-            
-            questoes_aluno = sum(1 for r in respostas_aluno if r != '?')
-            num_questoes_aluno = len(respostas_aluno)
-            print(f"✅ Respostas processadas: {questoes_aluno}/{num_questoes_aluno} questões detectadas")
-            
-            # Calcular resultado
-            resultado = comparar_respostas(respostas_gabarito, respostas_aluno)
-            
-            # Exibir resumo formatado
-            print(f"\n{'─'*60}")
-            print(f"👤 {dados_aluno['Aluno']}")
-            print(f"📚 Turma: {dados_aluno['Turma']} | Escola: {dados_aluno['Escola']}")
-            print(f"✅ Acertos: {resultado['acertos']}")
-            print(f"❌ Erros: {resultado['erros']}")
-            print(f"📊 Percentual: {resultado['percentual']:.1f}%")
-            
-            # Exibir respostas do aluno
-            print(f"\n📝 Respostas:")
-            exibir_gabarito_simples(respostas_aluno)
-            print(f"{'─'*60}")
-            
-            # Armazenar resultado com dados completos
-            resultado_completo = {
-                "arquivo": aluno_file,
-                "dados_completos": dados_aluno,  # Dados completos do cabeçalho
-                "acertos": resultado['acertos'],
-                "acertos_portugues": resultado.get('acertos_portugues', 0),
-                "acertos_matematica": resultado.get('acertos_matematica', 0),
-                "total": resultado['total'],
-                "percentual": resultado['percentual'],
-                "questoes_detectadas": questoes_aluno
-            }
-            resultados_lote.append(resultado_completo)
-            
+            client_sheets = obter_google_sheets()
+            if client_sheets:
+                sheets_executor = ThreadPoolExecutor(max_workers=MAX_ENVIOS_SHEETS_SIMULTANEOS)
+            else:
+                log.info("❌ Não foi possível conectar ao Google Sheets")
         except Exception as e:
-            print(f"❌ ERRO ao processar {aluno_file}: {e}")
-            resultado_erro = {
-                "arquivo": aluno_file,
-                "dados_completos": {
-                    "Aluno": f"Aluno {i}",
-                    "Escola": "N/A",
-                    "Nascimento": "N/A",
-                    "Turma": "N/A"
-                },
-                "acertos": 0,
-                "acertos_portugues": 0,
-                "acertos_matematica": 0,
-                "total": 52,
-                "percentual": 0.0,
-                "questoes_detectadas": 0,
-                "erro": str(e)
-            }
-            resultados_lote.append(resultado_erro)
+            log.info(f"⚠️ Erro ao conectar ao Sheets: {e}")
+    
+    # Cada resultado é repassado ao Sheets e ao cache assim que produzido;
+    # uma interrupção no meio do lote perde apenas os alunos ainda no OMR ou
+    # à espera do seu lote de cabeçalhos
+    resultados = _iter_resultados(
+        diretorio_gabaritos, arquivos_alunos, respostas_gabarito, num_questoes, debug_mode,
+        model_gemini=model_gemini if usar_gemini else None,
+        resultados_em_cache=resultados_em_cache,
+        deteccao_pdf=deteccao_pdf_alunos,
+    )
+    try:
+        for i, resultado_completo, reaproveitado, cabecalho_lido in resultados:
+            resultados_lote.append(resultado_completo)
+            if "erro" in resultado_completo:
+                continue
+            if sheets_executor:
+                envios_sheets.append(sheets_executor.submit(_enviar_resultado_lote_planilha, client_sheets, resultado_completo))
+            # Com Gemini, cabeçalho que caiu no padrão ("Aluno N") fica fora do
+            # cache: a próxima execução tenta lê-lo de novo
+            if not reaproveitado and (cabecalho_lido or not usar_gemini):
+                registrar_cache_resultado(caminho_cache, _chave_cache(arquivos_alunos[i - 1]), resultado_completo)
+    except BaseException:
+        # Interrompido no meio do lote: concluir os envios já iniciados
+        if sheets_executor:
+            log.info(f"\n📤 Concluindo {len(envios_sheets)} envio(s) já iniciado(s) para o Google Sheets...")
+            sheets_executor.shutdown(wait=True)
+        raise
     
     # ===========================================
     # RELATÓRIO FINAL SIMPLIFICADO
     # ===========================================
     
-    print(f"\n{'='*60}")
-    print("📊 RELATÓRIO FINAL")
-    print(f"{'='*60}")
+    log.info(f"\n{'='*60}")
+    log.info("📊 RELATÓRIO FINAL")
+    log.info(f"{'='*60}")
     
     if resultados_lote:
-        print(f"\n=== RESULTADOS DETALHADOS (ORDEM ALFABÉTICA) ===")
+        log.info(f"\n=== TOTAL DE ALUNOS: {len(resultados_lote)} + RESULTADOS ===")
         
         # Ordenar por nome do aluno (ordem alfabética)
-        resultados_ordenados = sorted(resultados_lote, key=lambda x: x["dados_completos"]["Aluno"].lower())
+        resultados_ordenados = ordenar_por_nome_aluno(resultados_lote)
         
+        # Válidos separados na mesma passada da listagem (sem refiltrar o lote)
+        resultados_validos = []
         for i, r in enumerate(resultados_ordenados, 1):
             dados = r["dados_completos"]
             nome = dados["Aluno"]
@@ -5372,34 +6418,82 @@ def processar_pasta_gabaritos_sem_sheets(diretorio: str = "./gabaritos", usar_ge
             turma = dados["Turma"]
             acertos = r["acertos"]
             
-            status = "❌" if "erro" in r else "✅"
+            if "erro" in r:
+                status = "❌"
+            else:
+                status = "✅"
+                resultados_validos.append(r)
             
             # Formato: aluno X (nome completo, escola, nascimento, turma) - acertou Y questões
-            print(f"{status} aluno {i} ({nome}, {escola}, {nascimento}, {turma}) - acertou {acertos} questões")
+            log.info(f"{status} aluno {i} ({nome}, {escola}, {nascimento}, {turma}) - acertou {acertos} questões")
         
         # Estatísticas
-        resultados_validos = [r for r in resultados_lote if "erro" not in r]
         if resultados_validos:
-            acertos = [r["acertos"] for r in resultados_validos]
-            percentuais = [r["percentual"] for r in resultados_validos]
-            anuladas_total = sum([r.get("anuladas", 0) for r in resultados_validos])
-            
-            print(f"\n=== ESTATÍSTICAS ===")
-            print(f"Alunos processados: {len(resultados_validos)}/{len(arquivos_alunos)}")
-            print(f"Média de acertos: {sum(acertos)/len(acertos):.1f}/52 questões")
-            print(f"Média percentual: {sum(percentuais)/len(percentuais):.1f}%")
-            if anuladas_total > 0:
-                print(f"⊘ Total de questões anuladas no lote: {anuladas_total}")
+            exibir_estatisticas_lote(resultados_validos, len(arquivos_alunos), num_questoes)
     
     # ===========================================
-    # NÃO ENVIAR PARA GOOGLE SHEETS (PROBLEMA DE COTA)
+    # AGUARDAR ENVIOS AO GOOGLE SHEETS
     # ===========================================
     
-    print(f"\n📄 Google Sheets DESABILITADO (evitando problema de cota do Drive)")
-    print(f"💡 Todos os resultados foram exibidos acima")
+    if sheets_executor:
+        log.info(f"\n📤 Aguardando envios para Google Sheets...")
+        wait(envios_sheets)
+        sheets_executor.shutdown()
+        sucessos = sum(1 for futuro in envios_sheets if futuro.result())
+        log.info(f"✅ {sucessos}/{len(envios_sheets)} resultados enviados!")
+    elif not enviar_sheets:
+        log.info(f"\n📄 Google Sheets DESABILITADO (evitando problema de cota do Drive)")
+        log.info(f"💡 Todos os resultados foram exibidos acima")
     
     return resultados_lote
 
+def processar_pasta_gabaritos(diretorio: str = "./gabaritos", usar_gemini: bool = True, debug_mode: bool = False, num_questoes: int = 52, forcar: Optional[bool] = None):
+    """
+    Corrige a pasta (gabarito = arquivo "gabarito.*") e envia para o Google Sheets.
+    
+    Args:
+        diretorio: Caminho da pasta contendo gabarito e cartões dos alunos
+        usar_gemini: Se deve usar Gemini para cabeçalho
+        debug_mode: Se deve mostrar debug detalhado
+        num_questoes: Tipo de cartão (44 ou 52 questões)
+        forcar: Ignora o cache de resultados (padrão: --force)
+    """
+    return _processar_core(diretorio, usar_gemini, debug_mode, num_questoes,
+                           enviar_sheets=True, gabarito_selector=_gabarito_por_prefixo, forcar=forcar,
+                           deteccao_pdf_alunos=True)
+
+def processar_lote_alunos(diretorio=".", usar_gemini=True, debug_mode=False, num_questoes=52):
+    """
+    Processa múltiplos cartões de alunos em lote
+    
+    Args:
+        diretorio: Diretório contendo os arquivos
+        usar_gemini: Se deve usar Gemini para cabeçalho
+        debug_mode: Se deve mostrar debug detalhado
+        num_questoes: Tipo de cartão (44 ou 52 questões)
+        
+    Returns:
+        Lista de resultados de cada aluno processado
+    """
+    return _processar_core(diretorio, usar_gemini, debug_mode, num_questoes,
+                           enviar_sheets=False, gabarito_selector=_gabarito_por_candidatos,
+                           titulo="LOTE DE ALUNOS", deteccao_pdf_gabarito=True)
+
+def processar_pasta_gabaritos_sem_sheets(diretorio: str = "./gabaritos", usar_gemini: bool = True, debug_mode: bool = False, num_questoes: int = 52):
+    """
+    Versão da função que NÃO tenta enviar para Google Sheets
+    (evita problema de cota do Drive)
+    
+    Args:
+        diretorio: Caminho da pasta contendo gabarito e cartões dos alunos
+        usar_gemini: Se deve usar Gemini para cabeçalho
+        debug_mode: Se deve mostrar debug detalhado
+        num_questoes: Tipo de cartão (44 ou 52 questões)
+    """
+    return _processar_core(diretorio, usar_gemini, debug_mode, num_questoes,
+                           enviar_sheets=False, gabarito_selector=_gabarito_por_prefixo,
+                           titulo="PASTA GABARITOS (SEM GOOGLE SHEETS)")
+
 def processar_pasta_gabaritos_com_sheets(
     diretorio: str = "./gabaritos",
     usar_gemini: bool = True,
@@ -5415,75 +6509,67 @@ def processar_pasta_gabaritos_com_sheets(
         debug_mode: Se deve mostrar debug detalhado
         num_questoes: Tipo de cartão (44 ou 52 questões)
     """
-    import time
-    
-    print("🚀 SISTEMA DE CORREÇÃO - PASTA GABARITOS (COM GOOGLE SHEETS)")
-    print("=" * 60)
+    log.info("🚀 SISTEMA DE CORREÇÃO - PASTA GABARITOS (COM GOOGLE SHEETS)")
+    log.info("=" * 60)
     
     diretorio_gabaritos = diretorio
     
     if not os.path.exists(diretorio_gabaritos):
-        print(f"❌ ERRO: Pasta '{diretorio_gabaritos}' não encontrada!")
-        print("💡 Crie a pasta informada e adicione os arquivos do gabarito e dos alunos")
+        log.info(f"❌ ERRO: Pasta '{diretorio_gabaritos}' não encontrada!")
+        log.info("💡 Crie a pasta informada e adicione os arquivos do gabarito e dos alunos")
         return []
     
     # Configurar suporte a PDF se disponível
     if PDF_PROCESSOR_AVAILABLE:
-        print("\n🔧 Configurando suporte a PDF...")
+        log.info("\n🔧 Configurando suporte a PDF...")
         pdf_ok = setup_pdf_support()
         if not pdf_ok:
-            print("⚠️ Suporte a PDF limitado - apenas imagens serão processadas")
+            log.info("⚠️ Suporte a PDF limitado - apenas imagens serão processadas")
     
     # Listar arquivos suportados na pasta gabaritos
-    print(f"\n📁 Analisando arquivos na pasta: {os.path.abspath(diretorio_gabaritos)}")
+    log.info(f"\n📁 Analisando arquivos na pasta: {os.path.abspath(diretorio_gabaritos)}")
     arquivos = listar_arquivos_suportados(diretorio_gabaritos)
     
     if not arquivos['todos']:
-        print("❌ Nenhum arquivo suportado encontrado na pasta gabaritos!")
-        print("💡 Formatos suportados: PDF, PNG, JPG, JPEG, BMP, TIFF")
+        log.info("❌ Nenhum arquivo suportado encontrado na pasta gabaritos!")
+        log.info("💡 Formatos suportados: PDF, PNG, JPG, JPEG, BMP, TIFF")
         return []
     
-    print(f"✅ Encontrados {len(arquivos['todos'])} arquivos:")
+    log.info(f"✅ Encontrados {len(arquivos['todos'])} arquivos:")
     for arquivo in arquivos['todos']:
-        print(f"   📄 {arquivo}")
+        log.info(f"   📄 {arquivo}")
     
     # ===========================================
     # IDENTIFICAR GABARITO (LÓGICA SIMPLIFICADA)
     # ===========================================
     
-    print("\n📋 Identificando arquivo de gabarito...")
-    gabarito_file = None
+    log.info("\n📋 Identificando arquivo de gabarito...")
     
-    # Buscar por qualquer arquivo que comece com "gabarito" (case insensitive)
-    for arquivo in arquivos['todos']:
-        if arquivo.lower().startswith('gabarito'):
-            gabarito_file = arquivo
-            break
+    # Gabarito (primeiro arquivo que começa com "gabarito", case insensitive)
+    # e alunos (TODOS os demais) separados na mesma passada
+    gabarito_file, arquivos_alunos = _gabarito_por_prefixo(arquivos['todos'])
     
     if not gabarito_file:
-        print("❌ ERRO: Nenhum arquivo 'gabarito.*' encontrado!")
-        print("💡 Renomeie o arquivo do gabarito para: gabarito.png, gabarito.pdf, etc.")
+        log.info("❌ ERRO: Nenhum arquivo 'gabarito.*' encontrado!")
+        log.info("💡 Renomeie o arquivo do gabarito para: gabarito.png, gabarito.pdf, etc.")
         return []
     
-    print(f"✅ Gabarito identificado: {gabarito_file}")
+    log.info(f"✅ Gabarito identificado: {gabarito_file}")
     
     # ===========================================
     # IDENTIFICAR ARQUIVOS DOS ALUNOS (LÓGICA SIMPLIFICADA)
     # ===========================================
     
-    print("\n👥 Identificando arquivos dos alunos...")
-    
-    # TODOS os arquivos que NÃO começam com "gabarito" são alunos
-    arquivos_alunos = [f for f in arquivos['todos'] if not f.lower().startswith('gabarito')]
+    log.info("\n👥 Identificando arquivos dos alunos...")
     
     if not arquivos_alunos:
-        print("❌ ERRO: Nenhum arquivo de aluno encontrado!")
-        print("💡 Adicione arquivos dos alunos na pasta gabaritos (qualquer nome exceto gabarito.*)")
+        log.info("❌ ERRO: Nenhum arquivo de aluno encontrado!")
+        log.info("💡 Adicione arquivos dos alunos na pasta gabaritos (qualquer nome exceto gabarito.*)")
         return []
     
-    print(f"✅ Encontrados {len(arquivos_alunos)} alunos para processar:")
+    log.info(f"✅ Encontrados {len(arquivos_alunos)} alunos para processar:")
     for i, aluno in enumerate(arquivos_alunos, 1):
-        print(f"   {i:02d}. {aluno}")
+        log.info(f"   {i:02d}. {aluno}")
     
     # ===========================================
     # CONFIGURAR GEMINI
@@ -5491,35 +6577,35 @@ def processar_pasta_gabaritos_com_sheets(
     
     model_gemini = None
     if usar_gemini:
-        print("\n🤖 Configurando Gemini...")
+        log.info("\n🤖 Configurando Gemini...")
         try:
-            model_gemini = configurar_gemini()
-            print("✅ Gemini configurado!")
+            model_gemini = obter_gemini()
+            log.info("✅ Gemini configurado!")
         except Exception as e:
-            print(f"❌ Erro ao configurar Gemini: {e}")
+            log.info(f"❌ Erro ao configurar Gemini: {e}")
             usar_gemini = False
     
     # ===========================================
     # CONFIGURAR GOOGLE SHEETS COM RATE LIMITING
     # ===========================================
     try:
-        client = configurar_google_sheets()
+        client = obter_google_sheets()
         if client:
             PLANILHA_ID = "1VJ0_w9eoQcc-ouBnRoq5lFQdR2fVZkqEtR-KArZMuvk"
         else:
-            print("❌ Erro ao configurar Google Sheets - continuando sem envio")
+            log.info("❌ Erro ao configurar Google Sheets - continuando sem envio")
             client = None
     except Exception as e:
-        print(f"❌ Erro ao configurar Google Sheets: {e}")
+        log.info(f"❌ Erro ao configurar Google Sheets: {e}")
         client = None
     
     # ===========================================
     # PROCESSAR GABARITO (UMA VEZ APENAS)
     # ===========================================
     
-    print(f"\n{'='*60}")
-    print("📋 PROCESSANDO GABARITO")
-    print(f"{'='*60}")
+    log.info(f"\n{'='*60}")
+    log.info("📋 PROCESSANDO GABARITO")
+    log.info(f"{'='*60}")
     
     try:
         # Preprocessar gabarito
@@ -5531,16 +6617,16 @@ def processar_pasta_gabaritos_com_sheets(
         
         questoes_gabarito = sum(1 for r in respostas_gabarito if r != '?')
         num_questoes_detectadas = len(respostas_gabarito)
-        print(f"✅ Gabarito processado: {questoes_gabarito}/{num_questoes_detectadas} questões detectadas")
+        log.info(f"✅ Gabarito processado: {questoes_gabarito}/{num_questoes_detectadas} questões detectadas")
         
         # Exibir gabarito em formato simples
         exibir_gabarito_simples(respostas_gabarito)
         
         if questoes_gabarito < 40:
-            print("⚠️ ATENÇÃO: Poucas questões detectadas no gabarito.")
+            log.info("⚠️ ATENÇÃO: Poucas questões detectadas no gabarito.")
         
     except Exception as e:
-        print(f"❌ ERRO CRÍTICO ao processar gabarito: {e}")
+        log.info(f"❌ ERRO CRÍTICO ao processar gabarito: {e}")
         return []
     
     # ===========================================
@@ -5548,72 +6634,87 @@ def processar_pasta_gabaritos_com_sheets(
     # ===========================================
     
     resultados_lote = []
-    alunos_enviados_sheets = 0
+    linhas_pendentes = []
+    
+    log.info(f"\n{'='*60}")
+    log.info(f"👥 PROCESSANDO {len(arquivos_alunos)} ALUNOS")
+    log.info(f"{'='*60}")
+    
+    # Pré-processamento + OMR (CPU) de todos os cartões em paralelo, um
+    # processo por núcleo; Gemini e Sheets continuam no processo principal,
+    # na ordem original, enquanto os próximos cartões são lidos
+    executor = ProcessPoolExecutor(max_workers=_num_workers(len(arquivos_alunos)))
+    futuros_omr = [
+        executor.submit(
+            _ler_respostas_cartao,
+            os.path.join(diretorio_gabaritos, aluno_file),
+            i,
+            num_questoes,
+            debug_mode,
+            PERSPECTIVA_HABILITADA,
+        )
+        for i, aluno_file in enumerate(arquivos_alunos, 1)
+    ]
     
-    print(f"\n{'='*60}")
-    print(f"👥 PROCESSANDO {len(arquivos_alunos)} ALUNOS")
-    print(f"{'='*60}")
+    # Cabeçalhos (rede) em threads, cada um assim que seu cartão sai do
+    # pré-processamento, sobrepostos ao OMR (CPU) dos demais cartões
+    cabecalho_executor = None
+    futuros_cabecalho = []
+    if usar_gemini and model_gemini:
+        cabecalho_executor = ThreadPoolExecutor(max_workers=MAX_CABECALHOS_SIMULTANEOS)
+        futuros_cabecalho = [
+            cabecalho_executor.submit(_cabecalho_apos_omr, model_gemini, futuro_omr, i)
+            for i, futuro_omr in enumerate(futuros_omr, 1)
+        ]
     
     for i, aluno_file in enumerate(arquivos_alunos, 1):
-        print(f"\n🔄 [{i:02d}/{len(arquivos_alunos)}] Processando: {aluno_file}")
-        print("-" * 50)
+        log.info(f"\n🔄 [{i:02d}/{len(arquivos_alunos)}] Processando: {aluno_file}")
+        log.info(_SEPARADOR_ALUNO)
         
         try:
-            # Preprocessar arquivo do aluno
-            aluno_path = os.path.join(diretorio_gabaritos, aluno_file)
-            aluno_img = preprocessar_arquivo(aluno_path, f"aluno_{i}", debug=debug_mode)
+            # Preprocessamento e detecção feitos no pool de processos
+            aluno_img, respostas_aluno = futuros_omr[i - 1].result()
             
             # Extrair dados do cabeçalho (opcional com Gemini)
-            dados_aluno = {
-                "Aluno": f"Aluno {i}",
-                "Escola": "N/A",
-                "Nascimento": "N/A", 
-                "Turma": "N/A"
-            }
+            dados_aluno = _dados_aluno_com_cabecalho(i, None)
             
             if usar_gemini and model_gemini:
                 try:
-                    dados_extraidos = extrair_cabecalho_com_fallback(model_gemini, aluno_img, numero_aluno=i)
+                    dados_extraidos = futuros_cabecalho[i - 1].result()
                     if dados_extraidos:
                         # Mapear chaves minúsculas do Gemini para maiúsculas do sistema
-                        mapeamento = {
-                            "escola": "Escola",
-                            "aluno": "Aluno", 
-                            "turma": "Turma",
-                            "nascimento": "Nascimento"
-                        }
-                        
-                        # Atualizar dados com mapeamento correto
-                        for chave_gemini, chave_sistema in mapeamento.items():
-                            if chave_gemini in dados_extraidos and dados_extraidos[chave_gemini] and dados_extraidos[chave_gemini] != "N/A":
-                                dados_aluno[chave_sistema] = dados_extraidos[chave_gemini]
-                        
-                        print(f"✅ Dados extraídos: {dados_aluno['Aluno']} ({dados_aluno['Escola']})")
+                        dados_aluno = _dados_aluno_com_cabecalho(i, dados_extraidos)
+                        log.info(f"✅ Dados extraídos: {dados_aluno['Aluno']} ({dados_aluno['Escola']})")
                 except Exception as e:
-                    print(f"⚠️ Gemini falhou, usando numeração automática")
-            
-            # Detectar respostas do aluno usando o tipo específico (44 ou 52 questões)
-            respostas_aluno = detectar_respostas_por_tipo(aluno_img, num_questoes=num_questoes, debug=debug_mode)
+                    log.info(f"⚠️ Gemini falhou, usando numeração automática")
             
             questoes_aluno = sum(1 for r in respostas_aluno if r != '?')
             num_questoes_aluno = len(respostas_aluno)
-            print(f"✅ Respostas processadas: {questoes_aluno}/{num_questoes_aluno} questões detectadas")
+            log.info(f"✅ Respostas processadas: {questoes_aluno}/{num_questoes_aluno} questões detectadas")
+            
+            # Detecção falhou: não comparar nem enviar ao Google Sheets
+            if deteccao_insuficiente(questoes_aluno, num_questoes):
+                log.info(f"❌ Poucas questões detectadas ({questoes_aluno}/{num_questoes}) - cartão ignorado")
+                resultados_lote.append(_resultado_com_erro(
+                    aluno_file, i, f"Poucas questões detectadas ({questoes_aluno}/{num_questoes})", questoes_aluno
+                ))
+                continue
             
             # Calcular resultado
             resultado = comparar_respostas(respostas_gabarito, respostas_aluno)
             
             # Exibir resumo formatado
-            print(f"\n{'─'*60}")
-            print(f"👤 {dados_aluno['Aluno']}")
-            print(f"📚 Turma: {dados_aluno['Turma']} | Escola: {dados_aluno['Escola']}")
-            print(f"✅ Acertos: {resultado['acertos']}")
-            print(f"❌ Erros: {resultado['erros']}")
-            print(f"📊 Percentual: {resultado['percentual']:.1f}%")
+            log.info(f"\n{_SEPARADOR_RESUMO}")
+            log.info(f"👤 {dados_aluno['Aluno']}")
+            log.info(f"📚 Turma: {dados_aluno['Turma']} | Escola: {dados_aluno['Escola']}")
+            log.info(f"✅ Acertos: {resultado['acertos']}")
+            log.info(f"❌ Erros: {resultado['erros']}")
+            log.info(f"📊 Percentual: {resultado['percentual']:.1f}%")
             
             # Exibir respostas do aluno
-            print(f"\n📝 Respostas:")
+            log.info(f"\n📝 Respostas:")
             exibir_gabarito_simples(respostas_aluno)
-            print(f"{'─'*60}")
+            log.info(_SEPARADOR_RESUMO)
             
             # Armazenar resultado com dados completos
             resultado_completo = {
@@ -5628,64 +6729,35 @@ def processar_pasta_gabaritos_com_sheets(
             }
             resultados_lote.append(resultado_completo)
             
-            # ===========================================
-            # ENVIAR PARA GOOGLE SHEETS COM RATE LIMITING
-            # ===========================================
-            
+            # Linha guardada para o envio único ao Google Sheets no fim do lote
             if client:
-                try:
-                    print(f"📤 Enviando para Google Sheets (aluno {i}/{len(arquivos_alunos)})...")
-                    
-                    # RATE LIMITING: Aguardar entre envios para evitar quota
-                    if i > 1:  # Não aguardar no primeiro
-                        time.sleep(2)
-                    
-                    if enviar_para_planilha(client, dados_aluno, resultado, planilha_id=PLANILHA_ID, questoes_detectadas=questoes_aluno):
-                        alunos_enviados_sheets += 1
-                        print(f"✅ Enviado para Google Sheets ({alunos_enviados_sheets}/{len(arquivos_alunos)})")
-                    else:
-                        print("⚠️ Falha no envio para Google Sheets")
-                        
-                except Exception as e:
-                    print(f"❌ Erro ao enviar para Google Sheets: {e}")
-                    if "quota" in str(e).lower() or "rate" in str(e).lower():
-                        print("⚠️ Limite de quota atingido - aumentando delay...")
-                        time.sleep(5)  # Delay maior em caso de quota
+                linhas_pendentes.append(montar_linha_planilha(dados_aluno, resultado))
             
         except Exception as e:
-            print(f"❌ ERRO ao processar {aluno_file}: {e}")
-            resultado_erro = {
-                "arquivo": aluno_file,
-                "dados_completos": {
-                    "Aluno": f"Aluno {i}",
-                    "Escola": "N/A",
-                    "Nascimento": "N/A",
-                    "Turma": "N/A"
-                },
-                "acertos": 0,
-                "acertos_portugues": 0,
-                "acertos_matematica": 0,
-                "total": 52,
-                "percentual": 0.0,
-                "questoes_detectadas": 0,
-                "erro": str(e)
-            }
+            log.info(f"❌ ERRO ao processar {aluno_file}: {e}")
+            resultado_erro = _resultado_com_erro(aluno_file, i, str(e))
             resultados_lote.append(resultado_erro)
     
+    executor.shutdown()
+    if cabecalho_executor:
+        cabecalho_executor.shutdown()
+    
     # ===========================================
     # RELATÓRIO FINAL COM GOOGLE SHEETS
     # ===========================================
     
-    print(f"\n{'='*60}")
-    print("📊 RELATÓRIO FINAL")
-    print(f"{'='*60}")
+    log.info(f"\n{'='*60}")
+    log.info("📊 RELATÓRIO FINAL")
+    log.info(f"{'='*60}")
     
     if resultados_lote:
-        print(f"\n=== RESULTADOS DETALHADOS (ORDEM ALFABÉTICA) ===")
+        log.info(f"\n=== RESULTADOS DETALHADOS (ORDEM ALFABÉTICA) ===")
         
         # Ordenar por nome do aluno (ordem alfabética)
-        resultados_ordenados = sorted(resultados_lote, key=lambda x: x["dados_completos"]["Aluno"].lower())
+        resultados_ordenados = ordenar_por_nome_aluno(resultados_lote)
         
+        # Válidos separados na mesma passada da listagem (sem refiltrar o lote)
+        resultados_validos = []
         for i, r in enumerate(resultados_ordenados, 1):
             dados = r["dados_completos"]
             nome = dados["Aluno"]
@@ -5694,40 +6766,240 @@ def processar_pasta_gabaritos_com_sheets(
             turma = dados["Turma"]
             acertos = r["acertos"]
             
-            status = "❌" if "erro" in r else "✅"
+            if "erro" in r:
+                status = "❌"
+            else:
+                status = "✅"
+                resultados_validos.append(r)
             
             # Formato: aluno X (nome completo, escola, nascimento, turma) - acertou Y questões
-            print(f"{status} aluno {i} ({nome}, {escola}, {nascimento}, {turma}) - acertou {acertos} questões")
+            log.info(f"{status} aluno {i} ({nome}, {escola}, {nascimento}, {turma}) - acertou {acertos} questões")
+        
+        # Estatísticas
+        if resultados_validos:
+            exibir_estatisticas_lote(resultados_validos, len(arquivos_alunos), num_questoes)
+    
+    # ===========================================
+    # RELATÓRIO DO GOOGLE SHEETS
+    # ===========================================
+    
+    if client:
+        # Uma única requisição para todas as linhas do lote
+        log.info(f"\n📤 Enviando {len(linhas_pendentes)} resultado(s) para Google Sheets...")
+        alunos_enviados_sheets = enviar_linhas_para_planilha(client, linhas_pendentes, PLANILHA_ID)
+        log.info(f"✅ Alunos enviados com sucesso: {alunos_enviados_sheets}/{len(arquivos_alunos)}")
+        if alunos_enviados_sheets == len(arquivos_alunos):
+            pass
+        else:
+            log.info("⚠️ Alguns alunos podem não ter sido enviados devido a limites de quota")
+    else:
+        log.info(f"\n📊 Google Sheets não configurado - apenas resultados locais")
+    
+    return resultados_lote
+
+
+def _remover_se_existir(caminho: str) -> None:
+    """Remove o arquivo ignorando erros (já removido, em uso, sem permissão)."""
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass
+
+def _despejar_saida(saida: io.StringIO) -> None:
+    """Registra no log o texto acumulado (um único registro) e esvazia o buffer."""
+    texto = saida.getvalue()
+    if texto:
+        log.info(texto.rstrip("\n"))
+        saida.seek(0)
+        saida.truncate()
+
+# Verdadeiro só nos workers do pool de páginas de PDF (ver _iniciar_log_worker)
+_CAPTURAR_SAIDA_PAGINA = False
+
+def _iniciar_log_worker(fila_log: "multiprocessing.Queue") -> None:
+    """
+    Initializer do pool de processos: os registros do `log` no worker vão
+    para a fila, escrita por um único QueueListener no processo principal.
+    Também liga a captura do stdout da detecção (processar_pagina_cartao):
+    o worker tem uma única thread, então trocar o sys.stdout é seguro ali.
+    """
+    global _CAPTURAR_SAIDA_PAGINA
+    log.handlers[:] = [logging.handlers.QueueHandler(fila_log)]
+    _CAPTURAR_SAIDA_PAGINA = True
+
+def _converter_pagina_pb_no_lugar(tarefa: Tuple[str, int]) -> Optional[str]:
+    """
+    Converte uma página para P&B regravando o próprio arquivo. Função de
+    módulo (serializável) para o pool de processos.
+    
+    Args:
+        tarefa: (caminho da imagem da página, threshold)
+        
+    Returns:
+        Mensagem de erro, ou None se a página foi convertida
+    """
+    img_path, threshold = tarefa
+    try:
+        img = cv2.imread(img_path)
+        if img is None:
+            return f"Não foi possível carregar a imagem: {img_path}"
+        cv2.imwrite(img_path, converter_para_preto_e_branco_array(img, threshold))
+        return None
+    except Exception as e:
+        return str(e)
+
+def _converter_pagina_pb(img_path: str) -> Tuple[Optional[np.ndarray], str]:
+    """
+    Converte uma página para P&B em memória, sem regravar o arquivo.
+    
+    Returns:
+        (imagem P&B ou None se falhar, situação da conversão para exibição)
+    """
+    try:
+        img = cv2.imread(img_path)
+        if img is None:
+            # Se falhar, usar original
+            return None, "⚠️ (usando original)"
         
-        # Estatísticas
-        resultados_validos = [r for r in resultados_lote if "erro" not in r]
-        if resultados_validos:
-            acertos = [r["acertos"] for r in resultados_validos]
-            percentuais = [r["percentual"] for r in resultados_validos]
-            anuladas_total = sum([r.get("anuladas", 0) for r in resultados_validos])
-            
-            print(f"\n=== ESTATÍSTICAS ===")
-            print(f"Alunos processados: {len(resultados_validos)}/{len(arquivos_alunos)}")
-            print(f"Média de acertos: {sum(acertos)/len(acertos):.1f}/52 questões")
-            print(f"Média percentual: {sum(percentuais)/len(percentuais):.1f}%")
-            if anuladas_total > 0:
-                print(f"⊘ Total de questões anuladas no lote: {anuladas_total}")
+        return converter_para_preto_e_branco_array(img, threshold=180), "✅"  # Threshold padrão
     
-    # ===========================================
-    # RELATÓRIO DO GOOGLE SHEETS
-    # ===========================================
+    except Exception as e:
+        return None, f"❌ Erro: {e}"
+
+def processar_pagina_cartao(tarefa: dict) -> dict:
+    """
+    Processa uma página de cartão no pool de processos: converte para P&B em
+    memória e detecta as respostas. Função de módulo (serializável).
     
-    if client:
-        print(f"✅ Alunos enviados com sucesso: {alunos_enviados_sheets}/{len(arquivos_alunos)}")
-        if alunos_enviados_sheets == len(arquivos_alunos):
-            pass
-        else:
-            print("⚠️ Alguns alunos podem não ter sido enviados devido a limites de quota")
+    Args:
+        tarefa: {"pagina": caminho da imagem da página ou a página já
+            renderizada (np.ndarray), "nome": caminho usado nos logs/debug
+            quando a página é um array, "num_questoes": 44 ou 52}
+        
+    Returns:
+        {"situacao": situação da conversão P&B, "respostas": lista de
+        respostas (vazia se falhar), "erro": mensagem ou None}
+    """
+    pagina = tarefa["pagina"]
+    if isinstance(pagina, np.ndarray):
+        try:
+            img_pb, situacao = converter_para_preto_e_branco_array(pagina, threshold=180), "✅"
+        except Exception as e:
+            img_pb, situacao = None, f"❌ Erro: {e}"
     else:
-        print(f"\n📊 Google Sheets não configurado - apenas resultados locais")
+        img_pb, situacao = _converter_pagina_pb(pagina)
+    # Nos workers do pool, a saída da detecção é acumulada e enviada ao log
+    # num único registro, sem misturar com a das páginas processadas ao
+    # mesmo tempo. No processo principal (PDFs pequenos) não: lá pode haver
+    # outras threads, e redirect_stdout troca o sys.stdout de todas
+    saida = io.StringIO()
+    captura = contextlib.redirect_stdout(saida) if _CAPTURAR_SAIDA_PAGINA else contextlib.nullcontext()
+    try:
+        with captura:
+            respostas = detectar_respostas_por_tipo(
+                img_pb if img_pb is not None else pagina,
+                num_questoes=tarefa["num_questoes"],
+                debug=True,  # 🆕 Ativar debug para ver detecção das bolhas
+                nome_origem=tarefa.get("nome") or pagina,
+            )
+    except Exception as e:
+        return {"situacao": situacao, "respostas": [], "erro": str(e)}
+    finally:
+        _despejar_saida(saida)
+    return {"situacao": situacao, "respostas": respostas, "erro": None}
+
+def _liberar_vaga_ao_concluir(vagas: threading.Semaphore, futuros: list) -> None:
+    """Devolve a vaga da página quando todos os seus futuros (OMR, cabeçalho) terminam."""
+    restantes = [len(futuros)]
+    lock = threading.Lock()
     
-    return resultados_lote
+    def _concluido(_):
+        with lock:
+            restantes[0] -= 1
+            if restantes[0]:
+                return
+        vagas.release()
+    
+    for futuro in futuros:
+        futuro.add_done_callback(_concluido)
+
+def _encerrar_pools_pdf(executor, ouvinte_log, cabecalho_executor, cancelar: bool = False) -> None:
+    """
+    Encerra o pool de OMR, o QueueListener dos workers e o pool de
+    cabeçalhos (os que existirem). Com `cancelar`, descarta o que não começou.
+    """
+    if executor:
+        executor.shutdown(cancel_futures=cancelar)
+    if ouvinte_log:
+        ouvinte_log.stop()
+    if cabecalho_executor:
+        cabecalho_executor.shutdown(cancel_futures=cancelar)
+
+def _encerrar_enviadores_planilha(fila_sheets: "queue.Queue", enviadores: List[threading.Thread]) -> None:
+    """Manda um sinal de fim por thread enviadora e aguarda todas terminarem."""
+    for _ in enviadores:
+        fila_sheets.put(None)
+    for enviador in enviadores:
+        enviador.join()
+    enviadores.clear()
+
+def _renderizador_paginas(fila: "queue.Queue", gerar_paginas: Callable, erros: list) -> None:
+    """
+    Thread produtora: coloca na fila cada página assim que é renderizada e,
+    no fim, None. Se a renderização falhar, o erro vai para `erros`.
+    """
+    try:
+        for pagina in gerar_paginas():
+            fila.put(pagina)
+    except Exception as e:
+        erros.append(e)
+    finally:
+        fila.put(None)
 
+def _exibir_resumo_pdf(
+    pdf_path: str,
+    tabela_resultados: List[Tuple[int, int, float]],
+    total_paginas: int,
+    num_questoes: int,
+) -> None:
+    """
+    Resumo final do PDF: cartões processados e médias de acertos, erros e percentual.
+    
+    Args:
+        pdf_path: Caminho do PDF processado
+        tabela_resultados: Uma tupla (acertos, erros, percentual) por cartão processado
+        total_paginas: Páginas do PDF
+        num_questoes: Tipo de cartão (44 ou 52 questões)
+    """
+    log.info(f"\n{'='*80}")
+    log.info("📊 RESUMO DO PROCESSAMENTO")
+    # 🆕 RESUMO FINAL COMPACTO
+    log.info(f"\n{'='*80}")
+    log.info(f"📄 PDF: {os.path.basename(pdf_path)}")
+    log.info(f"{'='*80}")
+    log.info(f"📋 Total de páginas: {total_paginas}")
+    log.info(f"✅ Cartões processados: {len(tabela_resultados)}/{total_paginas}")
+    
+    if tabela_resultados:
+        # Médias por coluna (acertos, erros, percentual)
+        media_acertos, media_erros, media_percentual = np.array(
+            tabela_resultados, dtype=np.float64
+        ).mean(axis=0)
+        
+        log.info(f"\n📊 ESTATÍSTICAS:")
+        log.info(f"   Média de acertos: {media_acertos:.1f}/{num_questoes}")
+        log.info(f"   Média de erros: {media_erros:.1f}/{num_questoes}")
+        log.info(f"   Média geral: {media_percentual:.1f}%")
+    
+    log.info(f"{'='*80}")
+
+def _limpar_paginas_temporarias(caminhos: List[str]) -> None:
+    """Remove os PNG temporários das páginas (em paralelo, são só syscalls)."""
+    if not caminhos:
+        return
+    log.info(f"\n🧹 Limpando arquivos temporários...")
+    with ThreadPoolExecutor(max_workers=min(8, len(caminhos))) as limpeza:
+        list(limpeza.map(_remover_se_existir, caminhos))
 
 def processar_pdf_multiplas_paginas(
     pdf_path: str,
@@ -5736,14 +7008,15 @@ def processar_pdf_multiplas_paginas(
     debug_mode: bool = False,
     enviar_para_sheets: bool = True,
     mover_para_drive: bool = True,
-    pasta_destino_id: str = None
+    pasta_destino_id: str = None,
+    baixa_memoria: Optional[bool] = None
 ):
     """
     🆕 NOVA FUNÇÃO: Processa PDF com MÚLTIPLAS PÁGINAS de cartões resposta
     
     Workflow:
-    1. Converte TODAS as páginas do PDF para PNG
-    2. Processa CADA página como um cartão individual
+    1. Converte as páginas do PDF em imagens (em memória, em segundo plano)
+    2. Processa CADA página como um cartão individual, assim que é convertida
     3. Envia resultados para Google Sheets
     4. Move arquivo processado para pasta do Drive
     
@@ -5755,6 +7028,8 @@ def processar_pdf_multiplas_paginas(
         enviar_para_sheets: Se deve enviar para Google Sheets
         mover_para_drive: Se deve mover arquivo para pasta processada
         pasta_destino_id: ID da pasta de destino no Drive (5º ou 9º ano)
+        baixa_memoria: Grava as páginas em PNG temporários em vez de
+            mantê-las em memória (padrão: --low-memory)
         
     Returns:
         Lista de resultados de todos os cartões processados
@@ -5765,91 +7040,54 @@ def processar_pdf_multiplas_paginas(
         ...     num_questoes=52,
         ...     enviar_para_sheets=True
         ... )
-        >>> print(f"Processados {len(resultados)} cartões do PDF!")
+        >>> log.info(f"Processados {len(resultados)} cartões do PDF!")
     """
-    from pdf_processor_simple import process_pdf_all_pages
+    if baixa_memoria is None:
+        baixa_memoria = BAIXA_MEMORIA
     
-    print("=" * 80)
-    print("🚀 PROCESSAMENTO DE PDF COM MÚLTIPLAS PÁGINAS")
-    print("=" * 80)
+    log.info("=" * 80)
+    log.info("🚀 PROCESSAMENTO DE PDF COM MÚLTIPLAS PÁGINAS")
+    log.info("=" * 80)
     
     # Validar arquivo
     if not os.path.exists(pdf_path):
-        print(f"❌ Arquivo não encontrado: {pdf_path}")
+        log.info(f"❌ Arquivo não encontrado: {pdf_path}")
         return []
     
     if not pdf_path.lower().endswith('.pdf'):
-        print(f"❌ Arquivo não é PDF: {pdf_path}")
+        log.info(f"❌ Arquivo não é PDF: {pdf_path}")
         return []
     
     # Configurar Gemini se necessário
     model_gemini = None
     if usar_gemini:
         try:
-            model_gemini = configurar_gemini()
-            print("✅ Gemini configurado!")
+            model_gemini = obter_gemini()
+            log.info("✅ Gemini configurado!")
         except Exception as e:
-            print(f"⚠️ Erro ao configurar Gemini: {e}")
+            log.info(f"⚠️ Erro ao configurar Gemini: {e}")
             usar_gemini = False
     
     # Configurar Google Sheets se necessário
     client = None
     if enviar_para_sheets:
         try:
-            client = configurar_google_sheets()
-            print("✅ Google Sheets configurado!")
+            client = obter_google_sheets()
+            log.info("✅ Google Sheets configurado!")
         except Exception as e:
-            print(f"⚠️ Erro ao configurar Google Sheets: {e}")
+            log.info(f"⚠️ Erro ao configurar Google Sheets: {e}")
             enviar_para_sheets = False
     
+    # Pools, ouvinte de log e enviadores: encerrados no finally, também
+    # quando algo falha no meio do processamento
+    executor = None
+    ouvinte_log = None
+    cabecalho_executor = None
+    fila_sheets = None
+    enviadores_sheets = []
     try:
-        # 1️⃣ CONVERTER TODAS AS PÁGINAS PARA PNG
-        print(f"\n📄 Convertendo TODAS as páginas do PDF para PNG...")
-        imagens_paginas = process_pdf_all_pages(pdf_path, keep_temp_files=True)
-        
-        if not imagens_paginas:
-            print("❌ Nenhuma imagem foi gerada do PDF")
-            return []
-        
-        print(f"✅ {len(imagens_paginas)} páginas convertidas!")
-        
-        # 🆕 1.5️⃣ CONVERTER TODAS AS IMAGENS PARA PRETO E BRANCO
-        print(f"\n🎨 Convertendo imagens para Preto e Branco...")
-        imagens_pb = []
-        
-        for i, img_path in enumerate(imagens_paginas, 1):
-            try:
-                print(f"   [{i}/{len(imagens_paginas)}] Convertendo {os.path.basename(img_path)}...", end='')
-                
-                # Converter para P&B
-                img_pb_path = converter_para_preto_e_branco(
-                    img_path,
-                    threshold=180,  # Threshold padrão
-                    salvar=True
-                )
-                
-                if img_pb_path and os.path.exists(img_pb_path):
-                    # Substituir original pela versão P&B
-                    os.remove(img_path)
-                    os.rename(img_pb_path, img_path)
-                    imagens_pb.append(img_path)
-                    print(" ✅")
-                else:
-                    # Se falhar, usar original
-                    imagens_pb.append(img_path)
-                    print(" ⚠️ (usando original)")
-                    
-            except Exception as e:
-                print(f" ❌ Erro: {e}")
-                imagens_pb.append(img_path)  # Usar original se falhar
-        
-        print(f"✅ {len(imagens_pb)} imagens prontas para processamento")
-        
-        # Usar imagens P&B daqui em diante
-        imagens_paginas = imagens_pb
-        
-        # 2️⃣ BUSCAR GABARITO EM ARQUIVO SEPARADO (não no PDF)
-        print(f"\n📋 Buscando gabarito em arquivo separado...")
+        # 1️⃣ BUSCAR GABARITO EM ARQUIVO SEPARADO (não no PDF)
+        log.info(f"\n📋 Buscando gabarito em arquivo separado...")
         
         # O gabarito deve estar na mesma pasta do PDF (arquivo PNG/JPG com "gabarito" no nome)
         pasta_pdf = os.path.dirname(pdf_path)
@@ -5857,26 +7095,42 @@ def processar_pdf_multiplas_paginas(
         
         # Buscar arquivo de gabarito na pasta
         for arquivo in os.listdir(pasta_pdf):
-            if 'gabarito' in arquivo.lower() and arquivo.lower().endswith(('.png', '.jpg', '.jpeg')):
+            if RE_GABARITO.search(arquivo) and arquivo.lower().endswith(('.png', '.jpg', '.jpeg')):
                 gabarito_path = os.path.join(pasta_pdf, arquivo)
                 gabarito_img = gabarito_path
-                print(f"✅ Gabarito encontrado: {arquivo}")
+                log.info(f"✅ Gabarito encontrado: {arquivo}")
                 break
         
         if not gabarito_img:
-            print("❌ ERRO: Arquivo de gabarito não encontrado na pasta!")
-            print(f"   Procurei por arquivo PNG/JPG com 'gabarito' no nome em: {pasta_pdf}")
+            log.info("❌ ERRO: Arquivo de gabarito não encontrado na pasta!")
+            log.info(f"   Procurei por arquivo PNG/JPG com 'gabarito' no nome em: {pasta_pdf}")
             return []
         
-        # 🆕 TODAS as páginas do PDF são cartões de alunos
-        cartoes_alunos = imagens_paginas  # Todas as páginas são alunos!
-        
-        print(f"✅ Cartões de alunos no PDF: {len(cartoes_alunos)} páginas")
+        # 2️⃣ CONVERTER AS PÁGINAS (em segundo plano)
+        # Uma thread renderiza as páginas enquanto o gabarito e o OMR das
+        # páginas anteriores são processados; a fila de 2 posições é o
+        # buffer duplo entre renderização e OMR. As páginas ficam em memória
+        # (sem PNG temporário), com os nomes <pdf>_page_<n>.png nos logs e
+        # no debug. Em baixa memória, volta aos PNG em disco
+        if baixa_memoria:
+            log.info(f"\n📄 Convertendo TODAS as páginas do PDF para PNG...")
+            gerar_paginas = lambda: process_pdf_all_pages(pdf_path, keep_temp_files=True)
+        else:
+            log.info(f"\n📄 Convertendo as páginas do PDF em memória...")
+            gerar_paginas = lambda: stream_pdf_pages(pdf_path)
+        fila_paginas = queue.Queue(maxsize=2)
+        erros_renderizacao = []
+        renderizador = threading.Thread(
+            target=_renderizador_paginas,
+            args=(fila_paginas, gerar_paginas, erros_renderizacao),
+            daemon=True,
+        )
+        renderizador.start()
         
         # 3️⃣ PROCESSAR GABARITO
-        print(f"\n{'='*80}")
-        print("📋 PROCESSANDO GABARITO (Arquivo separado)")
-        print(f"{'='*80}")
+        log.info(f"\n{'='*80}")
+        log.info("📋 PROCESSANDO GABARITO (Arquivo separado)")
+        log.info(f"{'='*80}")
         
         respostas_gabarito = detectar_respostas_por_tipo(
             gabarito_img, 
@@ -5886,29 +7140,133 @@ def processar_pdf_multiplas_paginas(
         )
         
         questoes_gabarito = sum(1 for r in respostas_gabarito if r != '?')
-        print(f"\n✅ Gabarito processado: {questoes_gabarito}/{num_questoes} questões detectadas")
+        log.info(f"\n✅ Gabarito processado: {questoes_gabarito}/{num_questoes} questões detectadas")
         
         if questoes_gabarito < num_questoes * 0.8:  # Menos de 80% detectado
-            print(f"⚠️ ATENÇÃO: Poucas questões detectadas no gabarito ({questoes_gabarito}/{num_questoes})")
-            print("   Isso pode afetar a correção dos cartões dos alunos.")
+            log.info(f"⚠️ ATENÇÃO: Poucas questões detectadas no gabarito ({questoes_gabarito}/{num_questoes})")
+            log.info("   Isso pode afetar a correção dos cartões dos alunos.")
         
         # Exibir gabarito
-        print(f"\n{'='*60}")
-        print("📋 GABARITO:")
-        print(f"{'='*60}")
+        log.info(f"\n{'='*60}")
+        log.info("📋 GABARITO:")
+        log.info(f"{'='*60}")
         exibir_gabarito_simples(respostas_gabarito)
         
         # 4️⃣ PROCESSAR CADA CARTÃO DE ALUNO
         resultados_todos = []
+        tabela_resultados = []  # (acertos, erros, percentual) por cartão, para o resumo
+        
+        log.info(f"\n{'='*80}")
+        log.info("👥 PROCESSANDO CARTÕES DE ALUNOS")
+        log.info(f"{'='*80}")
+        
+        # P&B + detecção das bolhas (CPU) em paralelo, um processo por
+        # núcleo: cada página vai para o pool assim que sai da fila; em baixa
+        # memória cada worker lê a própria página do disco. O pool só sobe
+        # quando chega a MIN_PAGINAS_POOL_PDF páginas; PDFs menores fazem o
+        # OMR aqui mesmo. Os cabeçalhos (Gemini, rede) vão para threads,
+        # sobrepostos ao OMR. Cada página ocupa uma vaga até o OMR e o
+        # cabeçalho terminarem; sem vaga, a página fica na fila e a
+        # renderização espera
+        num_workers = _num_workers(os.cpu_count() or 1)
+        vagas_paginas = threading.Semaphore(
+            max(MIN_PAGINAS_POOL_PDF, PAGINAS_EM_ANDAMENTO_POR_WORKER * num_workers)
+        )
+        if usar_gemini and model_gemini:
+            cabecalho_executor = ThreadPoolExecutor(max_workers=MAX_CABECALHOS_SIMULTANEOS)
+        
+        # 🆕 TODAS as páginas do PDF são cartões de alunos
+        base_pdf = os.path.splitext(pdf_path)[0]
+        cartoes_alunos = []  # Nomes (ou caminhos) das páginas, em ordem
+        tarefas_retidas = []  # Páginas aguardando a decisão entre pool e processo atual
+        futuros_paginas = []
+        futuros_cabecalho = []
+        
+        def _enviar_ao_pool(indice, tarefa):
+            futuro = executor.submit(processar_pagina_cartao, tarefa)
+            futuros_paginas.append(futuro)
+            pendentes = [futuro]
+            if cabecalho_executor:
+                pendentes.append(futuros_cabecalho[indice])
+            _liberar_vaga_ao_concluir(vagas_paginas, pendentes)
+        
+        while True:
+            vagas_paginas.acquire()
+            cartao_img = fila_paginas.get()
+            if cartao_img is None:
+                break
+            nome = cartao_img if baixa_memoria else f"{base_pdf}_page_{len(cartoes_alunos) + 1}.png"
+            cartoes_alunos.append(nome)
+            tarefa = {"pagina": cartao_img, "nome": nome, "num_questoes": num_questoes}
+            if cabecalho_executor:
+                futuros_cabecalho.append(
+                    cabecalho_executor.submit(extrair_cabecalho_com_fallback, model_gemini, cartao_img)
+                )
+            if executor:
+                _enviar_ao_pool(len(cartoes_alunos) - 1, tarefa)
+                continue
+            tarefas_retidas.append(tarefa)
+            if len(tarefas_retidas) >= MIN_PAGINAS_POOL_PDF:
+                fila_log = multiprocessing.Queue()
+                ouvinte_log = logging.handlers.QueueListener(fila_log, *log.handlers)
+                ouvinte_log.start()
+                executor = ProcessPoolExecutor(
+                    max_workers=num_workers,
+                    initializer=_iniciar_log_worker,
+                    initargs=(fila_log,),
+                )
+                for indice, tarefa_retida in enumerate(tarefas_retidas):
+                    _enviar_ao_pool(indice, tarefa_retida)
+                tarefas_retidas.clear()
+        renderizador.join()
+        
+        if erros_renderizacao or not cartoes_alunos:
+            if baixa_memoria:
+                _limpar_paginas_temporarias(cartoes_alunos)
+            if erros_renderizacao:
+                raise erros_renderizacao[0]
+            log.info("❌ Nenhuma imagem foi gerada do PDF")
+            return []
         
-        print(f"\n{'='*80}")
-        print(f"👥 PROCESSANDO {len(cartoes_alunos)} CARTÕES DE ALUNOS")
-        print(f"{'='*80}")
+        log.info(f"✅ {len(cartoes_alunos)} páginas convertidas!")
+        log.info(f"✅ Cartões de alunos no PDF: {len(cartoes_alunos)} páginas")
+        
+        # Todas as páginas comparadas com o gabarito de uma vez (matriz
+        # alunos x questões) assim que o OMR termina
+        log.info(f"\n🎨 Convertendo para Preto e Branco e detectando respostas...")
+        if executor:
+            resultados_paginas = (futuro.result() for futuro in futuros_paginas)
+        else:
+            resultados_paginas = map(processar_pagina_cartao, tarefas_retidas)
+        respostas_paginas = []
+        for pagina_num, (nome, pagina) in enumerate(zip(cartoes_alunos, resultados_paginas), 1):
+            log.info(f"   [{pagina_num}/{len(cartoes_alunos)}] {os.path.basename(nome)} P&B {pagina['situacao']}")
+            if pagina["erro"]:
+                log.info(f"❌ ERRO na detecção da página {pagina_num}: {pagina['erro']}")
+            respostas_paginas.append(pagina["respostas"])
+        comparacoes = comparar_respostas_lote(respostas_gabarito, respostas_paginas)
+        
+        # Linhas do Google Sheets acumuladas por planilha; a cada
+        # TAMANHO_LOTE_ENVIO_SHEETS o lote vai para a fila, consumida por
+        # ENVIADORES_LOTE_SHEETS threads que enviam (append_rows) enquanto o
+        # laço segue com as próximas páginas
+        linhas_pendentes: Dict[str, List[list]] = {}
+        if enviar_para_sheets and client:
+            fila_sheets = queue.Queue(maxsize=MAX_LOTES_PENDENTES_SHEETS)
+            enviadores_sheets = [
+                threading.Thread(target=_enviador_planilha, args=(fila_sheets, client), daemon=True)
+                for _ in range(ENVIADORES_LOTE_SHEETS)
+            ]
+            for enviador in enviadores_sheets:
+                enviador.start()
         
         for i, cartao_img in enumerate(cartoes_alunos, 1):
             pagina_num = i  # 🆕 Agora todas as páginas são alunos (1, 2, 3...)
-            print(f"\n🔄 [{i:02d}/{len(cartoes_alunos)}] Processando Página {pagina_num}")
-            print("-" * 60)
+            # Saída da página acumulada em memória e escrita de uma vez
+            saida = io.StringIO()
+            escrever = saida.write
+            escrever(f"\n🔄 [{i:02d}/{len(cartoes_alunos)}] Processando Página {pagina_num}\n")
+            escrever(_SEPARADOR_PAGINA + "\n")
             
             try:
                 # Extrair dados do cabeçalho
@@ -5921,7 +7279,7 @@ def processar_pdf_multiplas_paginas(
                 
                 if usar_gemini and model_gemini:
                     try:
-                        dados_extraidos = extrair_cabecalho_com_fallback(model_gemini, cartao_img)
+                        dados_extraidos = futuros_cabecalho[i - 1].result()
                         if dados_extraidos and dados_extraidos.get("aluno"):
                             dados_aluno["Aluno"] = dados_extraidos.get("aluno", f"Página_{pagina_num}")
                             dados_aluno["Escola"] = dados_extraidos.get("escola", "N/A")
@@ -5930,36 +7288,33 @@ def processar_pdf_multiplas_paginas(
                     except Exception as e:
                         pass  # Silenciar erros do Gemini
                 
-                # Detectar respostas do aluno (COM debug para análise)
-                respostas_aluno = detectar_respostas_por_tipo(
-                    cartao_img, 
-                    num_questoes=num_questoes, 
-                    debug=True  # 🆕 Ativar debug para ver detecção das bolhas
-                )
+                # Respostas detectadas no pool de processos
+                respostas_aluno = respostas_paginas[i - 1]
                 
                 questoes_detectadas = sum(1 for r in respostas_aluno if r != '?')
                 
                 # Verificar se detectou questões suficientes
                 if questoes_detectadas < num_questoes * 0.5:  # Menos de 50%
-                    print(f"❌ Página {pagina_num}: Poucas questões ({questoes_detectadas}/{num_questoes}) - IGNORADO")
+                    escrever(f"❌ Página {pagina_num}: Poucas questões ({questoes_detectadas}/{num_questoes}) - IGNORADO\n")
                     continue
                 
-                # Comparar com gabarito
-                resultado = comparar_respostas(respostas_gabarito, respostas_aluno)
+                # Comparação já feita em lote
+                resultado = comparacoes[i - 1]
                 
                 # 🆕 MOSTRAR APENAS RESUMO COMPACTO
-                print(f"\n{'─'*60}")
-                print(f"� {dados_aluno['Aluno']}")
-                print(f"📚 Turma: {dados_aluno['Turma']} | Escola: {dados_aluno['Escola']}")
-                print(f"✅ Acertos: {resultado['acertos']}")
-                print(f"❌ Erros: {resultado['erros']}")
-                print(f"📊 Percentual: {resultado['percentual']:.1f}%")
+                escrever(f"\n{_SEPARADOR_RESUMO}\n")
+                escrever(f"� {dados_aluno['Aluno']}\n")
+                escrever(f"📚 Turma: {dados_aluno['Turma']} | Escola: {dados_aluno['Escola']}\n")
+                escrever(f"✅ Acertos: {resultado['acertos']}\n")
+                escrever(f"❌ Erros: {resultado['erros']}\n")
+                escrever(f"📊 Percentual: {resultado['percentual']:.1f}%\n")
                 
                 # 🆕 MOSTRAR GABARITO DE RESPOSTAS DO ALUNO
-                print(f"\n📝 Respostas:")
-                exibir_gabarito_simples(respostas_aluno)
+                escrever(f"\n📝 Respostas:\n")
+                exibir_gabarito_simples(respostas_aluno, out=saida)
                 
-                print(f"{'─'*60}")
+                escrever(_SEPARADOR_RESUMO + "\n")
+                _despejar_saida(saida)  # Antes do envio, que imprime direto
                 
                 # Armazenar resultado
                 resultados_todos.append({
@@ -5969,64 +7324,938 @@ def processar_pdf_multiplas_paginas(
                     "resultado": resultado,
                     "questoes_detectadas": questoes_detectadas
                 })
+                tabela_resultados.append(
+                    (resultado['acertos'], resultado['erros'], resultado['percentual'])
+                )
+                
+                # Linha guardada para o envio em lote ao Google Sheets
+                if fila_sheets:
+                    planilha_id = planilha_do_resultado(resultado)
+                    if planilha_id:
+                        linhas = linhas_pendentes.setdefault(planilha_id, [])
+                        linhas.append(montar_linha_planilha(dados_aluno, resultado))
+                        if len(linhas) >= TAMANHO_LOTE_ENVIO_SHEETS:
+                            fila_sheets.put((planilha_id, linhas_pendentes.pop(planilha_id)))
+                
+            except Exception as e:
+                escrever(f"❌ ERRO ao processar página {pagina_num}: {e}\n")
+                continue
+            finally:
+                _despejar_saida(saida)
+        
+        _encerrar_pools_pdf(executor, ouvinte_log, cabecalho_executor)
+        executor = ouvinte_log = cabecalho_executor = None
+        
+        if fila_sheets:
+            for lote in linhas_pendentes.items():
+                fila_sheets.put(lote)
+            _encerrar_enviadores_planilha(fila_sheets, enviadores_sheets)
+        
+        # 5️⃣ RESUMO FINAL
+        _exibir_resumo_pdf(pdf_path, tabela_resultados, len(cartoes_alunos), num_questoes)
+        
+        # 6️⃣ LIMPAR ARQUIVOS TEMPORÁRIOS (só existem em baixa memória)
+        if baixa_memoria:
+            _limpar_paginas_temporarias(cartoes_alunos)
+        
+        log.info("✅ Processamento concluído!")
+        return resultados_todos
+        
+    except Exception as e:
+        log.info(f"❌ ERRO CRÍTICO: {e}")
+        traceback.print_exc()
+        return []
+    finally:
+        # No caminho normal já foram encerrados; aqui só sobra o que um erro
+        # deixou no meio (pool de processos, QueueListener, threads do Sheets)
+        _encerrar_pools_pdf(executor, ouvinte_log, cabecalho_executor, cancelar=True)
+        if fila_sheets:
+            _encerrar_enviadores_planilha(fila_sheets, enviadores_sheets)
+
+
+# ===========================================
+# EXECUÇÃO PRINCIPAL
+# ===========================================
+
+def executar_monitor(
+    args: argparse.Namespace,
+    storage_s3,
+    storages_entrada: Dict[str, object],
+    backend_client=None,
+    usar_gemini: bool = True,
+    enviar_para_sheets: bool = True,
+    mover_processados: bool = True,
+    converter_pb: bool = True,
+    threshold_pb: int = 180,
+    debug_mode: bool = False,
+) -> None:
+    """
+    Modo monitor: verifica as origens continuamente e corrige os cartões
+    novos até o Ctrl+C.
+    
+    Args:
+        args: Argumentos da linha de comando (usa intervalo)
+        storage_s3: VultrS3Storage de onde vêm os gabaritos
+        storages_entrada: Origens de cartões indexadas por source_name
+        backend_client: Cliente de sincronização com o banco (ou None)
+        usar_gemini: Se extrai o cabeçalho com o Gemini
+        enviar_para_sheets: Se envia os resultados ao Google Sheets
+        mover_processados: Se move os cartões corrigidos para a pasta do ano
+        converter_pb: Se converte as imagens para P&B antes da leitura
+        threshold_pb: Threshold da conversão P&B
+        debug_mode: Se gera as imagens de debug
+    """
+    print("=" * 60)
+    print("🤖 MODO MONITORAMENTO CONTÍNUO ATIVADO - SISTEMA AUTOMATIZADO")
+    print(f"⏰ Intervalo inicial: {args.intervalo} minutos (adaptativo)")
+    print(f"🪣 Bucket: {storage_s3.config.bucket}")
+    print(f"📂 Prefixo de ORIGEM (upload): {storage_s3.config.prefixo_upload or '(raiz)'}")
+    print(f"📡 Origens monitoradas: {', '.join(storages_entrada)}")
+    print(f"🗄️ Sync Banco: {'ATIVADO' if backend_client else 'DESATIVADO'}")
+    print("✨ Sistema detectará automaticamente o ano de cada cartão")
+    print("💡 Pressione Ctrl+C para parar")
+    print("=" * 60)
+    reset_session()
+    
+    # Histórico dos arquivos já processados, por ID e NOME (SQLite;
+    # importa o historico_monitoramento.json antigo na primeira vez)
+    historico = HistoricoMonitoramento()
+    
+    # Gemini e Sheets autenticados já na partida: os ciclos só reaproveitam
+    # os clientes (obter_* refaz a configuração apenas se ela falhou)
+    if usar_gemini:
+        obter_gemini()
+    if enviar_para_sheets:
+        obter_google_sheets()
+    
+    def aguardar_proxima_verificacao(segundos):
+        """
+        Espera até a próxima verificação. Com a pasta local como origem, a
+        espera termina assim que um arquivo chega nela (watchdog); as
+        demais origens continuam sendo consultadas no fim do intervalo.
+        """
+        pasta_local = storages_entrada.get(PastaLocalStorage.source_name)
+        if not pasta_local:
+            time.sleep(segundos)
+        elif pasta_local.aguardar_novos(segundos):
+            print("📥 Novo arquivo na pasta local: verificando agora")
+    
+    def verificar_novos_arquivos():
+        """
+        Verifica se há NOVOS arquivos para processar (por ID e NOME).
+        
+        Returns:
+            (novos cartões, gabaritos listados no Vultr S3)
+        """
+        try:
+            arquivos = []
+            for nome_origem, storage in storages_entrada.items():
+                try:
+                    arquivos_origem = storage.listar_uploads()
+                    cartoes_origem = []
+                    for arquivo in arquivos_origem:
+                        # Nome normalizado uma única vez por arquivo e
+                        # guardado no próprio dicionário
+                        nome_lower = arquivo["name"].lower()
+                        nome_sem_ext, extensao = os.path.splitext(nome_lower)
+                        if (
+                            extensao in EXTENSOES_CARTAO_MONITOR
+                            and "gabarito" not in nome_lower
+                        ):
+                            arquivo["nome_sem_ext"] = nome_sem_ext
+                            arquivo["extensao"] = extensao
+                            cartoes_origem.append(arquivo)
+                    arquivos.extend(cartoes_origem)
+                    print(
+                        f"\n📂 Cartões em {nome_origem}: "
+                        f"{len(cartoes_origem)}"
+                    )
+                except Exception as e:
+                    print(f"⚠️ Falha ao consultar {nome_origem}: {e}")
+
+            # 🆕 DEBUG: Mostrar TODOS os arquivos encontrados
+            # (uma consulta ao histórico por arquivo, reaproveitada abaixo)
+            motivos_processado = {}
+            for arq in arquivos:
+                nome = arq['name']
+                arquivo_id = arq['id']
+                origem = arq['source']
+                
+                # Verificar duplicata por ID ou NOME
+                motivo = historico.motivo_processado(arquivo_id, arq['nome_sem_ext'])
+                motivos_processado[arquivo_id] = motivo
+                
+                if motivo:
+                    print(f"   ✅ PROCESSADO ({motivo}) | [{origem}] {nome}")
+                else:
+                    print(f"   🆕 NOVO | [{origem}] {nome}")
+            
+            novos_cartoes = []
+            
+            for arquivo in arquivos:
+                arquivo_id = arquivo['id']
+                nome = arquivo['name']
+                motivo = motivos_processado[arquivo_id]
+                
+                # Verificar se é um cartão de aluno NOVO (por ID E NOME)
+                if arquivo['extensao'] in EXTENSOES_CARTAO_MONITOR:
+                    # Duplicata por ID?
+                    if motivo == "ID":
+                        print(f"   ⏭️ Ignorado (ID duplicado): {nome}")
+                        continue
+                    
+                    # Duplicata por NOME?
+                    if motivo == "NOME":
+                        print(f"   ⏭️ Ignorado (NOME duplicado): {nome}")
+                        print(f"      ⚠️ Arquivo com mesmo nome já foi processado (mesmo com extensão diferente)")
+                        continue
+                    
+                    # É NOVO!
+                    tipo = "📄 PDF" if arquivo['extensao'] == '.pdf' else "🖼️ Imagem"
+                    print(
+                        f"   {tipo} NOVO detectado em "
+                        f"{arquivo['source']}: {nome}"
+                    )
+                    novos_cartoes.append(arquivo)
+            
+            # Gabaritos só são listados quando há o que corrigir: numa
+            # verificação sem novidades (o caso comum) o bucket não é varrido
+            gabaritos_s3 = storage_s3.listar_gabaritos() if novos_cartoes else []
+            tem_gabarito = bool(gabaritos_s3)
+            
+            for gabarito in gabaritos_s3:
+                print(f"📋 Gabarito detectado: {gabarito['name']}")
+            
+            if not tem_gabarito and novos_cartoes:
+                print("⚠️ Novos cartões encontrados mas GABARITO não está no Vultr S3!")
+                return [], gabaritos_s3
+            
+            print(f"\n📊 Resumo:")
+            print(f"   Total na pasta: {len(arquivos)}")
+            total_ids, total_nomes = historico.totais()
+            print(f"   Já processados (IDs): {total_ids}")
+            print(f"   Já processados (Nomes): {total_nomes}")
+            if novos_cartoes:
+                print(f"   Gabarito: ✅ Encontrado")
+            print(f"   Novos a processar: {len(novos_cartoes)}")
+            
+            return novos_cartoes, gabaritos_s3
+            
+        except Exception as e:
+            print(f"❌ Erro ao verificar arquivos: {e}")
+            traceback.print_exc()
+            return [], []
+    
+    # Verificação das origens em thread própria: enquanto um lote é
+    # processado, os próximos uploads já são detectados e enfileirados
+    contador_verificacoes = 0
+    fila_novos = queue.Queue()
+    # IDs entregues ao processamento e ainda não concluídos (não podem ser
+    # enfileirados de novo; os que falharem voltam na próxima verificação)
+    em_andamento = set()
+    lock_andamento = threading.Lock()
+    
+    def verificar_origens_continuamente():
+        """Verifica as origens no intervalo adaptativo e enfileira os lotes novos."""
+        nonlocal contador_verificacoes
+        intervalo_atual = args.intervalo * 60
+        # Um --intervalo maior que o teto padrão vira o próprio teto
+        intervalo_maximo = max(INTERVALO_MONITOR_MAXIMO, intervalo_atual)
+        
+        while True:
+            novos_cartoes = []
+            try:
+                contador_verificacoes += 1
+                timestamp = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+                print(f"\n🔍 Verificação #{contador_verificacoes} - {timestamp}")
+                
+                # Cópia tirada ANTES de consultar o histórico: um ID que saiu
+                # de em_andamento depois dela já está registrado no histórico
+                with lock_andamento:
+                    ja_entregues = set(em_andamento)
+                
+                # Verificar NOVOS cartões (por ID e NOME)
+                novos_cartoes, gabaritos_s3 = verificar_novos_arquivos()
+                novos_cartoes = [
+                    cartao for cartao in novos_cartoes
+                    if cartao['id'] not in ja_entregues
+                ]
                 
-                # Enviar para Google Sheets (silencioso)
-                if enviar_para_sheets and client:
+                if novos_cartoes:
+                    with lock_andamento:
+                        em_andamento.update(cartao['id'] for cartao in novos_cartoes)
+                    fila_novos.put((novos_cartoes, gabaritos_s3))
+                else:
+                    print("💤 Nenhum cartão novo")
+            except Exception as e:
+                print(f"❌ Erro na verificação #{contador_verificacoes}: {e}")
+                traceback.print_exc()
+            
+            intervalo_atual = _proximo_intervalo_monitor(
+                intervalo_atual,
+                bool(novos_cartoes),
+                intervalo_maximo,
+            )
+            print(f"⏰ Próxima verificação em {intervalo_atual / 60:.1f} minuto(s)...")
+            aguardar_proxima_verificacao(intervalo_atual)
+    
+    threading.Thread(
+        target=verificar_origens_continuamente,
+        name="monitor-origens",
+        daemon=True,
+    ).start()
+    
+    # Loop de processamento
+    try:
+        while True:
+            try:
+                # Espera curta e repetida: mantém o Ctrl+C responsivo
+                novos_cartoes, gabaritos_s3 = fila_novos.get(timeout=1)
+            except queue.Empty:
+                continue
+            
+            try:
+                if novos_cartoes:
+                    print(f"🆕 Encontrados {len(novos_cartoes)} NOVOS cartões!")
+                    for arquivo in novos_cartoes:
+                        print(f"   -> {arquivo['name']} ")
+                    
+                    # Processar APENAS os novos cartões
+                    print("🚀 Processando APENAS os novos cartões...")
+                    update_status("running", "Preparando processamento", 0)
+                    registrar_status_log(f"Iniciando processamento de {len(novos_cartoes)} cartao(s)")
                     try:
-                        enviar_para_planilha(client, dados_aluno, resultado, questoes_detectadas=questoes_detectadas)
+                        # Serviços já configurados (cache por processo)
+                        if usar_gemini:
+                            model_gemini = obter_gemini()
+                        else:
+                            model_gemini = None
+                        
+                        if enviar_para_sheets:
+                            client = obter_google_sheets()
+                        else:
+                            client = None
+                        
+                        # Pasta temporária
+                        pasta_temp = tempfile.mkdtemp(prefix="cartoes_novos_")
+                        print(f"📁 Pasta temporária: {pasta_temp}")
+                        
+                        # 1. Carregar os quatro gabaritos automaticamente
+                        print(f"\n{'='*80}")
+                        print("📚 CARREGANDO GABARITOS AUTOMATICAMENTE")
+                        print(f"{'='*80}")
+
+                        # Reaproveita a listagem de gabaritos da verificação
+                        gabaritos_dict = carregar_gabaritos_do_s3(
+                            storage_s3,
+                            pasta_temp,
+                            debug=debug_mode,
+                            arquivos=gabaritos_s3,
+                        )
+
+                        if any(ano not in gabaritos_dict for ano in ANOS_ESCOLARES):
+                            print("\n❌ ERRO: Os quatro gabaritos são necessários!")
+                            continue
+                        
+                        print(f"\n✅ OS QUATRO GABARITOS FORAM CARREGADOS COM SUCESSO!")
+                        print(f"{'='*80}")
+                        
+                        # 2. Processar cada cartão NOVO (separar PDFs de imagens)
+                        arquivos_processados_agora = []  # Lista de {id, nome_sem_ext}
+                        # Linhas do Google Sheets por planilha, enviadas juntas no fim do ciclo
+                        linhas_pendentes = {}
+                        pdfs_para_processar = []
+                        imagens_para_processar = []
+                        
+                        # Separar PDFs de imagens
+                        for cartao_info in novos_cartoes:
+                            extensao = cartao_info['extensao']
+                            if extensao == '.pdf':
+                                pdfs_para_processar.append(cartao_info)
+                            elif extensao in EXTENSOES_IMAGEM_MONITOR:
+                                imagens_para_processar.append(cartao_info)
+
+                        # Baixar todos os novos em paralelo (PDFs primeiro, na
+                        # ordem de processamento); cada item espera só o seu
+                        downloads_executor = ThreadPoolExecutor(max_workers=MAX_DOWNLOADS_SIMULTANEOS)
+                        downloads = _agendar_downloads(
+                            downloads_executor,
+                            storages_entrada,
+                            pdfs_para_processar + imagens_para_processar,
+                            pasta_temp,
+                        )
+
+                        total_status_items = len(pdfs_para_processar) + len(imagens_para_processar)
+                        itens_status_processados = 0
+                        
+                        print(f"\n📊 Arquivos detectados:")
+                        print(f"   📄 PDFs: {len(pdfs_para_processar)}")
+                        print(f"   🖼️ Imagens: {len(imagens_para_processar)}")
+                        
+                        # ═══════════════════════════════════════════════════
+                        # PROCESSAR PDFs (MÚLTIPLAS PÁGINAS)
+                        # ═══════════════════════════════════════════════════
+                        if pdfs_para_processar:
+                            print(f"\n{'='*80}")
+                            print(f"📄 PROCESSANDO {len(pdfs_para_processar)} PDF(s) COM MÚLTIPLAS PÁGINAS")
+                            print(f"{'='*80}")
+                            
+                            for pdf_idx, pdf_info in enumerate(pdfs_para_processar, 1):
+                                try:
+                                    print(f"\n📄 [{pdf_idx}/{len(pdfs_para_processar)}] {pdf_info['name']}")
+                                    update_status(
+                                        "running",
+                                        pdf_info['name'],
+                                        int((itens_status_processados / max(total_status_items, 1)) * 100)
+                                    )
+                                    
+                                    # Baixar PDF da origem em que ele foi encontrado
+                                    pdf_path = downloads[pdf_info['id']].result()
+                                    
+                                    print(f"✅ PDF baixado: {pdf_info['name']}")
+                                    
+                                    # Converter TODAS as páginas para PNG
+                                    print(f"🔄 Convertendo páginas do PDF para PNG...")
+                                    imagens_paginas = process_pdf_all_pages(pdf_path, keep_temp_files=True)
+                                    
+                                    if not imagens_paginas:
+                                        print(f"❌ Nenhuma página convertida do PDF")
+                                        itens_status_processados += 1
+                                        update_status(
+                                            "running",
+                                            pdf_info['name'],
+                                            int((itens_status_processados / max(total_status_items, 1)) * 100)
+                                        )
+                                        continue
+                                    
+                                    print(f"✅ {len(imagens_paginas)} páginas convertidas!")
+                                    total_status_items += max(0, len(imagens_paginas) - 1)
+                                    
+                                    # Converter para P&B
+                                    print(f"🎨 Convertendo para P&B...")
+                                    # Páginas convertidas em paralelo (uma por núcleo), cada
+                                    # uma regravada no lugar; PDFs curtos não pagam o pool
+                                    tarefas_pb = [(img_path, threshold_pb) for img_path in imagens_paginas]
+                                    if len(tarefas_pb) >= MIN_PAGINAS_POOL_PDF:
+                                        with ProcessPoolExecutor(max_workers=_num_workers(len(tarefas_pb))) as pool_pb:
+                                            erros_pb = list(pool_pb.map(_converter_pagina_pb_no_lugar, tarefas_pb))
+                                    else:
+                                        erros_pb = [_converter_pagina_pb_no_lugar(tarefa) for tarefa in tarefas_pb]
+                                    for img_idx, erro_pb in enumerate(erros_pb, 1):
+                                        if erro_pb:
+                                            print(f"   ⚠️ Erro ao converter página {img_idx}: {erro_pb}")
+                                    
+                                    print(f"✅ Todas as páginas prontas!")
+                                    
+                                    # Rastreia os anos das paginas para escolher o destino do PDF.
+                                    anos_detectados = []
+                                    
+                                    # Normalizar TODAS as páginas (perspectiva condicional + deskew)
+                                    # antes da leitura, para o Gemini receber o PDF em lotes
+                                    paginas_proc = []
+                                    for pagina_idx, pagina_img in enumerate(imagens_paginas, 1):
+                                        try:
+                                            paginas_proc.append(preprocessar_arquivo(
+                                                pagina_img,
+                                                f"aluno_pdf_{pagina_idx}",
+                                                debug=debug_mode
+                                            ))
+                                        except Exception as e:
+                                            print(f"   ⚠️ Erro ao normalizar página {pagina_idx}: {e}")
+                                            paginas_proc.append(None)
+                                    
+                                    # Cabeçalho + ano de várias páginas por requisição ao Gemini;
+                                    # páginas que o lote não leu caem na extração individual
+                                    dados_gemini_paginas = [None] * len(paginas_proc)
+                                    if model_gemini:
+                                        indices_validos = [i for i, p in enumerate(paginas_proc) if p is not None]
+                                        lidos = extrair_dados_completos_em_lote(
+                                            model_gemini,
+                                            [paginas_proc[i] for i in indices_validos],
+                                            nome_arquivo=pdf_info['name'],
+                                        )
+                                        for i, dados_pagina in zip(indices_validos, lidos):
+                                            dados_gemini_paginas[i] = dados_pagina
+                                    
+                                    # Processar CADA página como um aluno
+                                    print(f"\n{_SEPARADOR_RESUMO}")
+                                    print(f"👥 Processando {len(imagens_paginas)} alunos do PDF")
+                                    print(_SEPARADOR_RESUMO)
+                                    
+                                    for pagina_idx, pagina_img in enumerate(imagens_paginas, 1):
+                                        nome_pagina_status = f"{pdf_info['name']} - pagina {pagina_idx}/{len(imagens_paginas)}"
+                                        try:
+                                            print(f"\n🔄 Página {pagina_idx}/{len(imagens_paginas)}")
+                                            update_status(
+                                                "running",
+                                                nome_pagina_status,
+                                                int((itens_status_processados / max(total_status_items, 1)) * 100)
+                                            )
+                                            
+                                            pagina_img_proc = paginas_proc[pagina_idx - 1]
+                                            if pagina_img_proc is None:
+                                                raise RuntimeError("página não pôde ser normalizada")
+                                            
+                                            # 🆕 USAR EXTRAÇÃO OTIMIZADA (1 chamada única ao Gemini)
+                                            ano_escolar_pagina = None
+                                            num_questoes_pagina = None
+                                            dados_aluno = None
+                                            
+                                            # PRIORIDADE 1: Tentar Gemini primeiro
+                                            if model_gemini:
+                                                dados_completos = dados_gemini_paginas[pagina_idx - 1]
+                                                if not dados_completos:
+                                                    dados_completos = extrair_dados_completos_com_gemini(
+                                                        model_gemini,
+                                                        pagina_img_proc,
+                                                        nome_arquivo=pdf_info['name']
+                                                    )
+                                                if dados_completos:
+                                                    dados_aluno = dados_completos
+                                                    ano_escolar_pagina = dados_completos.get('ano_escolar')
+                                                    if ano_escolar_pagina:
+                                                        num_questoes_pagina = QUESTOES_POR_ANO[ano_escolar_pagina]
+                                                        print(
+                                                            f"   ✅ Gemini detectou: "
+                                                            f"{rotulo_ano(ano_escolar_pagina)} "
+                                                            f"({num_questoes_pagina} questões)"
+                                                        )
+                                            
+                                            # FALLBACK: Se Gemini falhar, usar OCR direto
+                                            if not ano_escolar_pagina:
+                                                print(f"   ⚠️ Gemini falhou - usando OCR como fallback")
+                                                print(f"   💡 A pasta de destino será definida pela MAIORIA de ocorrências")
+                                                ano_escolar_pagina = detectar_ano_com_ocr_direto(
+                                                    pagina_img_proc,
+                                                    debug=debug_mode,
+                                                )
+                                                if ano_escolar_pagina:
+                                                    num_questoes_pagina = QUESTOES_POR_ANO[ano_escolar_pagina]
+                                                    print(
+                                                        f"   📊 OCR detectou: "
+                                                        f"{rotulo_ano(ano_escolar_pagina)} "
+                                                        f"({num_questoes_pagina} questões)"
+                                                    )
+                                            
+                                            # Se dados do aluno não foram extraídos, usar OCR
+                                            if not dados_aluno:
+                                                dados_aluno = extrair_cabecalho_com_ocr_fallback(pagina_img_proc)
+
+                                            if not ano_escolar_pagina and dados_aluno:
+                                                ano_escolar_pagina = detectar_ano_por_turma(
+                                                    dados_aluno.get("turma", "")
+                                                )
+                                                num_questoes_pagina = numero_questoes_por_ano(
+                                                    ano_escolar_pagina
+                                                )
+                                            
+                                            if not dados_aluno or dados_aluno.get("aluno") == "N/A":
+                                                dados_aluno = {
+                                                    "escola": "N/A",
+                                                    "aluno": f"{os.path.splitext(pdf_info['name'])[0]}_pag{pagina_idx}",
+                                                    "turma": "N/A",
+                                                    "nascimento": "N/A"
+                                                }
+
+                                            if not ano_escolar_pagina:
+                                                print("   ❌ Ano escolar não identificado; página ignorada")
+                                                itens_status_processados += 1
+                                                continue
+                                            
+                                            print(f"   🔍 DEBUG - Dados extraídos: Escola={dados_aluno.get('escola')}, Aluno={dados_aluno.get('aluno')}, Turma={dados_aluno.get('turma')}, Nasc={dados_aluno.get('nascimento')}, Ano={ano_escolar_pagina}, Questões={num_questoes_pagina}")
+                                            
+                                            print(f"   📁 Destino: Pasta {rotulo_ano(ano_escolar_pagina)}")
+                                            
+                                            anos_detectados.append(ano_escolar_pagina)
+                                            
+                                            respostas_gabarito_correto = gabaritos_dict.get(ano_escolar_pagina)
+                                            if not respostas_gabarito_correto:
+                                                print(f"   ❌ {nome_gabarito(ano_escolar_pagina)} não disponível!")
+                                                itens_status_processados += 1
+                                                update_status(
+                                                    "running",
+                                                    nome_pagina_status,
+                                                    int((itens_status_processados / max(total_status_items, 1)) * 100)
+                                                )
+                                                continue
+                                            
+                                            # Detectar respostas (usando número detectado para esta página)
+                                            respostas_aluno = detectar_respostas_por_tipo(
+                                                pagina_img_proc, 
+                                                num_questoes=num_questoes_pagina, 
+                                                debug=debug_mode
+                                            )
+                                            
+                                            questoes_detectadas = sum(1 for r in respostas_aluno if r != '?')
+                                            
+                                            # Verificar detecção mínima
+                                            if questoes_detectadas < num_questoes_pagina * 0.5:
+                                                print(f"   ⚠️ Poucas questões detectadas ({questoes_detectadas}/{num_questoes_pagina}) - IGNORADO")
+                                                itens_status_processados += 1
+                                                update_status(
+                                                    "running",
+                                                    nome_pagina_status,
+                                                    int((itens_status_processados / max(total_status_items, 1)) * 100)
+                                                )
+                                                continue
+                                            
+                                            # Comparar com gabarito correto
+                                            resultado = comparar_respostas(respostas_gabarito_correto, respostas_aluno)
+                                            
+                                            # Exibir resumo formatado com respostas do aluno
+                                            print(f"\n{_SEPARADOR_RESUMO}")
+                                            print(f"👤 {dados_aluno.get('aluno', 'N/A')}")
+                                            print(f"📚 Turma: {dados_aluno.get('turma', 'N/A')} | Escola: {dados_aluno.get('escola', 'N/A')}")
+                                            print(f"✅ Acertos: {resultado['acertos']}")
+                                            print(f"❌ Erros: {resultado['erros']}")
+                                            if resultado.get('anuladas', 0) > 0:
+                                                print(f"⊘ Questões anuladas: {resultado['anuladas']}")
+                                            print(f"📊 Percentual: {resultado['percentual']:.1f}%")
+                                            
+                                            # Exibir respostas do aluno
+                                            print(f"\n📝 Respostas:")
+                                            exibir_gabarito_simples(respostas_aluno)
+                                            print(_SEPARADOR_RESUMO)
+                                            
+                                            if client:
+                                                dados_envio = {
+                                                    "Escola": dados_aluno.get("escola", "N/A"),
+                                                    "Aluno": dados_aluno.get("aluno", "N/A"),
+                                                    "Nascimento": dados_aluno.get("nascimento", "N/A"),
+                                                    "Turma": dados_aluno.get("turma", "N/A")
+                                                }
+                                                planilha_id = planilha_do_resultado(resultado, ano_escolar=ano_escolar_pagina)
+                                                if planilha_id:
+                                                    linhas_pendentes.setdefault(planilha_id, []).append(
+                                                        montar_linha_planilha(dados_envio, resultado)
+                                                    )
+
+                                            enviar_resultado_para_backend(
+                                                backend_client=backend_client,
+                                                file_name=f"{pdf_info['name']}#pagina_{pagina_idx}",
+                                                dados_aluno=dados_aluno,
+                                                respostas_aluno=respostas_aluno,
+                                                resultado=resultado,
+                                                ano_escolar=ano_escolar_pagina,
+                                            )
+                                            itens_status_processados += 1
+                                            record_correction(
+                                                nome_pagina_status,
+                                                file=nome_pagina_status,
+                                                progress=int((itens_status_processados / max(total_status_items, 1)) * 100)
+                                            )
+                                            
+                                        except Exception as e:
+                                            print(f"   ❌ Erro na página {pagina_idx}: {e}")
+                                            itens_status_processados += 1
+                                            update_status(
+                                                "running",
+                                                nome_pagina_status,
+                                                int((itens_status_processados / max(total_status_items, 1)) * 100)
+                                            )
+                                    
+                                    if not anos_detectados:
+                                        print("\n⚠️ PDF sem páginas com ano identificado; arquivo não será movido")
+                                        itens_status_processados += 1
+                                        continue
+                                    elif len(set(anos_detectados)) == 1:
+                                        ano_escolar_pdf = anos_detectados[0]
+                                        print(
+                                            f"\n📁 PDF será movido para: "
+                                            f"{rotulo_ano(ano_escolar_pdf)} "
+                                            f"(todas as páginas são do mesmo ano)"
+                                        )
+                                    else:
+                                        contagem_anos = Counter(anos_detectados)
+                                        ano_escolar_pdf, quantidade_maioria = contagem_anos.most_common(1)[0]
+                                        resumo = ", ".join(
+                                            f"{rotulo_ano(ano)}: {quantidade}"
+                                            for ano, quantidade in contagem_anos.items()
+                                        )
+                                        print(
+                                            f"\n📁 PDF misto será movido para "
+                                            f"{rotulo_ano(ano_escolar_pdf)} "
+                                            f"(maioria de {quantidade_maioria}; {resumo})"
+                                        )
+
+                                    num_questoes_pdf = QUESTOES_POR_ANO[ano_escolar_pdf]
+                                    
+                                    # Marcar PDF como processado (ID + NOME + PASTA DESTINO)
+                                    arquivos_processados_agora.append({
+                                        'id': pdf_info['id'],
+                                        'storage_id': pdf_info['storage_id'],
+                                        'source': pdf_info['source'],
+                                        'nome_sem_ext': pdf_info['nome_sem_ext'],
+                                        'nome_original': pdf_info['name'],
+                                        'num_questoes': num_questoes_pdf,
+                                        'ano_escolar': ano_escolar_pdf,
+                                    })
+                                    print(f"\n✅ PDF processado: {pdf_info['name']}")
+                                    
+                                except Exception as e:
+                                    print(f"   ❌ Erro ao processar PDF: {e}")
+                                    itens_status_processados += 1
+                                    update_status(
+                                        "running",
+                                        pdf_info['name'],
+                                        int((itens_status_processados / max(total_status_items, 1)) * 100)
+                                    )
+                                    traceback.print_exc()
+                        
+                        # ═══════════════════════════════════════════════════
+                        # PROCESSAR IMAGENS (PÁGINA ÚNICA)
+                        # ═══════════════════════════════════════════════════
+                        if imagens_para_processar:
+                            print(f"\n{'='*80}")
+                            print(f"🖼️ PROCESSANDO {len(imagens_para_processar)} IMAGEM(NS)")
+                            print(f"{'='*80}")
+                            
+                            for img_idx, cartao_info in enumerate(imagens_para_processar, 1):
+                                nome_imagem_status = cartao_info['name']
+                                try:
+                                    print(f"\n🔄 [{img_idx}/{len(imagens_para_processar)}] {cartao_info['name']}")
+                                    update_status(
+                                        "running",
+                                        nome_imagem_status,
+                                        int((itens_status_processados / max(total_status_items, 1)) * 100)
+                                    )
+                                    
+                                    # Baixar imagem da origem em que ela foi encontrada
+                                    cartao_path = downloads[cartao_info['id']].result()
+                                    
+                                    # Converter para P&B se habilitado
+                                    if converter_pb:
+                                        cartao_path = converter_para_preto_e_branco(cartao_path, threshold=threshold_pb, salvar=True)
+                                    
+                                    # Processar cartão
+                                    aluno_img = preprocessar_arquivo(cartao_path, f"aluno_{img_idx}", debug=debug_mode)
+                                    
+                                    # 🆕 USAR EXTRAÇÃO OTIMIZADA (1 chamada única ao Gemini)
+                                    ano_escolar_aluno = None
+                                    num_questoes_aluno = None
+                                    dados_aluno = None
+                                    
+                                    # PRIORIDADE 1: Tentar Gemini primeiro
+                                    if model_gemini:
+                                        dados_completos = extrair_dados_completos_com_gemini(
+                                            model_gemini, 
+                                            aluno_img,
+                                            nome_arquivo=cartao_info['name']
+                                        )
+                                        if dados_completos:
+                                            dados_aluno = dados_completos
+                                            ano_escolar_aluno = dados_completos.get('ano_escolar')
+                                            if ano_escolar_aluno:
+                                                num_questoes_aluno = QUESTOES_POR_ANO[ano_escolar_aluno]
+                                                print(
+                                                    f"   ✅ Gemini detectou: "
+                                                    f"{rotulo_ano(ano_escolar_aluno)} "
+                                                    f"({num_questoes_aluno} questões)"
+                                                )
+                                    
+                                    # FALLBACK: Se Gemini falhar, usar OCR direto
+                                    if not ano_escolar_aluno:
+                                        print(f"   ⚠️ Gemini falhou - usando OCR como fallback")
+                                        print(f"   💡 A pasta de destino será definida corretamente")
+                                        ano_escolar_aluno = detectar_ano_com_ocr_direto(
+                                            aluno_img,
+                                            debug=debug_mode,
+                                        )
+                                        if ano_escolar_aluno:
+                                            num_questoes_aluno = QUESTOES_POR_ANO[ano_escolar_aluno]
+                                            print(
+                                                f"   📊 OCR detectou: "
+                                                f"{rotulo_ano(ano_escolar_aluno)} "
+                                                f"({num_questoes_aluno} questões)"
+                                            )
+                                    
+                                    # Se dados do aluno não foram extraídos, usar OCR
+                                    if not dados_aluno:
+                                        dados_aluno = extrair_cabecalho_com_ocr_fallback(aluno_img)
+
+                                    if not ano_escolar_aluno and dados_aluno:
+                                        ano_escolar_aluno = detectar_ano_por_turma(
+                                            dados_aluno.get("turma", "")
+                                        )
+                                        num_questoes_aluno = numero_questoes_por_ano(
+                                            ano_escolar_aluno
+                                        )
+                                    
+                                    if not dados_aluno or dados_aluno.get("aluno") == "N/A":
+                                        dados_aluno = {
+                                            "escola": "N/A",
+                                            "aluno": os.path.splitext(cartao_info['name'])[0],
+                                            "turma": "N/A",
+                                            "nascimento": "N/A"
+                                        }
+
+                                    if not ano_escolar_aluno:
+                                        print("   ❌ Ano escolar não identificado; cartão ignorado")
+                                        itens_status_processados += 1
+                                        continue
+                                    
+                                    print(f"   🔍 DEBUG - Dados extraídos: Escola={dados_aluno.get('escola')}, Aluno={dados_aluno.get('aluno')}, Turma={dados_aluno.get('turma')}, Nasc={dados_aluno.get('nascimento')}, Ano={ano_escolar_aluno}, Questões={num_questoes_aluno}")
+                                    
+                                    print(
+                                        f"   📁 Destino: Pasta {rotulo_ano(ano_escolar_aluno)} "
+                                        f"({num_questoes_aluno} questões)"
+                                    )
+                                    
+                                    # Detectar respostas (usando número detectado)
+                                    respostas_aluno = detectar_respostas_por_tipo(aluno_img, num_questoes=num_questoes_aluno, debug=debug_mode)
+                                    questoes_detectadas = sum(1 for r in respostas_aluno if r != '?')
+                                    
+                                    # 🆕 COMPARAR COM O GABARITO CORRETO
+                                    respostas_gabarito_correto = gabaritos_dict.get(ano_escolar_aluno)
+                                    if not respostas_gabarito_correto:
+                                        print(f"   ❌ {nome_gabarito(ano_escolar_aluno)} não disponível!")
+                                        itens_status_processados += 1
+                                        update_status(
+                                            "running",
+                                            nome_imagem_status,
+                                            int((itens_status_processados / max(total_status_items, 1)) * 100)
+                                        )
+                                        continue
+                                    
+                                    resultado = comparar_respostas(respostas_gabarito_correto, respostas_aluno)
+                                    
+                                    # Exibir resumo formatado
+                                    print(f"\n{_SEPARADOR_RESUMO}")
+                                    print(f"👤 {dados_aluno.get('aluno', 'N/A')}")
+                                    print(f"📚 Turma: {dados_aluno.get('turma', 'N/A')} | Escola: {dados_aluno.get('escola', 'N/A')}")
+                                    print(f"✅ Acertos: {resultado['acertos']}")
+                                    print(f"❌ Erros: {resultado['erros']}")
+                                    if resultado.get('anuladas', 0) > 0:
+                                        print(f"⊘ Questões anuladas: {resultado['anuladas']}")
+                                    print(f"📊 Percentual: {resultado['percentual']:.1f}%")
+                                    
+                                    # Exibir respostas do aluno
+                                    print(f"\n📝 Respostas:")
+                                    exibir_gabarito_simples(respostas_aluno)
+                                    print(_SEPARADOR_RESUMO)
+                                    
+                                    # Linha guardada para o envio único ao Google Sheets
+                                    if client:
+                                        dados_envio = {
+                                            "Escola": dados_aluno.get("escola", "N/A"),
+                                            "Aluno": dados_aluno.get("aluno", "N/A"),
+                                            "Nascimento": dados_aluno.get("nascimento", "N/A"),
+                                            "Turma": dados_aluno.get("turma", "N/A")
+                                        }
+                                        planilha_id = planilha_do_resultado(resultado, ano_escolar=ano_escolar_aluno)
+                                        if planilha_id:
+                                            linhas_pendentes.setdefault(planilha_id, []).append(
+                                                montar_linha_planilha(dados_envio, resultado)
+                                            )
+
+                                    enviar_resultado_para_backend(
+                                        backend_client=backend_client,
+                                        file_name=cartao_info['name'],
+                                        dados_aluno=dados_aluno,
+                                        respostas_aluno=respostas_aluno,
+                                        resultado=resultado,
+                                        ano_escolar=ano_escolar_aluno,
+                                    )
+                                    itens_status_processados += 1
+                                    record_correction(
+                                        nome_imagem_status,
+                                        file=nome_imagem_status,
+                                        progress=int((itens_status_processados / max(total_status_items, 1)) * 100)
+                                    )
+                                    
+                                    # Marcar como processado (ID + NOME + PASTA DESTINO)
+                                    arquivos_processados_agora.append({
+                                        'id': cartao_info['id'],
+                                        'storage_id': cartao_info['storage_id'],
+                                        'source': cartao_info['source'],
+                                        'nome_sem_ext': cartao_info['nome_sem_ext'],
+                                        'nome_original': cartao_info['name'],
+                                        'num_questoes': num_questoes_aluno,
+                                        'ano_escolar': ano_escolar_aluno,
+                                    })
+                                    
+                                except Exception as e:
+                                    print(f"   ❌ Erro: {e}")
+                                    itens_status_processados += 1
+                                    update_status(
+                                        "running",
+                                        nome_imagem_status,
+                                        int((itens_status_processados / max(total_status_items, 1)) * 100)
+                                    )
+                        
+                        # Uma requisição (values.append) por planilha com todos os
+                        # cartões do ciclo, em vez de uma por cartão
+                        for planilha_id, linhas in linhas_pendentes.items():
+                            enviar_linhas_para_planilha(client, linhas, planilha_id)
+                        
+                        # 3. Mover arquivos processados para a pasta do ano detectado.
+                        if mover_processados and arquivos_processados_agora:
+                            print(f"\n📦 Movendo {len(arquivos_processados_agora)} cartões para pastas de destino...")
+                            
+                            # 🆕 MOVER CADA ARQUIVO PARA SUA PASTA ESPECÍFICA
+                            for arquivo_proc in arquivos_processados_agora:
+                                ano_escolar_arquivo = arquivo_proc.get('ano_escolar')
+                                origem_arquivo = arquivo_proc['source']
+                                storage_origem = storages_entrada[origem_arquivo]
+
+                                print(
+                                    f"   📁 {arquivo_proc['nome_original']} → "
+                                    f"{storage_origem.destino_label(ano_escolar_arquivo)}"
+                                )
+                                storage_origem.mover_para_processados(
+                                    arquivo_proc['storage_id'],
+                                    ano_escolar_arquivo,
+                                )
+                        
+                        # 4. Registrar IDs e NOMES processados (só os novos)
+                        historico.registrar(arquivos_processados_agora)
+                        
+                        # Limpar pasta temporária
+                        downloads_executor.shutdown(wait=True)
+                        shutil.rmtree(pasta_temp, ignore_errors=True)
+                        
+                        update_status("idle", None, 100 if total_status_items else 0)
+                        registrar_status_log(f"Processamento concluido: {len(arquivos_processados_agora)} arquivo(s)")
+                        print(f"\n✅ Processamento concluído!")
+                        print(f"📊 Novos processados: {len(arquivos_processados_agora)}")
+                        total_ids, total_nomes = historico.totais()
+                        print(f"📝 Total no histórico: {total_ids} IDs / {total_nomes} Nomes")
+                            
                     except Exception as e:
-                        print(f"⚠️ Erro ao enviar para Sheets: {e}")
+                        update_status("error", "Erro durante processamento", None)
+                        print(f"❌ Erro durante processamento: {e}")
+                        traceback.print_exc()
+                        print("🔄 Continuando monitoramento...")
                 
+            except KeyboardInterrupt:
+                raise
             except Exception as e:
-                print(f"❌ ERRO ao processar página {pagina_num}: {e}")
-                continue
-        
-        # 5️⃣ RESUMO FINAL
-        print(f"\n{'='*80}")
-        print("📊 RESUMO DO PROCESSAMENTO")
-        # 🆕 RESUMO FINAL COMPACTO
-        print(f"\n{'='*80}")
-        print(f"📄 PDF: {os.path.basename(pdf_path)}")
-        print(f"{'='*80}")
-        print(f"📋 Total de páginas: {len(imagens_paginas)}")
-        print(f"✅ Cartões processados: {len(resultados_todos)}/{len(cartoes_alunos)}")
-        
-        if len(resultados_todos) > 0:
-            media_acertos = sum(r['resultado']['acertos'] for r in resultados_todos) / len(resultados_todos)
-            media_erros = sum(r['resultado']['erros'] for r in resultados_todos) / len(resultados_todos)
-            media_percentual = sum(r['resultado']['percentual'] for r in resultados_todos) / len(resultados_todos)
-            
-            print(f"\n📊 ESTATÍSTICAS:")
-            print(f"   Média de acertos: {media_acertos:.1f}/{num_questoes}")
-            print(f"   Média de erros: {media_erros:.1f}/{num_questoes}")
-            print(f"   Média geral: {media_percentual:.1f}%")
-        
-        print(f"{'='*80}")
-        
-        # 6️⃣ LIMPAR ARQUIVOS TEMPORÁRIOS
-        print(f"\n🧹 Limpando arquivos temporários...")
-        for img in imagens_paginas:
-            try:
-                if os.path.exists(img):
-                    os.remove(img)
-            except:
-                pass
-        
-        print("✅ Processamento concluído!")
-        return resultados_todos
-        
-    except Exception as e:
-        print(f"❌ ERRO CRÍTICO: {e}")
-        import traceback
-        traceback.print_exc()
-        return []
-
+                print(f"❌ Erro no processamento do lote: {e}")
+                traceback.print_exc()
+                print("🔄 Continuando monitoramento...")
+            finally:
+                # Lote concluído (processados já estão no histórico)
+                with lock_andamento:
+                    em_andamento.difference_update(cartao['id'] for cartao in novos_cartoes)
+                
+    except KeyboardInterrupt:
+        update_status("idle", None, 0)
+        print("\n\n🛑 Monitoramento interrompido pelo usuário")
+        print(f"Total de verificações realizadas: {contador_verificacoes}")
+    finally:
+        historico.fechar()
 
-# ===========================================
-# EXECUÇÃO PRINCIPAL
-# ===========================================
 
-if __name__ == "__main__":
+def main(argv: Optional[List[str]] = None):
+    """
+    Ponto de entrada da linha de comando.
+    
+    Args:
+        argv: Argumentos (None = sys.argv); permite chamar o script a partir
+            de outro código sem que importar o módulo leia a linha de comando
+    """
+    global PERSPECTIVA_HABILITADA, FORCAR_REPROCESSAMENTO, BAIXA_MEMORIA
+    
     parser = argparse.ArgumentParser(
         description="Sistema automatizado de correção de cartões resposta com Vultr S3 e Google Sheets."
     )
@@ -6051,7 +8280,7 @@ if __name__ == "__main__":
         "--intervalo",
         type=int,
         default=5,
-        help="Intervalo de verificação em minutos para modo monitor (padrão: 5)"
+        help="Intervalo inicial de verificação em minutos para modo monitor; aumenta sem novidades e diminui quando chegam cartões (padrão: 5)"
     )
     parser.add_argument(
         "--converter-pb",
@@ -6072,6 +8301,17 @@ if __name__ == "__main__":
         help="Desativa a correção automática de perspectiva no pré-processamento"
     )
     parser.set_defaults(usar_perspectiva=True)
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Ignora o cache de resultados e reprocessa todos os alunos"
+    )
+    parser.add_argument(
+        "--low-memory",
+        dest="baixa_memoria",
+        action="store_true",
+        help="PDFs com várias páginas: grava as páginas em PNG temporários em vez de mantê-las em memória"
+    )
     parser.add_argument(
         "--threshold",
         type=int,
@@ -6098,8 +8338,10 @@ if __name__ == "__main__":
         help="🆕 Processa PDF com múltiplas páginas (cada página = 1 cartão). Ex: --pdf-multiplo cartoes_turma.pdf"
     )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     PERSPECTIVA_HABILITADA = args.usar_perspectiva
+    FORCAR_REPROCESSAMENTO = args.force
+    BAIXA_MEMORIA = args.baixa_memoria
 
     backend_client = None
     if create_backend_sync_client_from_env:
@@ -6116,7 +8358,6 @@ if __name__ == "__main__":
     enviar_para_sheets = True
     debug_mode = args.debug
     mover_processados = True
-    manter_temp = False
     
     # Configurações de conversão P&B
     converter_pb = args.converter_pb
@@ -6175,6 +8416,13 @@ if __name__ == "__main__":
             except Exception as e:
                 print(f"⚠️ Entrada Google Drive desativada: {e}")
 
+    if "pasta_local" in origens_configuradas:
+        try:
+            storage_local = PastaLocalStorage.from_env()
+            storages_entrada[storage_local.source_name] = storage_local
+        except Exception as e:
+            print(f"⚠️ Entrada pasta local desativada: {e}")
+
     if not storages_entrada:
         print("❌ ERRO: Nenhuma origem de cartões foi configurada")
         exit(1)
@@ -6237,819 +8485,18 @@ if __name__ == "__main__":
 
     # Modo especial: monitoramento contínuo
     if args.monitor:
-        print("=" * 60)
-        print("🤖 MODO MONITORAMENTO CONTÍNUO ATIVADO - SISTEMA AUTOMATIZADO")
-        print(f"⏰ Intervalo: {args.intervalo} minutos")
-        print(f"🪣 Bucket: {storage_s3.config.bucket}")
-        print(f"📂 Prefixo de ORIGEM (upload): {storage_s3.config.prefixo_upload or '(raiz)'}")
-        print(f"📡 Origens monitoradas: {', '.join(storages_entrada)}")
-        print(f"🗄️ Sync Banco: {'ATIVADO' if backend_client else 'DESATIVADO'}")
-        print("✨ Sistema detectará automaticamente o ano de cada cartão")
-        print("💡 Pressione Ctrl+C para parar")
-        print("=" * 60)
-        reset_session()
-        
-        import time
-        import json
-        from datetime import datetime
-        
-        # Arquivo para rastrear arquivos já processados por ID e NOME
-        historico_file = "historico_monitoramento.json"
-        
-        def carregar_historico():
-            """Carrega IDs e nomes (sem extensão) dos arquivos já processados"""
-            try:
-                if os.path.exists(historico_file):
-                    with open(historico_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        # Migração: se formato antigo (lista), converter para novo formato
-                        arquivos = data.get('arquivos_processados', [])
-                        if arquivos and isinstance(arquivos[0], str):
-                            # Formato antigo: apenas IDs
-                            return {'ids': set(arquivos), 'nomes': set()}
-                        else:
-                            # Formato novo: dicionário com ID e nome
-                            ids = set(item['id'] for item in arquivos)
-                            nomes = set(item['nome_sem_ext'] for item in arquivos)
-                            return {'ids': ids, 'nomes': nomes}
-            except Exception as e:
-                print(f"⚠️ Erro ao carregar histórico: {e}")
-            return {'ids': set(), 'nomes': set()}
-        
-        def salvar_historico(arquivos_processados):
-            """Salva IDs e nomes dos arquivos processados"""
-            try:
-                data = {
-                    'ultima_verificacao': datetime.now().isoformat(),
-                    'total_processados': len(arquivos_processados),
-                    'arquivos_processados': arquivos_processados
-                }
-                with open(historico_file, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
-            except Exception as e:
-                print(f"⚠️ Erro ao salvar histórico: {e}")
-        
-        def verificar_novos_arquivos():
-            """Verifica se há NOVOS arquivos para processar (por ID e NOME)"""
-            try:
-                arquivos = []
-                for nome_origem, storage in storages_entrada.items():
-                    try:
-                        arquivos_origem = storage.listar_uploads()
-                        cartoes_origem = [
-                            arquivo
-                            for arquivo in arquivos_origem
-                            if arquivo["name"].lower().endswith(
-                                (".pdf", ".png", ".jpg", ".jpeg")
-                            )
-                            and "gabarito" not in arquivo["name"].lower()
-                        ]
-                        arquivos.extend(cartoes_origem)
-                        print(
-                            f"\n📂 Cartões em {nome_origem}: "
-                            f"{len(cartoes_origem)}"
-                        )
-                    except Exception as e:
-                        print(f"⚠️ Falha ao consultar {nome_origem}: {e}")
-
-                gabaritos_s3 = storage_s3.listar_gabaritos()
-                historico = carregar_historico()
-                ids_processados = historico['ids']
-                nomes_processados = historico['nomes']
-                
-                # 🆕 DEBUG: Mostrar TODOS os arquivos encontrados
-                for arq in arquivos:
-                    nome = arq['name']
-                    arquivo_id = arq['id']
-                    origem = arq['source']
-                    nome_sem_ext = os.path.splitext(nome)[0].lower()
-                    
-                    # Verificar duplicata por ID ou NOME
-                    ja_processado_id = arquivo_id in ids_processados
-                    ja_processado_nome = nome_sem_ext in nomes_processados
-                    
-                    if ja_processado_id or ja_processado_nome:
-                        motivo = "ID" if ja_processado_id else "NOME"
-                        print(f"   ✅ PROCESSADO ({motivo}) | [{origem}] {nome}")
-                    else:
-                        print(f"   🆕 NOVO | [{origem}] {nome}")
-                
-                novos_cartoes = []
-                tem_gabarito = bool(gabaritos_s3)
-
-                for gabarito in gabaritos_s3:
-                    print(f"📋 Gabarito detectado: {gabarito['name']}")
-                
-                for arquivo in arquivos:
-                    arquivo_id = arquivo['id']
-                    nome = arquivo['name']
-                    nome_lower = nome.lower()
-                    nome_sem_ext = os.path.splitext(nome)[0].lower()
-                    
-                    # Verificar se é um cartão de aluno NOVO (por ID E NOME)
-                    if any(ext in nome_lower for ext in ['.pdf', '.png', '.jpg', '.jpeg']):
-                        # Duplicata por ID?
-                        if arquivo_id in ids_processados:
-                            print(f"   ⏭️ Ignorado (ID duplicado): {nome}")
-                            continue
-                        
-                        # Duplicata por NOME?
-                        if nome_sem_ext in nomes_processados:
-                            print(f"   ⏭️ Ignorado (NOME duplicado): {nome}")
-                            print(f"      ⚠️ Arquivo com mesmo nome já foi processado (mesmo com extensão diferente)")
-                            continue
-                        
-                        # É NOVO!
-                        tipo = "📄 PDF" if nome_lower.endswith('.pdf') else "🖼️ Imagem"
-                        print(
-                            f"   {tipo} NOVO detectado em "
-                            f"{arquivo['source']}: {nome}"
-                        )
-                        novos_cartoes.append(arquivo)
-                
-                if not tem_gabarito and novos_cartoes:
-                    print("⚠️ Novos cartões encontrados mas GABARITO não está no Vultr S3!")
-                    return [], historico
-                
-                print(f"\n📊 Resumo:")
-                print(f"   Total na pasta: {len(arquivos)}")
-                print(f"   Já processados (IDs): {len(ids_processados)}")
-                print(f"   Já processados (Nomes): {len(nomes_processados)}")
-                print(f"   Gabarito: {'✅ Encontrado' if tem_gabarito else '❌ Não encontrado'}")
-                print(f"   Novos a processar: {len(novos_cartoes)}")
-                
-                return novos_cartoes, historico
-                
-            except Exception as e:
-                print(f"❌ Erro ao verificar arquivos: {e}")
-                import traceback
-                traceback.print_exc()
-                return [], {'ids': set(), 'nomes': set()}
-        
-        # Loop de monitoramento
-        contador_verificacoes = 0
-        try:
-            while True:
-                try:
-                    contador_verificacoes += 1
-                    timestamp = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-                    print(f"\n🔍 Verificação #{contador_verificacoes} - {timestamp}")
-                    
-                    # Verificar NOVOS cartões (por ID e NOME)
-                    novos_cartoes, historico = verificar_novos_arquivos()
-                    
-                    if novos_cartoes:
-                        print(f"🆕 Encontrados {len(novos_cartoes)} NOVOS cartões!")
-                        for arquivo in novos_cartoes:
-                            print(f"   -> {arquivo['name']} ")
-                        
-                        # Processar APENAS os novos cartões
-                        print("🚀 Processando APENAS os novos cartões...")
-                        update_status("running", "Preparando processamento", 0)
-                        registrar_status_log(f"Iniciando processamento de {len(novos_cartoes)} cartao(s)")
-                        try:
-                            # Imports necessários
-                            import tempfile
-                            import shutil
-                            
-                            # Configurar serviços
-                            if usar_gemini:
-                                model_gemini = configurar_gemini()
-                            else:
-                                model_gemini = None
-                            
-                            if enviar_para_sheets:
-                                client = configurar_google_sheets()
-                            else:
-                                client = None
-                            
-                            # Pasta temporária
-                            pasta_temp = tempfile.mkdtemp(prefix="cartoes_novos_")
-                            print(f"📁 Pasta temporária: {pasta_temp}")
-                            
-                            # 1. Carregar os quatro gabaritos automaticamente
-                            print(f"\n{'='*80}")
-                            print("📚 CARREGANDO GABARITOS AUTOMATICAMENTE")
-                            print(f"{'='*80}")
-
-                            gabaritos_dict = carregar_gabaritos_do_s3(
-                                storage_s3,
-                                pasta_temp,
-                                debug=debug_mode,
-                            )
-
-                            if any(ano not in gabaritos_dict for ano in ANOS_ESCOLARES):
-                                print("\n❌ ERRO: Os quatro gabaritos são necessários!")
-                                continue
-                            
-                            print(f"\n✅ OS QUATRO GABARITOS FORAM CARREGADOS COM SUCESSO!")
-                            print(f"{'='*80}")
-                            
-                            # 2. Processar cada cartão NOVO (separar PDFs de imagens)
-                            arquivos_processados_agora = []  # Lista de {id, nome_sem_ext}
-                            pdfs_para_processar = []
-                            imagens_para_processar = []
-                            
-                            # Separar PDFs de imagens
-                            for cartao_info in novos_cartoes:
-                                nome = cartao_info['name'].lower()
-                                if nome.endswith('.pdf'):
-                                    pdfs_para_processar.append(cartao_info)
-                                elif nome.endswith(('.png', '.jpg', '.jpeg')):
-                                    imagens_para_processar.append(cartao_info)
-
-                            total_status_items = len(pdfs_para_processar) + len(imagens_para_processar)
-                            itens_status_processados = 0
-                            
-                            print(f"\n📊 Arquivos detectados:")
-                            print(f"   📄 PDFs: {len(pdfs_para_processar)}")
-                            print(f"   🖼️ Imagens: {len(imagens_para_processar)}")
-                            
-                            # ═══════════════════════════════════════════════════
-                            # PROCESSAR PDFs (MÚLTIPLAS PÁGINAS)
-                            # ═══════════════════════════════════════════════════
-                            if pdfs_para_processar:
-                                print(f"\n{'='*80}")
-                                print(f"📄 PROCESSANDO {len(pdfs_para_processar)} PDF(s) COM MÚLTIPLAS PÁGINAS")
-                                print(f"{'='*80}")
-                                
-                                from pdf_processor_simple import process_pdf_all_pages
-                                
-                                for pdf_idx, pdf_info in enumerate(pdfs_para_processar, 1):
-                                    try:
-                                        print(f"\n📄 [{pdf_idx}/{len(pdfs_para_processar)}] {pdf_info['name']}")
-                                        update_status(
-                                            "running",
-                                            pdf_info['name'],
-                                            int((itens_status_processados / max(total_status_items, 1)) * 100)
-                                        )
-                                        
-                                        # Baixar PDF da origem em que ele foi encontrado
-                                        pdf_path = os.path.join(pasta_temp, pdf_info['name'])
-                                        storage_origem = storages_entrada[pdf_info['source']]
-                                        storage_origem.baixar(
-                                            pdf_info['storage_id'],
-                                            pdf_path,
-                                        )
-                                        
-                                        print(f"✅ PDF baixado: {pdf_info['name']}")
-                                        
-                                        # Converter TODAS as páginas para PNG
-                                        print(f"🔄 Convertendo páginas do PDF para PNG...")
-                                        imagens_paginas = process_pdf_all_pages(pdf_path, keep_temp_files=True)
-                                        
-                                        if not imagens_paginas:
-                                            print(f"❌ Nenhuma página convertida do PDF")
-                                            itens_status_processados += 1
-                                            update_status(
-                                                "running",
-                                                pdf_info['name'],
-                                                int((itens_status_processados / max(total_status_items, 1)) * 100)
-                                            )
-                                            continue
-                                        
-                                        print(f"✅ {len(imagens_paginas)} páginas convertidas!")
-                                        total_status_items += max(0, len(imagens_paginas) - 1)
-                                        
-                                        # Converter para P&B
-                                        print(f"🎨 Convertendo para P&B...")
-                                        for img_idx, img_path in enumerate(imagens_paginas, 1):
-                                            try:
-                                                img_pb_path = converter_para_preto_e_branco(
-                                                    img_path,
-                                                    threshold=threshold_pb,
-                                                    salvar=True
-                                                )
-                                                if img_pb_path and os.path.exists(img_pb_path):
-                                                    os.remove(img_path)
-                                                    os.rename(img_pb_path, img_path)
-                                            except Exception as e:
-                                                print(f"   ⚠️ Erro ao converter página {img_idx}: {e}")
-                                        
-                                        print(f"✅ Todas as páginas prontas!")
-                                        
-                                        # Rastreia os anos das paginas para escolher o destino do PDF.
-                                        anos_detectados = []
-                                        
-                                        # Processar CADA página como um aluno
-                                        print(f"\n{'─'*60}")
-                                        print(f"👥 Processando {len(imagens_paginas)} alunos do PDF")
-                                        print(f"{'─'*60}")
-                                        
-                                        for pagina_idx, pagina_img in enumerate(imagens_paginas, 1):
-                                            nome_pagina_status = f"{pdf_info['name']} - pagina {pagina_idx}/{len(imagens_paginas)}"
-                                            try:
-                                                print(f"\n🔄 Página {pagina_idx}/{len(imagens_paginas)}")
-                                                update_status(
-                                                    "running",
-                                                    nome_pagina_status,
-                                                    int((itens_status_processados / max(total_status_items, 1)) * 100)
-                                                )
-                                                
-                                                # 🆕 Normalizar CADA página do PDF (perspectiva condicional + deskew)
-                                                pagina_img_proc = preprocessar_arquivo(
-                                                    pagina_img,
-                                                    f"aluno_pdf_{pagina_idx}",
-                                                    debug=debug_mode
-                                                )
-                                                
-                                                # 🆕 USAR EXTRAÇÃO OTIMIZADA (1 chamada única ao Gemini)
-                                                ano_escolar_pagina = None
-                                                num_questoes_pagina = None
-                                                dados_aluno = None
-                                                
-                                                # PRIORIDADE 1: Tentar Gemini primeiro
-                                                if model_gemini:
-                                                    dados_completos = extrair_dados_completos_com_gemini(
-                                                        model_gemini,
-                                                        pagina_img_proc,
-                                                        nome_arquivo=pdf_info['name']
-                                                    )
-                                                    if dados_completos:
-                                                        dados_aluno = dados_completos
-                                                        ano_escolar_pagina = dados_completos.get('ano_escolar')
-                                                        if ano_escolar_pagina:
-                                                            num_questoes_pagina = QUESTOES_POR_ANO[ano_escolar_pagina]
-                                                            print(
-                                                                f"   ✅ Gemini detectou: "
-                                                                f"{rotulo_ano(ano_escolar_pagina)} "
-                                                                f"({num_questoes_pagina} questões)"
-                                                            )
-                                                
-                                                # FALLBACK: Se Gemini falhar, usar OCR direto
-                                                if not ano_escolar_pagina:
-                                                    print(f"   ⚠️ Gemini falhou - usando OCR como fallback")
-                                                    print(f"   💡 A pasta de destino será definida pela MAIORIA de ocorrências")
-                                                    ano_escolar_pagina = detectar_ano_com_ocr_direto(
-                                                        pagina_img_proc,
-                                                        debug=debug_mode,
-                                                    )
-                                                    if ano_escolar_pagina:
-                                                        num_questoes_pagina = QUESTOES_POR_ANO[ano_escolar_pagina]
-                                                        print(
-                                                            f"   📊 OCR detectou: "
-                                                            f"{rotulo_ano(ano_escolar_pagina)} "
-                                                            f"({num_questoes_pagina} questões)"
-                                                        )
-                                                
-                                                # Se dados do aluno não foram extraídos, usar OCR
-                                                if not dados_aluno:
-                                                    dados_aluno = extrair_cabecalho_com_ocr_fallback(pagina_img_proc)
-
-                                                if not ano_escolar_pagina and dados_aluno:
-                                                    ano_escolar_pagina = detectar_ano_por_turma(
-                                                        dados_aluno.get("turma", "")
-                                                    )
-                                                    num_questoes_pagina = numero_questoes_por_ano(
-                                                        ano_escolar_pagina
-                                                    )
-                                                
-                                                if not dados_aluno or dados_aluno.get("aluno") == "N/A":
-                                                    dados_aluno = {
-                                                        "escola": "N/A",
-                                                        "aluno": f"{os.path.splitext(pdf_info['name'])[0]}_pag{pagina_idx}",
-                                                        "turma": "N/A",
-                                                        "nascimento": "N/A"
-                                                    }
-
-                                                if not ano_escolar_pagina:
-                                                    print("   ❌ Ano escolar não identificado; página ignorada")
-                                                    itens_status_processados += 1
-                                                    continue
-                                                
-                                                print(f"   🔍 DEBUG - Dados extraídos: Escola={dados_aluno.get('escola')}, Aluno={dados_aluno.get('aluno')}, Turma={dados_aluno.get('turma')}, Nasc={dados_aluno.get('nascimento')}, Ano={ano_escolar_pagina}, Questões={num_questoes_pagina}")
-                                                
-                                                print(f"   📁 Destino: Pasta {rotulo_ano(ano_escolar_pagina)}")
-                                                
-                                                anos_detectados.append(ano_escolar_pagina)
-                                                
-                                                respostas_gabarito_correto = gabaritos_dict.get(ano_escolar_pagina)
-                                                if not respostas_gabarito_correto:
-                                                    print(f"   ❌ {nome_gabarito(ano_escolar_pagina)} não disponível!")
-                                                    itens_status_processados += 1
-                                                    update_status(
-                                                        "running",
-                                                        nome_pagina_status,
-                                                        int((itens_status_processados / max(total_status_items, 1)) * 100)
-                                                    )
-                                                    continue
-                                                
-                                                # Detectar respostas (usando número detectado para esta página)
-                                                respostas_aluno = detectar_respostas_por_tipo(
-                                                    pagina_img_proc, 
-                                                    num_questoes=num_questoes_pagina, 
-                                                    debug=debug_mode
-                                                )
-                                                
-                                                questoes_detectadas = sum(1 for r in respostas_aluno if r != '?')
-                                                
-                                                # Verificar detecção mínima
-                                                if questoes_detectadas < num_questoes_pagina * 0.5:
-                                                    print(f"   ⚠️ Poucas questões detectadas ({questoes_detectadas}/{num_questoes_pagina}) - IGNORADO")
-                                                    itens_status_processados += 1
-                                                    update_status(
-                                                        "running",
-                                                        nome_pagina_status,
-                                                        int((itens_status_processados / max(total_status_items, 1)) * 100)
-                                                    )
-                                                    continue
-                                                
-                                                # Comparar com gabarito correto
-                                                resultado = comparar_respostas(respostas_gabarito_correto, respostas_aluno)
-                                                
-                                                # Exibir resumo formatado com respostas do aluno
-                                                print(f"\n{'─'*60}")
-                                                print(f"👤 {dados_aluno.get('aluno', 'N/A')}")
-                                                print(f"📚 Turma: {dados_aluno.get('turma', 'N/A')} | Escola: {dados_aluno.get('escola', 'N/A')}")
-                                                print(f"✅ Acertos: {resultado['acertos']}")
-                                                print(f"❌ Erros: {resultado['erros']}")
-                                                if resultado.get('anuladas', 0) > 0:
-                                                    print(f"⊘ Questões anuladas: {resultado['anuladas']}")
-                                                print(f"📊 Percentual: {resultado['percentual']:.1f}%")
-                                                
-                                                # Exibir respostas do aluno
-                                                print(f"\n📝 Respostas:")
-                                                exibir_gabarito_simples(respostas_aluno)
-                                                print(f"{'─'*60}")
-                                                
-                                                if client:
-                                                    dados_envio = {
-                                                        "Escola": dados_aluno.get("escola", "N/A"),
-                                                        "Aluno": dados_aluno.get("aluno", "N/A"),
-                                                        "Nascimento": dados_aluno.get("nascimento", "N/A"),
-                                                        "Turma": dados_aluno.get("turma", "N/A")
-                                                    }
-                                                    enviar_para_planilha(
-                                                        client,
-                                                        dados_envio,
-                                                        resultado,
-                                                        questoes_detectadas=questoes_detectadas,
-                                                        ano_escolar=ano_escolar_pagina,
-                                                    )
-
-                                                enviar_resultado_para_backend(
-                                                    backend_client=backend_client,
-                                                    file_name=f"{pdf_info['name']}#pagina_{pagina_idx}",
-                                                    dados_aluno=dados_aluno,
-                                                    respostas_aluno=respostas_aluno,
-                                                    resultado=resultado,
-                                                    ano_escolar=ano_escolar_pagina,
-                                                )
-                                                itens_status_processados += 1
-                                                record_correction(
-                                                    nome_pagina_status,
-                                                    file=nome_pagina_status,
-                                                    progress=int((itens_status_processados / max(total_status_items, 1)) * 100)
-                                                )
-                                                
-                                            except Exception as e:
-                                                print(f"   ❌ Erro na página {pagina_idx}: {e}")
-                                                itens_status_processados += 1
-                                                update_status(
-                                                    "running",
-                                                    nome_pagina_status,
-                                                    int((itens_status_processados / max(total_status_items, 1)) * 100)
-                                                )
-                                        
-                                        # Limpar imagens temporárias do PDF
-                                        
-                                        if not anos_detectados:
-                                            print("\n⚠️ PDF sem páginas com ano identificado; arquivo não será movido")
-                                            itens_status_processados += 1
-                                            continue
-                                        elif len(set(anos_detectados)) == 1:
-                                            ano_escolar_pdf = anos_detectados[0]
-                                            print(
-                                                f"\n📁 PDF será movido para: "
-                                                f"{rotulo_ano(ano_escolar_pdf)} "
-                                                f"(todas as páginas são do mesmo ano)"
-                                            )
-                                        else:
-                                            from collections import Counter
-
-                                            contagem_anos = Counter(anos_detectados)
-                                            ano_escolar_pdf, quantidade_maioria = contagem_anos.most_common(1)[0]
-                                            resumo = ", ".join(
-                                                f"{rotulo_ano(ano)}: {quantidade}"
-                                                for ano, quantidade in contagem_anos.items()
-                                            )
-                                            print(
-                                                f"\n📁 PDF misto será movido para "
-                                                f"{rotulo_ano(ano_escolar_pdf)} "
-                                                f"(maioria de {quantidade_maioria}; {resumo})"
-                                            )
-
-                                        num_questoes_pdf = QUESTOES_POR_ANO[ano_escolar_pdf]
-                                        
-                                        # Marcar PDF como processado (ID + NOME + PASTA DESTINO)
-                                        nome_sem_ext = os.path.splitext(pdf_info['name'])[0].lower()
-                                        arquivos_processados_agora.append({
-                                            'id': pdf_info['id'],
-                                            'storage_id': pdf_info['storage_id'],
-                                            'source': pdf_info['source'],
-                                            'nome_sem_ext': nome_sem_ext,
-                                            'nome_original': pdf_info['name'],
-                                            'num_questoes': num_questoes_pdf,
-                                            'ano_escolar': ano_escolar_pdf,
-                                        })
-                                        print(f"\n✅ PDF processado: {pdf_info['name']}")
-                                        
-                                    except Exception as e:
-                                        print(f"   ❌ Erro ao processar PDF: {e}")
-                                        itens_status_processados += 1
-                                        update_status(
-                                            "running",
-                                            pdf_info['name'],
-                                            int((itens_status_processados / max(total_status_items, 1)) * 100)
-                                        )
-                                        import traceback
-                                        traceback.print_exc()
-                            
-                            # ═══════════════════════════════════════════════════
-                            # PROCESSAR IMAGENS (PÁGINA ÚNICA)
-                            # ═══════════════════════════════════════════════════
-                            if imagens_para_processar:
-                                print(f"\n{'='*80}")
-                                print(f"🖼️ PROCESSANDO {len(imagens_para_processar)} IMAGEM(NS)")
-                                print(f"{'='*80}")
-                                
-                                for img_idx, cartao_info in enumerate(imagens_para_processar, 1):
-                                    nome_imagem_status = cartao_info['name']
-                                    try:
-                                        print(f"\n🔄 [{img_idx}/{len(imagens_para_processar)}] {cartao_info['name']}")
-                                        update_status(
-                                            "running",
-                                            nome_imagem_status,
-                                            int((itens_status_processados / max(total_status_items, 1)) * 100)
-                                        )
-                                        
-                                        # Baixar imagem da origem em que ela foi encontrada
-                                        cartao_path = os.path.join(pasta_temp, cartao_info['name'])
-                                        storage_origem = storages_entrada[cartao_info['source']]
-                                        storage_origem.baixar(
-                                            cartao_info['storage_id'],
-                                            cartao_path,
-                                        )
-                                        
-                                        # Converter para P&B se habilitado
-                                        if converter_pb:
-                                            cartao_path = converter_para_preto_e_branco(cartao_path, threshold=threshold_pb, salvar=True)
-                                        
-                                        # Processar cartão
-                                        aluno_img = preprocessar_arquivo(cartao_path, f"aluno_{img_idx}", debug=debug_mode)
-                                        
-                                        # 🆕 USAR EXTRAÇÃO OTIMIZADA (1 chamada única ao Gemini)
-                                        ano_escolar_aluno = None
-                                        num_questoes_aluno = None
-                                        dados_aluno = None
-                                        
-                                        # PRIORIDADE 1: Tentar Gemini primeiro
-                                        if model_gemini:
-                                            dados_completos = extrair_dados_completos_com_gemini(
-                                                model_gemini, 
-                                                aluno_img,
-                                                nome_arquivo=cartao_info['name']
-                                            )
-                                            if dados_completos:
-                                                dados_aluno = dados_completos
-                                                ano_escolar_aluno = dados_completos.get('ano_escolar')
-                                                if ano_escolar_aluno:
-                                                    num_questoes_aluno = QUESTOES_POR_ANO[ano_escolar_aluno]
-                                                    print(
-                                                        f"   ✅ Gemini detectou: "
-                                                        f"{rotulo_ano(ano_escolar_aluno)} "
-                                                        f"({num_questoes_aluno} questões)"
-                                                    )
-                                        
-                                        # FALLBACK: Se Gemini falhar, usar OCR direto
-                                        if not ano_escolar_aluno:
-                                            print(f"   ⚠️ Gemini falhou - usando OCR como fallback")
-                                            print(f"   💡 A pasta de destino será definida corretamente")
-                                            ano_escolar_aluno = detectar_ano_com_ocr_direto(
-                                                aluno_img,
-                                                debug=debug_mode,
-                                            )
-                                            if ano_escolar_aluno:
-                                                num_questoes_aluno = QUESTOES_POR_ANO[ano_escolar_aluno]
-                                                print(
-                                                    f"   📊 OCR detectou: "
-                                                    f"{rotulo_ano(ano_escolar_aluno)} "
-                                                    f"({num_questoes_aluno} questões)"
-                                                )
-                                        
-                                        # Se dados do aluno não foram extraídos, usar OCR
-                                        if not dados_aluno:
-                                            dados_aluno = extrair_cabecalho_com_ocr_fallback(aluno_img)
-
-                                        if not ano_escolar_aluno and dados_aluno:
-                                            ano_escolar_aluno = detectar_ano_por_turma(
-                                                dados_aluno.get("turma", "")
-                                            )
-                                            num_questoes_aluno = numero_questoes_por_ano(
-                                                ano_escolar_aluno
-                                            )
-                                        
-                                        if not dados_aluno or dados_aluno.get("aluno") == "N/A":
-                                            dados_aluno = {
-                                                "escola": "N/A",
-                                                "aluno": os.path.splitext(cartao_info['name'])[0],
-                                                "turma": "N/A",
-                                                "nascimento": "N/A"
-                                            }
-
-                                        if not ano_escolar_aluno:
-                                            print("   ❌ Ano escolar não identificado; cartão ignorado")
-                                            itens_status_processados += 1
-                                            continue
-                                        
-                                        print(f"   🔍 DEBUG - Dados extraídos: Escola={dados_aluno.get('escola')}, Aluno={dados_aluno.get('aluno')}, Turma={dados_aluno.get('turma')}, Nasc={dados_aluno.get('nascimento')}, Ano={ano_escolar_aluno}, Questões={num_questoes_aluno}")
-                                        
-                                        print(
-                                            f"   📁 Destino: Pasta {rotulo_ano(ano_escolar_aluno)} "
-                                            f"({num_questoes_aluno} questões)"
-                                        )
-                                        
-                                        # Detectar respostas (usando número detectado)
-                                        respostas_aluno = detectar_respostas_por_tipo(aluno_img, num_questoes=num_questoes_aluno, debug=debug_mode)
-                                        questoes_detectadas = sum(1 for r in respostas_aluno if r != '?')
-                                        
-                                        # 🆕 COMPARAR COM O GABARITO CORRETO
-                                        respostas_gabarito_correto = gabaritos_dict.get(ano_escolar_aluno)
-                                        if not respostas_gabarito_correto:
-                                            print(f"   ❌ {nome_gabarito(ano_escolar_aluno)} não disponível!")
-                                            itens_status_processados += 1
-                                            update_status(
-                                                "running",
-                                                nome_imagem_status,
-                                                int((itens_status_processados / max(total_status_items, 1)) * 100)
-                                            )
-                                            continue
-                                        
-                                        resultado = comparar_respostas(respostas_gabarito_correto, respostas_aluno)
-                                        
-                                        # Exibir resumo formatado
-                                        print(f"\n{'─'*60}")
-                                        print(f"👤 {dados_aluno.get('aluno', 'N/A')}")
-                                        print(f"📚 Turma: {dados_aluno.get('turma', 'N/A')} | Escola: {dados_aluno.get('escola', 'N/A')}")
-                                        print(f"✅ Acertos: {resultado['acertos']}")
-                                        print(f"❌ Erros: {resultado['erros']}")
-                                        if resultado.get('anuladas', 0) > 0:
-                                            print(f"⊘ Questões anuladas: {resultado['anuladas']}")
-                                        print(f"📊 Percentual: {resultado['percentual']:.1f}%")
-                                        
-                                        # Exibir respostas do aluno
-                                        print(f"\n📝 Respostas:")
-                                        exibir_gabarito_simples(respostas_aluno)
-                                        print(f"{'─'*60}")
-                                        
-                                        # Enviar para Google Sheets
-                                        if client:
-                                            dados_envio = {
-                                                "Escola": dados_aluno.get("escola", "N/A"),
-                                                "Aluno": dados_aluno.get("aluno", "N/A"),
-                                                "Nascimento": dados_aluno.get("nascimento", "N/A"),
-                                                "Turma": dados_aluno.get("turma", "N/A")
-                                            }
-                                            enviar_para_planilha(
-                                                client,
-                                                dados_envio,
-                                                resultado,
-                                                questoes_detectadas=questoes_detectadas,
-                                                ano_escolar=ano_escolar_aluno,
-                                            )
-
-                                        enviar_resultado_para_backend(
-                                            backend_client=backend_client,
-                                            file_name=cartao_info['name'],
-                                            dados_aluno=dados_aluno,
-                                            respostas_aluno=respostas_aluno,
-                                            resultado=resultado,
-                                            ano_escolar=ano_escolar_aluno,
-                                        )
-                                        itens_status_processados += 1
-                                        record_correction(
-                                            nome_imagem_status,
-                                            file=nome_imagem_status,
-                                            progress=int((itens_status_processados / max(total_status_items, 1)) * 100)
-                                        )
-                                        
-                                        # Marcar como processado (ID + NOME + PASTA DESTINO)
-                                        nome_sem_ext = os.path.splitext(cartao_info['name'])[0].lower()
-                                        arquivos_processados_agora.append({
-                                            'id': cartao_info['id'],
-                                            'storage_id': cartao_info['storage_id'],
-                                            'source': cartao_info['source'],
-                                            'nome_sem_ext': nome_sem_ext,
-                                            'nome_original': cartao_info['name'],
-                                            'num_questoes': num_questoes_aluno,
-                                            'ano_escolar': ano_escolar_aluno,
-                                        })
-                                        
-                                    except Exception as e:
-                                        print(f"   ❌ Erro: {e}")
-                                        itens_status_processados += 1
-                                        update_status(
-                                            "running",
-                                            nome_imagem_status,
-                                            int((itens_status_processados / max(total_status_items, 1)) * 100)
-                                        )
-                            
-                            # 3. Mover arquivos processados para a pasta do ano detectado.
-                            if mover_processados and arquivos_processados_agora:
-                                print(f"\n📦 Movendo {len(arquivos_processados_agora)} cartões para pastas de destino...")
-                                
-                                # 🆕 MOVER CADA ARQUIVO PARA SUA PASTA ESPECÍFICA
-                                for arquivo_proc in arquivos_processados_agora:
-                                    ano_escolar_arquivo = arquivo_proc.get('ano_escolar')
-                                    origem_arquivo = arquivo_proc['source']
-                                    storage_origem = storages_entrada[origem_arquivo]
-
-                                    print(
-                                        f"   📁 {arquivo_proc['nome_original']} → "
-                                        f"{storage_origem.destino_label(ano_escolar_arquivo)}"
-                                    )
-                                    storage_origem.mover_para_processados(
-                                        arquivo_proc['storage_id'],
-                                        ano_escolar_arquivo,
-                                    )
-                            
-                            # 4. Atualizar histórico com IDs e NOMES processados
-                            historico['ids'].update(item['id'] for item in arquivos_processados_agora)
-                            historico['nomes'].update(item['nome_sem_ext'] for item in arquivos_processados_agora)
-                            
-                            # Converter para formato de salvamento
-                            lista_para_salvar = [
-                                {
-                                    'id': arquivo_id,
-                                    'nome_sem_ext': nome_sem_ext,
-                                    'processado_em': datetime.now().isoformat()
-                                }
-                                for arquivo_id, nome_sem_ext in zip(
-                                    sorted(historico['ids']),
-                                    sorted(historico['nomes'])
-                                )
-                            ]
-                            
-                            # Reconstruir lista correta mantendo correspondência ID-Nome
-                            lista_correta = []
-                            for item in arquivos_processados_agora:
-                                lista_correta.append({
-                                    'id': item['id'],
-                                    'nome_sem_ext': item['nome_sem_ext'],
-                                    'processado_em': datetime.now().isoformat()
-                                })
-                            
-                            # Adicionar itens antigos do histórico
-                            if os.path.exists(historico_file):
-                                try:
-                                    with open(historico_file, 'r', encoding='utf-8') as f:
-                                        data_antiga = json.load(f)
-                                        arquivos_antigos = data_antiga.get('arquivos_processados', [])
-                                        if arquivos_antigos and isinstance(arquivos_antigos[0], dict):
-                                            for item_antigo in arquivos_antigos:
-                                                if item_antigo['id'] not in [x['id'] for x in lista_correta]:
-                                                    lista_correta.append(item_antigo)
-                                except:
-                                    pass
-                            
-                            salvar_historico(lista_correta)
-                            
-                            # Limpar pasta temporária
-                            shutil.rmtree(pasta_temp, ignore_errors=True)
-                            
-                            update_status("idle", None, 100 if total_status_items else 0)
-                            registrar_status_log(f"Processamento concluido: {len(arquivos_processados_agora)} arquivo(s)")
-                            print(f"\n✅ Processamento concluído!")
-                            print(f"📊 Novos processados: {len(arquivos_processados_agora)}")
-                            print(f"📝 Total no histórico: {len(historico['ids'])} IDs / {len(historico['nomes'])} Nomes")
-                                
-                        except Exception as e:
-                            update_status("error", "Erro durante processamento", None)
-                            print(f"❌ Erro durante processamento: {e}")
-                            import traceback
-                            traceback.print_exc()
-                            print("🔄 Continuando monitoramento...")
-                    else:
-                        update_status("idle", None, 0)
-                        print("� Nenhum cartão para processar")
-                    
-                    print(f"⏰ Próxima verificação em {args.intervalo} minuto(s)...")
-                    time.sleep(args.intervalo * 60)
-                    
-                except KeyboardInterrupt:
-                    raise
-                except Exception as e:
-                    print(f"❌ Erro na verificação #{contador_verificacoes}: {e}")
-                    import traceback
-                    traceback.print_exc()
-                    print(f"🔄 Continuando... próxima verificação em {args.intervalo} minutos")
-                    time.sleep(args.intervalo * 60)
-                    
-        except KeyboardInterrupt:
-            update_status("idle", None, 0)
-            print("\n\n🛑 Monitoramento interrompido pelo usuário")
-            print(f"Total de verificações realizadas: {contador_verificacoes}")
-        
+        executar_monitor(
+            args,
+            storage_s3,
+            storages_entrada,
+            backend_client=backend_client,
+            usar_gemini=usar_gemini,
+            enviar_para_sheets=enviar_para_sheets,
+            mover_processados=mover_processados,
+            converter_pb=converter_pb,
+            threshold_pb=threshold_pb,
+            debug_mode=debug_mode,
+        )
         exit(0)
 
     # 🆕 Sistema agora é totalmente automatizado via modo --monitor
@@ -7068,3 +8515,7 @@ if __name__ == "__main__":
     print("  • Mover para o prefixo correto no Vultr S3")
     print("=" * 80)
     
+
+
+if __name__ == "__main__":
+    main()
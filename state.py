@@ -3,6 +3,7 @@ import json
 import os
 import tempfile
 from datetime import datetime
+from pathlib import Path
 from typing import Optional
 
 
@@ -55,8 +56,8 @@ def _write_state(state: dict) -> None:
             json.dump(state, f, ensure_ascii=False, indent=2)
         os.replace(temp_path, STATE_FILE)
     finally:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+        # Após o os.replace o temporário já não existe: sem stat antes do unlink
+        Path(temp_path).unlink(missing_ok=True)
 
 
 def _trim_logs(state: dict) -> None:
@@ -4,15 +4,19 @@ from __future__ import annotations
 
 import json
 import os
+import threading
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
+from googleapiclient.errors import HttpError
 
 from anos_escolares import ANOS_ESCOLARES, NUMERO_POR_ANO
 
+MIME_PASTA = "application/vnd.google-apps.folder"
+CAMPOS_ARQUIVO = "id, name, mimeType, modifiedTime, size"
+
 
 @dataclass(frozen=True)
 class GoogleDriveConfig:
@@ -53,6 +57,13 @@ class GoogleDriveStorage:
     def __init__(self, config: GoogleDriveConfig, service):
         self.config = config
         self.service = service
+        # Uploads conhecidos (id -> arquivo) e token da API de mudanças: após
+        # a primeira listagem completa, cada consulta traz só o que mudou
+        self._uploads: Optional[Dict[str, Dict]] = None
+        self._token_mudancas: Optional[str] = None
+        # O transporte httplib2 do cliente não é seguro entre threads:
+        # downloads em paralelo passam pelo cliente um de cada vez
+        self._lock_http = threading.Lock()
 
     @classmethod
     def from_env(cls) -> "GoogleDriveStorage":
@@ -78,27 +89,46 @@ class GoogleDriveStorage:
         )
         return cls(config, service)
 
+    def _executar(self, requisicao):
+        with self._lock_http:
+            return requisicao.execute()
+
     def listar_uploads(self) -> List[Dict]:
-        arquivos = []
+        if self._uploads is not None and self._token_mudancas:
+            try:
+                self._aplicar_mudancas()
+                return list(self._uploads.values())
+            except HttpError:
+                # Token expirado/inválido: volta à listagem completa
+                self._uploads = None
+
+        # Token pedido antes da listagem: o que mudar durante ela é
+        # reaplicado na próxima consulta (aplicar de novo não altera nada)
+        token = self._executar(self.service.changes().getStartPageToken(
+            supportsAllDrives=True,
+        )).get("startPageToken")
+        self._uploads = self._listar_pasta_upload()
+        self._token_mudancas = token
+        return list(self._uploads.values())
+
+    def _listar_pasta_upload(self) -> Dict[str, Dict]:
+        arquivos = {}
         page_token = None
 
         while True:
-            resposta = self.service.files().list(
+            resposta = self._executar(self.service.files().list(
                 q=f"'{self.config.pasta_upload_id}' in parents and trashed = false",
-                fields=(
-                    "nextPageToken, "
-                    "files(id, name, mimeType, modifiedTime, size)"
-                ),
+                fields=f"nextPageToken, files({CAMPOS_ARQUIVO})",
                 pageSize=1000,
                 pageToken=page_token,
                 supportsAllDrives=True,
                 includeItemsFromAllDrives=True,
-            ).execute()
+            ))
 
             for item in resposta.get("files", []):
-                if item.get("mimeType") == "application/vnd.google-apps.folder":
+                if item.get("mimeType") == MIME_PASTA:
                     continue
-                arquivos.append(self._normalizar_arquivo(item))
+                arquivos[item.get("id", "")] = self._normalizar_arquivo(item)
 
             page_token = resposta.get("nextPageToken")
             if not page_token:
@@ -106,6 +136,43 @@ class GoogleDriveStorage:
 
         return arquivos
 
+    def _aplicar_mudancas(self) -> None:
+        page_token = self._token_mudancas
+
+        while page_token:
+            resposta = self._executar(self.service.changes().list(
+                pageToken=page_token,
+                spaces="drive",
+                fields=(
+                    "nextPageToken, newStartPageToken, "
+                    f"changes(fileId, removed, file({CAMPOS_ARQUIVO}, parents, trashed))"
+                ),
+                pageSize=1000,
+                supportsAllDrives=True,
+                includeItemsFromAllDrives=True,
+            ))
+
+            for mudanca in resposta.get("changes", []):
+                self._aplicar_mudanca(mudanca)
+
+            if resposta.get("newStartPageToken"):
+                self._token_mudancas = resposta["newStartPageToken"]
+            page_token = resposta.get("nextPageToken")
+
+    def _aplicar_mudanca(self, mudanca: Dict) -> None:
+        arquivo_id = mudanca.get("fileId", "")
+        item = mudanca.get("file") or {}
+        na_pasta_upload = (
+            not mudanca.get("removed")
+            and not item.get("trashed")
+            and item.get("mimeType") != MIME_PASTA
+            and self.config.pasta_upload_id in item.get("parents", [])
+        )
+        if na_pasta_upload:
+            self._uploads[arquivo_id] = self._normalizar_arquivo(item)
+        else:
+            self._uploads.pop(arquivo_id, None)
+
     def _normalizar_arquivo(self, item: Dict) -> Dict:
         arquivo_id = item.get("id", "")
         return {
@@ -119,30 +186,30 @@ class GoogleDriveStorage:
         }
 
     def baixar(self, arquivo_id: str, caminho_destino: str) -> str:
-        request = self.service.files().get_media(fileId=arquivo_id)
+        # Uma única requisição: os cartões têm poucos MB
+        conteudo = self._executar(
+            self.service.files().get_media(fileId=arquivo_id)
+        )
         with open(caminho_destino, "wb") as arquivo_local:
-            downloader = MediaIoBaseDownload(arquivo_local, request)
-            concluido = False
-            while not concluido:
-                _, concluido = downloader.next_chunk()
+            arquivo_local.write(conteudo)
         return caminho_destino
 
     def mover_para_processados(self, arquivo_id: str, ano_escolar: str) -> str:
         pasta_destino = self.config.pastas_processados[ano_escolar]
-        metadata = self.service.files().get(
+        metadata = self._executar(self.service.files().get(
             fileId=arquivo_id,
             fields="parents",
             supportsAllDrives=True,
-        ).execute()
+        ))
         pais_atuais = ",".join(metadata.get("parents", []))
 
-        self.service.files().update(
+        self._executar(self.service.files().update(
             fileId=arquivo_id,
             addParents=pasta_destino,
             removeParents=pais_atuais,
             fields="id, parents",
             supportsAllDrives=True,
-        ).execute()
+        ))
         return pasta_destino
 
     def destino_label(self, ano_escolar: str) -> str:
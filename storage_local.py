@@ -0,0 +1,137 @@
+"""Camada de entrada e arquivamento de cartões em uma pasta local (ex.: espelho rclone)."""
+
+from __future__ import annotations
+
+import mimetypes
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # Opcional: sem watchdog a pasta é apenas consultada a cada ciclo
+    FileSystemEventHandler = object
+    Observer = None
+
+
+@dataclass(frozen=True)
+class PastaLocalConfig:
+    pasta_upload: str
+    pasta_processados: str
+
+    @classmethod
+    def from_env(cls) -> "PastaLocalConfig":
+        pasta_upload = os.getenv("LOCAL_FOLDER_UPLOAD", "").strip()
+        if not pasta_upload:
+            raise RuntimeError("LOCAL_FOLDER_UPLOAD não configurado")
+        if not os.path.isdir(pasta_upload):
+            raise RuntimeError(f"LOCAL_FOLDER_UPLOAD não é uma pasta: {pasta_upload}")
+
+        pasta_processados = (
+            os.getenv("LOCAL_FOLDER_PROCESSADOS", "").strip()
+            or os.path.join(pasta_upload, "processados")
+        )
+        return cls(pasta_upload=pasta_upload, pasta_processados=pasta_processados)
+
+
+class _AvisoNovoArquivo(FileSystemEventHandler):
+    """Sinaliza o evento quando um arquivo aparece na pasta de upload."""
+
+    def __init__(self, pasta: str, evento: threading.Event):
+        self._pasta = os.path.abspath(pasta)
+        self._evento = evento
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self._evento.set()
+
+    def on_moved(self, event):
+        # Sincronizadores gravam num temporário e renomeiam no fim; arquivos
+        # movidos para fora da pasta (processados) não contam
+        destino = os.path.dirname(os.path.abspath(event.dest_path))
+        if not event.is_directory and destino == self._pasta:
+            self._evento.set()
+
+
+class PastaLocalStorage:
+    source_name = "pasta_local"
+
+    def __init__(self, config: PastaLocalConfig):
+        self.config = config
+        self._novo_arquivo = threading.Event()
+        self._observador = None
+
+    @classmethod
+    def from_env(cls) -> "PastaLocalStorage":
+        return cls(PastaLocalConfig.from_env())
+
+    def listar_uploads(self) -> List[Dict]:
+        arquivos = []
+        with os.scandir(self.config.pasta_upload) as entradas:
+            for entrada in entradas:
+                if not entrada.is_file():
+                    continue
+                info = entrada.stat()
+                arquivos.append(
+                    {
+                        "id": f"local:{entrada.name}",
+                        "storage_id": entrada.path,
+                        "source": self.source_name,
+                        "name": entrada.name,
+                        "mimeType": mimetypes.guess_type(entrada.name)[0]
+                        or "application/octet-stream",
+                        "modifiedTime": datetime.fromtimestamp(
+                            info.st_mtime, tz=timezone.utc
+                        ).isoformat(),
+                        "size": info.st_size,
+                    }
+                )
+        return arquivos
+
+    def baixar(self, caminho: str, caminho_destino: str) -> str:
+        os.makedirs(os.path.dirname(caminho_destino) or ".", exist_ok=True)
+        shutil.copyfile(caminho, caminho_destino)
+        return caminho_destino
+
+    def mover_para_processados(self, caminho: str, ano_escolar: str) -> str:
+        pasta_destino = self.destino_label(ano_escolar)
+        os.makedirs(pasta_destino, exist_ok=True)
+        destino = os.path.join(pasta_destino, os.path.basename(caminho))
+        shutil.move(caminho, destino)
+        return destino
+
+    def destino_label(self, ano_escolar: str) -> str:
+        return os.path.join(self.config.pasta_processados, ano_escolar)
+
+    def aguardar_novos(self, segundos: float) -> bool:
+        """
+        Espera até `segundos`, voltando antes se um arquivo chegar na pasta.
+
+        Com watchdog instalado a espera é interrompida pelo evento do sistema
+        de arquivos (inotify no Linux); sem ele, apenas dorme o tempo todo.
+
+        Returns:
+            True se a espera foi interrompida por um arquivo novo
+        """
+        if Observer is None:
+            time.sleep(segundos)
+            return False
+
+        if self._observador is None:
+            self._observador = Observer()
+            self._observador.daemon = True
+            self._observador.schedule(
+                _AvisoNovoArquivo(self.config.pasta_upload, self._novo_arquivo),
+                self.config.pasta_upload,
+                recursive=False,
+            )
+            self._observador.start()
+
+        chegou = self._novo_arquivo.wait(segundos)
+        self._novo_arquivo.clear()
+        return chegou
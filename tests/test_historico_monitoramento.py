@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from historico_monitoramento import HistoricoMonitoramento
+
+
+class HistoricoMonitoramentoTest(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.pasta.name, "historico.db")
+        self.caminho_json = os.path.join(self.pasta.name, "historico.json")
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def test_registra_e_consulta_por_id_e_nome(self):
+        historico = HistoricoMonitoramento(self.caminho, self.caminho_json)
+        historico.registrar([{"id": "s3:a.pdf", "nome_sem_ext": "a"}])
+        historico.registrar([{"id": "s3:a.pdf", "nome_sem_ext": "a"}])
+
+        self.assertTrue(historico.contem_id("s3:a.pdf"))
+        self.assertTrue(historico.contem_nome("a"))
+        self.assertFalse(historico.contem_id("drive:a"))
+        self.assertEqual(historico.totais(), (1, 1))
+        historico.fechar()
+
+        reaberto = HistoricoMonitoramento(self.caminho, self.caminho_json)
+        self.assertTrue(reaberto.contem_id("s3:a.pdf"))
+        reaberto.fechar()
+
+    def test_motivo_processado_prioriza_id(self):
+        historico = HistoricoMonitoramento(self.caminho, self.caminho_json)
+        historico.registrar([
+            {"id": "drive:1", "nome_sem_ext": "joao"},
+            {"id": "s3:joao.pdf", "nome_sem_ext": "joao"},
+        ])
+
+        self.assertEqual(historico.motivo_processado("s3:joao.pdf", "joao"), "ID")
+        self.assertEqual(historico.motivo_processado("s3:joao.png", "joao"), "NOME")
+        self.assertIsNone(historico.motivo_processado("s3:maria.pdf", "maria"))
+        historico.fechar()
+
+    def test_consulta_a_partir_de_outra_thread(self):
+        historico = HistoricoMonitoramento(self.caminho, self.caminho_json)
+        historico.registrar([{"id": "s3:a.pdf", "nome_sem_ext": "a"}])
+        resultado = []
+
+        thread = threading.Thread(
+            target=lambda: resultado.append(historico.motivo_processado("s3:b.pdf", "a"))
+        )
+        thread.start()
+        thread.join()
+
+        self.assertEqual(resultado, ["NOME"])
+        historico.fechar()
+
+    def test_importa_historico_json(self):
+        with open(self.caminho_json, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "arquivos_processados": [
+                        {"id": "drive:1", "nome_sem_ext": "joao", "processado_em": "2025-01-01"},
+                        {"id": "drive:2", "nome_sem_ext": "maria", "processado_em": "2025-01-02"},
+                    ]
+                },
+                f,
+            )
+
+        historico = HistoricoMonitoramento(self.caminho, self.caminho_json)
+
+        self.assertTrue(historico.contem_id("drive:2"))
+        self.assertTrue(historico.contem_nome("joao"))
+        self.assertEqual(historico.totais(), (2, 2))
+        historico.fechar()
+
+
+if __name__ == "__main__":
+    unittest.main()
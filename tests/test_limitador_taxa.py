@@ -0,0 +1,54 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from limitador_taxa import LimitadorTaxa
+
+
+class RelogioFalso:
+    def __init__(self):
+        self.agora = 0.0
+        self.esperas = []
+
+    def __call__(self):
+        return self.agora
+
+    def dormir(self, segundos):
+        self.esperas.append(segundos)
+        self.agora += segundos
+
+
+class LimitadorTaxaTest(unittest.TestCase):
+    def test_libera_rajada_sem_esperar(self):
+        relogio = RelogioFalso()
+        limitador = LimitadorTaxa(3, relogio=relogio, dormir=relogio.dormir)
+
+        for _ in range(3):
+            self.assertEqual(limitador.aguardar(), 0.0)
+
+        self.assertEqual(relogio.esperas, [])
+
+    def test_espera_apenas_quando_balde_vazio(self):
+        relogio = RelogioFalso()
+        limitador = LimitadorTaxa(60, capacidade=1, relogio=relogio, dormir=relogio.dormir)
+
+        self.assertEqual(limitador.aguardar(), 0.0)
+        self.assertAlmostEqual(limitador.aguardar(), 1.0)
+
+        relogio.agora += 5
+        self.assertEqual(limitador.aguardar(), 0.0)
+
+    def test_le_cota_do_ambiente(self):
+        with patch.dict(os.environ, {"GEMINI_RPM": "30"}, clear=True):
+            self.assertEqual(LimitadorTaxa.from_env("GEMINI_RPM", 15).por_minuto, 30)
+
+        with patch.dict(os.environ, {"GEMINI_RPM": "abc"}, clear=True):
+            self.assertEqual(LimitadorTaxa.from_env("GEMINI_RPM", 15).por_minuto, 15)
+
+    def test_rejeita_cota_invalida(self):
+        with self.assertRaises(ValueError):
+            LimitadorTaxa(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
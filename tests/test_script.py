@@ -0,0 +1,347 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import gspread
+from googleapiclient.errors import HttpError
+
+import script
+from script import (
+    carregar_cache_resultados,
+    comparar_respostas,
+    comparar_respostas_lote,
+    registrar_cache_resultado,
+)
+
+
+def _gabarito(num_questoes, alternativas):
+    return [alternativas[i % len(alternativas)] for i in range(num_questoes)]
+
+
+class CompararRespostasTest(unittest.TestCase):
+    def setUp(self):
+        # 52 questões: colunas de 13 (PT 1-13, MT 14-26, PT 27-39, MT 40-52)
+        self.gabarito_52 = _gabarito(52, "ABCDE")
+        self.gabarito_52[51] = "?"  # Q52 anulada no próprio gabarito
+        self.aluno_52 = list(self.gabarito_52)
+        self.aluno_52[0] = "E" if self.gabarito_52[0] != "E" else "A"  # Q1 errada (PT)
+        self.aluno_52[13] = "?"  # Q14 em branco (MT)
+        self.aluno_52[26] = "?"  # Q27 com dupla marcação (PT), lida como '?'
+        self.aluno_52[39] = "A" if self.gabarito_52[39] != "A" else "B"  # Q40 errada (MT)
+
+        # 44 questões: colunas de 11 (PT 1-11, MT 12-22, PT 23-33, MT 34-44)
+        self.gabarito_44 = _gabarito(44, "DCBA")
+        self.aluno_44 = list(self.gabarito_44)
+        self.aluno_44[10] = "E"  # Q11 errada (PT)
+        self.aluno_44[11] = "?"  # Q12 em branco (MT)
+        self.aluno_44[22] = "E"  # Q23 errada (PT)
+        self.aluno_44[43] = "?"  # Q44 com dupla marcação (MT)
+
+    def assertResultado(self, resultado, esperado):
+        for chave, valor in esperado.items():
+            self.assertEqual(resultado[chave], valor, chave)
+
+    def test_cartao_de_52_questoes(self):
+        resultado = comparar_respostas(self.gabarito_52, self.aluno_52)
+
+        self.assertResultado(resultado, {
+            "total": 52,
+            "questoes_validas": 49,
+            "anuladas": 3,
+            "acertos": 47,
+            "acertos_portugues": 24,
+            "acertos_matematica": 23,
+            "erros": 2,
+            "erros_portugues": 1,
+            "erros_matematica": 1,
+        })
+        self.assertAlmostEqual(resultado["percentual"], 47 / 49 * 100)
+        self.assertEqual(resultado["indices_erros"].tolist(), [0, 39])
+        status = resultado["detalhes"]["status"].tolist()
+        self.assertEqual((status[0], status[13], status[26], status[51]), ("✗", "ANULADA", "ANULADA", "ANULADA"))
+
+    def test_cartao_de_44_questoes(self):
+        resultado = comparar_respostas(self.gabarito_44, self.aluno_44)
+
+        self.assertResultado(resultado, {
+            "total": 44,
+            "questoes_validas": 42,
+            "anuladas": 2,
+            "acertos": 40,
+            "acertos_portugues": 20,
+            "acertos_matematica": 20,
+            "erros": 2,
+            "erros_portugues": 2,
+            "erros_matematica": 0,
+        })
+        self.assertEqual(resultado["indices_erros"].tolist(), [10, 22])
+
+    def test_cartao_todo_em_branco(self):
+        resultado = comparar_respostas(self.gabarito_44, ["?"] * 44)
+
+        self.assertResultado(resultado, {"anuladas": 44, "questoes_validas": 0, "acertos": 0, "erros": 0})
+        self.assertEqual(resultado["percentual"], 0)
+
+    def test_alternativa_desconhecida_conta_como_erro(self):
+        aluno = list(self.gabarito_44)
+        aluno[0] = "X"
+
+        resultado = comparar_respostas(self.gabarito_44, aluno)
+
+        self.assertResultado(resultado, {"acertos": 43, "erros": 1, "anuladas": 0})
+
+    def test_compara_ate_o_menor_tamanho(self):
+        resultado = comparar_respostas(self.gabarito_52, self.aluno_52[:40])
+
+        self.assertEqual(resultado["total"], 40)
+        self.assertEqual(resultado["acertos"], 36)
+
+    def test_sem_questoes(self):
+        resultado = comparar_respostas([], [])
+
+        self.assertResultado(resultado, {"total": 0, "acertos": 0, "percentual": 0})
+
+    def test_lote_igual_a_comparacao_individual(self):
+        alunos = [self.aluno_52, self.gabarito_52, ["?"] * 52, self.aluno_52[:30]]
+
+        lote = comparar_respostas_lote(self.gabarito_52, alunos)
+
+        self.assertEqual(len(lote), len(alunos))
+        for resultado_lote, aluno in zip(lote, alunos):
+            individual = comparar_respostas(self.gabarito_52, aluno)
+            for chave in ("total", "anuladas", "acertos_portugues", "acertos_matematica",
+                          "erros_portugues", "erros_matematica", "percentual"):
+                self.assertEqual(resultado_lote[chave], individual[chave], chave)
+            self.assertEqual(resultado_lote["detalhes"].tolist(), individual["detalhes"].tolist())
+
+
+class IntervaloMonitorTest(unittest.TestCase):
+    def test_cresce_ate_o_teto_sem_novidades(self):
+        self.assertEqual(script._proximo_intervalo_monitor(60, False), 90)
+        self.assertEqual(script._proximo_intervalo_monitor(1500, False), script.INTERVALO_MONITOR_MAXIMO)
+        self.assertEqual(script._proximo_intervalo_monitor(100, False, maximo=120), 120)
+
+    def test_cai_pela_metade_ate_o_piso_com_novidades(self):
+        self.assertEqual(script._proximo_intervalo_monitor(600, True), 300)
+        self.assertEqual(script._proximo_intervalo_monitor(40, True), script.INTERVALO_MONITOR_MINIMO)
+
+
+class _RespostaHttp:
+    def __init__(self, status):
+        self.status = status
+        self.status_code = status
+
+
+class ErroAntesDaEscritaTest(unittest.TestCase):
+    def _erro_api(self, status):
+        erro = gspread.exceptions.APIError.__new__(gspread.exceptions.APIError)
+        erro.response = _RespostaHttp(status)
+        return erro
+
+    def _erro_http(self, status):
+        erro = HttpError.__new__(HttpError)
+        erro.resp = _RespostaHttp(status)
+        return erro
+
+    def test_cota_esgotada_pode_ser_repetida(self):
+        self.assertTrue(script._erro_antes_da_escrita(self._erro_api(429)))
+        self.assertTrue(script._erro_antes_da_escrita(self._erro_http(429)))
+
+    def test_erro_do_servidor_e_timeout_nao_sao_repetidos(self):
+        self.assertFalse(script._erro_antes_da_escrita(self._erro_api(500)))
+        self.assertFalse(script._erro_antes_da_escrita(self._erro_http(503)))
+        self.assertFalse(script._erro_antes_da_escrita(TimeoutError()))
+        self.assertFalse(script._erro_antes_da_escrita(ConnectionResetError()))
+
+    def test_conexao_recusada_embrulhada(self):
+        try:
+            try:
+                raise ConnectionRefusedError()
+            except OSError as e:
+                raise OSError("nova conexão falhou") from e
+        except OSError as embrulhado:
+            self.assertTrue(script._erro_antes_da_escrita(OSError(embrulhado)))
+
+
+class CabecalhoComFallbackTest(unittest.TestCase):
+    def test_padrao_numerado_quando_nao_le(self):
+        dados = script.extrair_cabecalho_com_fallback(None, "cartao.png", numero_aluno=3)
+
+        self.assertEqual(dados["aluno"], "Aluno 3")
+
+    def test_sem_padrao_retorna_none(self):
+        self.assertIsNone(
+            script.extrair_cabecalho_com_fallback(None, "cartao.png", numero_aluno=3, padrao_se_falhar=False)
+        )
+
+
+class IterResultadosTest(unittest.TestCase):
+    def setUp(self):
+        self.gabarito = _gabarito(44, "ABCD")
+        self.liberar_lento = threading.Event()
+        patches = [
+            # Threads no lugar de processos: os substitutos abaixo valem nos workers
+            mock.patch.object(script, "ProcessPoolExecutor", ThreadPoolExecutor),
+            mock.patch.object(script, "_ler_respostas_cartao", self._ler),
+            mock.patch.object(script, "_num_workers", lambda total: total),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _ler(self, caminho, indice, *args):
+        if os.path.basename(caminho) == "lento.png":
+            self.assertTrue(self.liberar_lento.wait(5))
+        return caminho, list(self.gabarito)
+
+    def _iter(self, **kwargs):
+        return script._iter_resultados("pasta", ["lento.png", "rapido.png"], self.gabarito, 44, False, **kwargs)
+
+    def test_produz_aluno_pronto_antes_do_omr_terminar(self):
+        resultados = self._iter()
+
+        i, resultado, reaproveitado, _ = next(resultados)
+        self.liberar_lento.set()
+        restantes = list(resultados)
+
+        self.assertEqual((i, resultado["arquivo"], reaproveitado), (2, "rapido.png", False))
+        self.assertEqual([r[0] for r in restantes], [1])
+
+    def test_produz_aluno_quando_o_lote_de_cabecalhos_responde(self):
+        def cabecalhos(model, imagens):
+            return [{"aluno": os.path.basename(img)} for img in imagens]
+
+        with mock.patch.object(script, "extrair_cabecalhos_em_lote", cabecalhos):
+            resultados = self._iter(model_gemini=object())
+            i, resultado, _, cabecalho_lido = next(resultados)
+            self.liberar_lento.set()
+            restantes = list(resultados)
+
+        self.assertEqual((i, resultado["dados_completos"]["Aluno"], cabecalho_lido), (2, "rapido.png", True))
+        self.assertEqual([(r[0], r[3]) for r in restantes], [(1, True)])
+
+    def test_cache_sai_primeiro_sem_omr(self):
+        self.liberar_lento.set()
+        em_cache = {"arquivo": "lento.png", "acertos": 44, "total": 44, "percentual": 100.0}
+
+        resultados = list(self._iter(resultados_em_cache={1: em_cache}))
+
+        self.assertEqual(resultados[0], (1, em_cache, True, False))
+        self.assertEqual([r[0] for r in resultados], [1, 2])
+
+
+class _ModeloFalso:
+    def __init__(self, *respostas):
+        self.respostas = list(respostas)
+        self.pedidos = []
+
+    def generate_content(self, partes):
+        self.pedidos.append(partes)
+        return mock.Mock(text=self.respostas.pop(0))
+
+
+class GeminiEmLoteTest(unittest.TestCase):
+    def _lote(self, model, imagens, tamanho_lote=10):
+        with mock.patch.object(script.LIMITADOR_GEMINI, "aguardar"):
+            return script._gemini_em_lote(
+                model,
+                imagens,
+                preparar=lambda imagem: None if imagem == "branco" else imagem.upper(),
+                montar_prompt=lambda quantidade: f"{quantidade} imagens",
+                mapear=lambda dados: dados["aluno"],
+                tamanho_lote=tamanho_lote,
+            )
+
+    def _objeto(self, aluno):
+        return {"escola": "E", "aluno": aluno, "turma": "T", "nascimento": "N"}
+
+    def test_mapeia_na_ordem_e_pula_imagens_nao_preparadas(self):
+        model = _ModeloFalso(
+            "ok: " + json.dumps([self._objeto("Ana"), {"aluno": "sem campos"}]),
+            json.dumps([self._objeto("Caio")]),
+        )
+
+        resultados = self._lote(model, ["a", "branco", "b", "c"], tamanho_lote=3)
+
+        self.assertEqual(resultados, ["Ana", None, None, "Caio"])
+        self.assertEqual(model.pedidos, [["2 imagens", "A", "B"], ["1 imagens", "C"]])
+
+    def test_quantidade_inesperada_deixa_o_lote_para_a_extracao_individual(self):
+        model = _ModeloFalso(json.dumps([self._objeto("Ana")]))
+
+        self.assertEqual(self._lote(model, ["a", "b"]), [None, None])
+
+
+class CacheResultadosTest(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.pasta.name, ".cache", "resultados.jsonl")
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def test_chave_inclui_a_origem_do_cabecalho(self):
+        resultado = {"arquivo": "joao.png", "acertos": 40}
+        registrar_cache_resultado(self.caminho, ("joao.png", "h1", "g1", "padrao"), resultado)
+
+        cache = carregar_cache_resultados(self.caminho)
+
+        self.assertEqual(cache[("joao.png", "h1", "g1", "padrao")], resultado)
+        self.assertNotIn(("joao.png", "h1", "g1", "gemini"), cache)
+
+    def test_ignora_linhas_truncadas_e_do_formato_anterior(self):
+        os.makedirs(os.path.dirname(self.caminho))
+        with open(self.caminho, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"arquivo": "a.png", "hash": "h", "hash_gabarito": "g",
+                                "resultado_completo": {}}) + "\n")
+            f.write('{"arquivo": "b.png", "ha')
+
+        self.assertEqual(carregar_cache_resultados(self.caminho), {})
+
+
+class PodarCacheOmrTest(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(self.pasta.cleanup)
+        for patch in (
+            mock.patch.object(script, "PASTA_CACHE_OMR", self.pasta.name),
+            mock.patch.object(script, "_CACHE_OMR_PODADO", False),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _arquivo(self, nome, idade):
+        caminho = os.path.join(self.pasta.name, nome)
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write("{}")
+        instante = os.path.getmtime(caminho) - idade
+        os.utime(caminho, (instante, instante))
+        return caminho
+
+    def test_apaga_so_os_expirados(self):
+        antigo = self._arquivo("antigo.json", script.TTL_CACHE_OMR + 60)
+        temporario = self._arquivo("antigo.json.123.tmp", script.TTL_CACHE_OMR + 60)
+        recente = self._arquivo("recente.json", 60)
+
+        script._guardar_respostas_omr("novo", ["A", "?"])
+
+        self.assertFalse(os.path.exists(antigo))
+        self.assertFalse(os.path.exists(temporario))
+        self.assertTrue(os.path.exists(recente))
+        self.assertEqual(script._respostas_omr_em_cache("novo"), ["A", "?"])
+
+    def test_poda_uma_vez_por_processo(self):
+        script._podar_cache_omr()
+        antigo = self._arquivo("antigo.json", script.TTL_CACHE_OMR + 60)
+
+        script._podar_cache_omr()
+
+        self.assertTrue(os.path.exists(antigo))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -58,6 +58,55 @@ class GoogleDriveStorageTest(unittest.TestCase):
         self.assertEqual(arquivos[0]["storage_id"], "arquivo-1")
         self.assertEqual(arquivos[0]["source"], "google_drive")
 
+    def test_consultas_seguintes_usam_api_de_mudancas(self):
+        self.service.changes.return_value.getStartPageToken.return_value.execute.return_value = {
+            "startPageToken": "token-1"
+        }
+        self.service.files.return_value.list.return_value.execute.return_value = {
+            "files": [
+                {"id": "arquivo-1", "name": "turma.pdf", "mimeType": "application/pdf"}
+            ]
+        }
+        self.storage.listar_uploads()
+
+        self.service.changes.return_value.list.return_value.execute.return_value = {
+            "newStartPageToken": "token-2",
+            "changes": [
+                {
+                    "fileId": "arquivo-1",
+                    "file": {"id": "arquivo-1", "name": "turma.pdf", "parents": ["destino-5"]},
+                },
+                {
+                    "fileId": "arquivo-2",
+                    "file": {
+                        "id": "arquivo-2",
+                        "name": "aluno.png",
+                        "mimeType": "image/png",
+                        "parents": ["entrada"],
+                    },
+                },
+            ],
+        }
+
+        arquivos = self.storage.listar_uploads()
+
+        self.assertEqual([arquivo["id"] for arquivo in arquivos], ["drive:arquivo-2"])
+        self.service.files.return_value.list.assert_called_once()
+        self.assertEqual(
+            self.service.changes.return_value.list.call_args.kwargs["pageToken"],
+            "token-1",
+        )
+
+    def test_baixa_arquivo_numa_requisicao(self):
+        self.service.files.return_value.get_media.return_value.execute.return_value = b"conteudo"
+
+        with patch("builtins.open", mock_open()) as arquivo:
+            destino = self.storage.baixar("arquivo-1", "turma.pdf")
+
+        self.assertEqual(destino, "turma.pdf")
+        self.service.files.return_value.get_media.assert_called_once_with(fileId="arquivo-1")
+        arquivo.return_value.write.assert_called_once_with(b"conteudo")
+
     def test_move_para_pasta_do_ano(self):
         self.service.files.return_value.get.return_value.execute.return_value = {
             "parents": ["entrada"]
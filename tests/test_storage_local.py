@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from storage_local import PastaLocalConfig, PastaLocalStorage
+
+
+class PastaLocalStorageTest(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.upload = self.pasta.name
+        with open(os.path.join(self.upload, "turma-a.pdf"), "wb") as arquivo:
+            arquivo.write(b"%PDF")
+        os.makedirs(os.path.join(self.upload, "processados"))
+
+        with patch.dict(os.environ, {"LOCAL_FOLDER_UPLOAD": self.upload}, clear=True):
+            self.storage = PastaLocalStorage.from_env()
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def test_lista_apenas_arquivos_da_pasta(self):
+        arquivos = self.storage.listar_uploads()
+
+        self.assertEqual(len(arquivos), 1)
+        self.assertEqual(arquivos[0]["id"], "local:turma-a.pdf")
+        self.assertEqual(arquivos[0]["source"], "pasta_local")
+        self.assertEqual(arquivos[0]["mimeType"], "application/pdf")
+        self.assertEqual(arquivos[0]["size"], 4)
+
+    def test_baixa_e_move_para_pasta_do_ano(self):
+        arquivo = self.storage.listar_uploads()[0]
+        copia = os.path.join(self.upload, "tmp", "copia.pdf")
+
+        self.storage.baixar(arquivo["storage_id"], copia)
+        destino = self.storage.mover_para_processados(arquivo["storage_id"], "5ano")
+
+        with open(copia, "rb") as f:
+            self.assertEqual(f.read(), b"%PDF")
+        self.assertEqual(destino, os.path.join(self.upload, "processados", "5ano", "turma-a.pdf"))
+        self.assertTrue(os.path.exists(destino))
+        self.assertEqual(self.storage.listar_uploads(), [])
+
+    def test_rejeita_pasta_inexistente(self):
+        with patch.dict(os.environ, {"LOCAL_FOLDER_UPLOAD": os.path.join(self.upload, "nada")}, clear=True):
+            with self.assertRaises(RuntimeError):
+                PastaLocalConfig.from_env()
+
+
+if __name__ == "__main__":
+    unittest.main()